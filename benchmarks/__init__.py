@@ -0,0 +1,40 @@
+#  Copyright (c) 2024 Gavin E. Crooks
+#
+#  This software is distributed under the MIT Open Source License.
+#  <http://www.opensource.org/licenses/mit-license.html>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#  THE SOFTWARE.
+
+"""Benchmarks of the speed and memory use of WebLogo.
+
+The suite times the sequence file parsers, alphabet detection, sequence
+profiles, the column statistics of LogoData (with and without a prior), EPS
+and SVG formatting, and Ghostscript conversion, on synthetic alignments of
+varying size.
+
+Run the suite from the top of the source tree:
+
+    python -m benchmarks                        # Run and report
+    python -m benchmarks --quick -k profile     # Smaller inputs, some cases
+    python -m benchmarks --save base.json       # Save results as a baseline
+    python -m benchmarks --baseline base.json   # Compare with a baseline
+
+When compared with a baseline, cases that are slower than the threshold are
+reported as regressions, and the exit status is 1.
+"""
@@ -0,0 +1,98 @@
+#  Copyright (c) 2024 Gavin E. Crooks
+#
+#  This software is distributed under the MIT Open Source License.
+#  <http://www.opensource.org/licenses/mit-license.html>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#  THE SOFTWARE.
+
+"""Command line runner of the benchmark suite. See benchmarks/__init__.py"""
+
+import json
+import sys
+from argparse import ArgumentParser
+
+from .suite import (
+    benchmarks,
+    compare,
+    format_comparison,
+    format_result,
+    format_results,
+    run_benchmarks,
+)
+
+
+def main() -> None:
+    parser = ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument(
+        "-k", dest="pattern", help="Only run cases whose name contains PATTERN"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Timed runs of each case (default: 5)"
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="Smaller alignments, for a fast check"
+    )
+    parser.add_argument("--list", action="store_true", help="List the cases")
+    parser.add_argument("--save", metavar="FILE", help="Save the results as JSON")
+    parser.add_argument(
+        "--baseline", metavar="FILE", help="Compare with results saved earlier"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Fractional slow down reported as a regression (default: 0.25)",
+    )
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    if args.list:
+        for case in benchmarks(args.quick):
+            if not args.pattern or args.pattern in case.name:
+                print(case.name)
+        return
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print(format_results({"results": []}), end="")
+    results = run_benchmarks(
+        args.pattern,
+        args.repeat,
+        args.quick,
+        progress=lambda result: print(format_result(result), flush=True),
+    )
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if baseline is not None:
+        comparisons = compare(results, baseline, args.threshold)
+        print()
+        print(format_comparison(comparisons), end="")
+        if any(c["status"] == "slower" for c in comparisons):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
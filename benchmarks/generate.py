@@ -0,0 +1,117 @@
+#  Copyright (c) 2024 Gavin E. Crooks
+#
+#  This software is distributed under the MIT Open Source License.
+#  <http://www.opensource.org/licenses/mit-license.html>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#  THE SOFTWARE.
+
+"""Synthetic alignments for benchmarks.
+
+Each column has its own residue distribution, drawn from a Dirichlet
+distribution, so that columns range from conserved to uniform as in real
+alignments. Alignments are reproducible for a given seed.
+"""
+
+from io import StringIO
+
+import numpy as np
+
+from weblogo.seq import (
+    Alphabet,
+    Seq,
+    SeqList,
+    dna_alphabet,
+    protein_alphabet,
+    unambiguous_dna_alphabet,
+    unambiguous_protein_alphabet,
+)
+from weblogo.seq_io import clustal_io, fasta_io
+
+__all__ = ["alphabets", "random_alignment", "alignment_text"]
+
+alphabets = {
+    "dna": unambiguous_dna_alphabet,
+    "protein": unambiguous_protein_alphabet,
+}
+
+# Alphabets of the sequences, which also allow gaps
+_gapped_alphabets = {"dna": dna_alphabet, "protein": protein_alphabet}
+
+
+def random_alignment(
+    n: int,
+    length: int,
+    kind: str = "dna",
+    gap_fraction: float = 0.0,
+    seed: int = 0,
+    concentration: float = 0.5,
+) -> SeqList:
+    """Generate a random alignment of n sequences of the given length. The
+    alignment's alphabet is the unambiguous DNA or protein alphabet, as
+    Alphabet.which would choose, so gaps are not counted in profiles.
+
+    Args:
+        n: Number of sequences
+        length: Number of columns
+        kind: 'dna' or 'protein'
+        gap_fraction: Fraction of residues replaced by gaps ('-')
+        seed: Seed of the random number generator
+        concentration: Dirichlet concentration of the column distributions.
+            Small values give conserved columns.
+    """
+    if kind not in alphabets:
+        raise ValueError("Unknown kind of alignment: %s" % kind)
+    if not 0.0 <= gap_fraction < 1.0:
+        raise ValueError("Gap fraction must be at least 0 and less than 1")
+    alphabet: Alphabet = alphabets[kind]
+    letters = np.frombuffer(str(alphabet).encode(), dtype=np.uint8)
+    A = len(letters)
+
+    rng = np.random.default_rng(seed)
+    dist = rng.dirichlet(np.full(A, concentration), size=length)
+    # Sample each column by inverting its cumulative distribution
+    cdf = np.cumsum(dist, axis=1)
+    cdf[:, -1] = 1.0
+    u = rng.random((length, n))
+    ords: np.ndarray = np.empty((n, length), dtype=np.intp)
+    for j in range(length):
+        ords[:, j] = np.searchsorted(cdf[j], u[j], side="right")
+    residues = letters[ords]
+    if gap_fraction > 0.0:
+        residues[rng.random((n, length)) < gap_fraction] = ord("-")
+
+    rows = residues.tobytes().decode("ascii")
+    gapped = _gapped_alphabets[kind]
+    seqs = [
+        Seq(rows[i * length : (i + 1) * length], gapped, name="seq%d" % i)
+        for i in range(n)
+    ]
+    return SeqList(seqs, alphabet)
+
+
+def alignment_text(seqs: SeqList, format: str = "fasta") -> str:
+    """Format an alignment as 'fasta', 'clustal' or 'plain' text."""
+    if format == "plain":
+        return "\n".join(seqs) + "\n"
+    writers = {"fasta": fasta_io.write, "clustal": clustal_io.write}
+    if format not in writers:
+        raise ValueError("Unknown format: %s" % format)
+    fout = StringIO()
+    writers[format](fout, seqs)
+    return fout.getvalue()
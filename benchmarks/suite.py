@@ -0,0 +1,457 @@
+#  Copyright (c) 2024 Gavin E. Crooks
+#
+#  This software is distributed under the MIT Open Source License.
+#  <http://www.opensource.org/licenses/mit-license.html>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#  THE SOFTWARE.
+
+"""The benchmark cases, and the runner that times them and compares the
+results with a baseline.
+
+Each case has a setup, which is not timed, and a run, which is timed
+repeatedly. The best wall time is reported, since it is the least disturbed by
+other activity on the machine, along with the median wall time, CPU time,
+throughput and the peak memory allocated by the run (traced by tracemalloc in
+one extra, untimed, run).
+"""
+
+import os
+import platform
+import statistics
+import tempfile
+import time
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+import weblogo
+from weblogo import (
+    LogoData,
+    LogoFormat,
+    LogoOptions,
+    eps_formatter,
+    parse_prior,
+    seq_io,
+    svg_formatter,
+)
+from weblogo.logo_formatter import GhostscriptAPI
+from weblogo.seq import Alphabet
+from weblogo.seq_io import clustal_io, fasta_io, plain_io
+from weblogo.timings import Timings, timed
+from weblogo.weights import sequence_weights
+
+from .generate import alignment_text, alphabets, random_alignment
+
+__all__ = [
+    "Benchmark",
+    "benchmarks",
+    "run_benchmarks",
+    "compare",
+    "format_result",
+    "format_results",
+    "format_comparison",
+]
+
+
+class Benchmark:
+    """A benchmark case.
+
+    Args:
+        name: Name of the case, e.g. 'profile.dna.10000x200'
+        setup: Called once, untimed. Returns the argument of run.
+        run: The timed function
+        items: Number of items (residues, columns, ...) processed by each run
+        unit: Name of the items
+        teardown: Optionally called with the argument of run, when done
+    """
+
+    def __init__(
+        self,
+        name: str,
+        setup: Callable[[], Any],
+        run: Callable[[Any], Any],
+        items: int,
+        unit: str,
+        teardown: Optional[Callable[[Any], None]] = None,
+    ) -> None:
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.items = items
+        self.unit = unit
+        self.teardown = teardown
+
+    def __repr__(self) -> str:
+        return "Benchmark(%r)" % self.name
+
+
+class _Skip(Exception):
+    """Raised by a benchmark's setup if the case cannot run here."""
+
+
+# Alignment sizes, (kind, sequences, columns, gap fraction). Quick runs divide
+# the number of sequences by ten.
+_sizes = [
+    ("dna", 1000, 100, 0.0),
+    ("dna", 10000, 100, 0.0),
+    ("dna", 1000, 1000, 0.0),
+    ("dna", 10000, 100, 0.3),
+    ("protein", 2000, 300, 0.1),
+]
+
+
+def _alignment_file(text: str) -> str:
+    fd, filename = tempfile.mkstemp(suffix=".txt", prefix="weblogo_bench_")
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    return filename
+
+
+def _parse(reader: Callable, filename: str) -> None:
+    with open(filename) as fin:
+        reader(fin)
+
+
+def _profile(alphabet: Alphabet, aln: weblogo.Alignment) -> Any:
+    return aln.profile(alphabet)
+
+
+def _convert(format: str, args: Tuple[GhostscriptAPI, str, LogoFormat]) -> bytes:
+    gs, eps, logoformat = args
+    return gs.convert(
+        format,
+        eps,
+        logoformat.logo_width,
+        logoformat.logo_height,
+        logoformat.resolution,
+    )
+
+
+def benchmarks(quick: bool = False) -> Iterator[Benchmark]:
+    """Generate the benchmark cases. Synthetic alignments are created lazily
+    by each case's setup."""
+    scale = 10 if quick else 1
+
+    def aligned(kind: str, n: int, L: int, gaps: float) -> Callable[[], Any]:
+        return lambda: random_alignment(n, L, kind, gaps)
+
+    # Parsers, reading from files as the command line does
+    parsers = [
+        ("fasta", fasta_io.read),
+        ("clustal", clustal_io.read),
+        ("plain", plain_io.read),
+        ("sniff", seq_io.read),
+    ]
+    for kind, n, L, gaps in _sizes[:3]:
+        n //= scale
+        for format, reader in parsers:
+            text_format = "fasta" if format == "sniff" else format
+
+            def setup_parse(
+                kind: str = kind, n: int = n, L: int = L, format: str = text_format
+            ) -> str:
+                return _alignment_file(
+                    alignment_text(random_alignment(n, L, kind), format)
+                )
+
+            yield Benchmark(
+                "parse.%s.%s.%dx%d" % (format, kind, n, L),
+                setup_parse,
+                partial(_parse, reader),
+                n * L,
+                "residues",
+                os.remove,
+            )
+
+    for kind, n, L, gaps in _sizes:
+        n //= scale
+        size = "%s.%dx%d%s" % (kind, n, L, ".gaps%g" % gaps if gaps else "")
+        yield Benchmark(
+            "which." + size,
+            aligned(kind, n, L, gaps),
+            lambda seqs: Alphabet.which(seqs),
+            n * L,
+            "residues",
+        )
+        yield Benchmark(
+            "which.sample." + size,
+            aligned(kind, n, L, gaps),
+            lambda seqs: Alphabet.which(seqs, sample=True),
+            n * L,
+            "residues",
+        )
+        yield Benchmark(
+            "profile.seqlist." + size,
+            aligned(kind, n, L, gaps),
+            lambda seqs: seqs.profile(),
+            n * L,
+            "residues",
+        )
+
+        def setup_alignment(
+            kind: str = kind, n: int = n, L: int = L, gaps: float = gaps
+        ) -> weblogo.Alignment:
+            seqs = random_alignment(n, L, kind, gaps)
+            return weblogo.Alignment.from_seqs(seqs, seqs[0].alphabet)
+
+        yield Benchmark(
+            "profile.alignment." + size,
+            setup_alignment,
+            partial(_profile, alphabets[kind]),
+            n * L,
+            "residues",
+        )
+
+    # Column statistics, with and without a prior. The Bayesian entropy of
+    # each column is the expensive part.
+    for kind, n, L in [("dna", 1000, 1000), ("protein", 1000, 300)]:
+        n //= scale
+        for prior in ["none", "equiprobable"]:
+
+            def setup_counts(
+                kind: str = kind, n: int = n, L: int = L, prior: str = prior
+            ) -> Any:
+                seqs = random_alignment(n, L, kind)
+                return seqs.alphabet, seqs.profile(), parse_prior(prior, seqs.alphabet)
+
+            yield Benchmark(
+                "from_counts.%s.%s.%dx%d" % (prior, kind, n, L),
+                setup_counts,
+                lambda args: LogoData.from_counts(*args),
+                L,
+                "columns",
+            )
+
+    # Clustering for sequence weights, on an alignment with conserved columns
+    # and gaps, so that most sequences share some blocks of columns.
+    n = 8000 // scale
+
+    def setup_cluster(n: int = n) -> weblogo.Alignment:
+        aln = weblogo.Alignment.from_seqs(random_alignment(n, 100, "protein", 0.2))
+        aln.ords[:, :30] = 0  # Conserved columns
+        return aln
+
+    yield Benchmark(
+        "weights.cluster.protein.%dx100.gaps0.2" % n,
+        setup_cluster,
+        lambda aln: sequence_weights(aln, "cluster"),
+        n,
+        "sequences",
+    )
+
+    # Formatting and conversion of logos
+    for kind, L in [("dna", 100), ("protein", 300 // scale)]:
+
+        def setup_format(kind: str = kind, L: int = L) -> Any:
+            data = LogoData.from_seqs(random_alignment(100, L, kind))
+            return data, LogoFormat(data, LogoOptions())
+
+        yield Benchmark(
+            "eps_formatter.%s.%d" % (kind, L),
+            setup_format,
+            lambda args: eps_formatter(*args),
+            L,
+            "columns",
+        )
+        yield Benchmark(
+            "svg_formatter.%s.%d" % (kind, L),
+            setup_format,
+            lambda args: svg_formatter(*args),
+            L,
+            "columns",
+        )
+
+    for format in ["png", "pdf"]:
+
+        def setup_gs() -> Any:
+            try:
+                gs = GhostscriptAPI()
+            except EnvironmentError:
+                raise _Skip("Ghostscript not found")
+            data = LogoData.from_seqs(random_alignment(100, 50, "dna"))
+            logoformat = LogoFormat(data, LogoOptions())
+            eps = eps_formatter(data, logoformat).decode()
+            return gs, eps, logoformat
+
+        yield Benchmark(
+            "ghostscript.%s.dna.50" % format,
+            setup_gs,
+            partial(_convert, format),
+            50,
+            "columns",
+        )
+
+
+def _run_case(case: Benchmark, repeat: int) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"name": case.name, "unit": case.unit}
+    try:
+        arg = case.setup()
+    except _Skip as err:
+        result["skipped"] = str(err)
+        return result
+
+    try:
+        case.run(arg)  # Warm up
+        walls = []
+        cpus = []
+        for _ in range(repeat):
+            wall = time.perf_counter()
+            cpu = time.process_time()
+            case.run(arg)
+            walls.append(time.perf_counter() - wall)
+            cpus.append(time.process_time() - cpu)
+
+        with Timings() as timings:
+            with timed(case.name):
+                case.run(arg)
+    finally:
+        if case.teardown is not None:
+            case.teardown(arg)
+
+    best = min(walls)
+    result.update(
+        items=case.items,
+        repeat=repeat,
+        wall_time=best,
+        median_wall_time=statistics.median(walls),
+        cpu_time=min(cpus),
+        throughput=case.items / best if best > 0 else float("inf"),
+        peak_memory=timings.as_dict()["stages"][0]["peak_memory"],
+    )
+    return result
+
+
+def run_benchmarks(
+    pattern: Optional[str] = None,
+    repeat: int = 5,
+    quick: bool = False,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Run the benchmark cases whose name contains the pattern (or all
+    cases).
+
+    Returns: A dictionary with a description of the environment and a list
+        of results, suitable for saving as JSON and later comparison.
+    """
+    results: List[Dict[str, Any]] = []
+    for case in benchmarks(quick):
+        if pattern and pattern not in case.name:
+            continue
+        result = _run_case(case, repeat)
+        results.append(result)
+        if progress is not None:
+            progress(result)
+
+    return {
+        "environment": {
+            "weblogo": weblogo.__version__,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.25
+) -> List[Dict[str, Any]]:
+    """Compare benchmark results with a baseline. A case is a regression if
+    its best wall time is more than (1 + threshold) times the baseline, and an
+    improvement if it is less than 1 / (1 + threshold) times the baseline.
+
+    Returns: A list of comparisons, one for each case in both results.
+    """
+    base = {r["name"]: r for r in baseline["results"] if "wall_time" in r}
+    comparisons = []
+    for result in results["results"]:
+        before = base.get(result["name"])
+        if before is None or "wall_time" not in result:
+            continue
+        ratio = result["wall_time"] / before["wall_time"]
+        if ratio > 1.0 + threshold:
+            status = "slower"
+        elif ratio < 1.0 / (1.0 + threshold):
+            status = "faster"
+        else:
+            status = "same"
+        comparisons.append(
+            {
+                "name": result["name"],
+                "baseline": before["wall_time"],
+                "wall_time": result["wall_time"],
+                "ratio": ratio,
+                "status": status,
+            }
+        )
+    return comparisons
+
+
+def _format_memory(memory: int) -> str:
+    return "%.1f" % (memory / 1024.0**2)
+
+
+def format_result(result: Dict[str, Any]) -> str:
+    """One line of the results table."""
+    if "skipped" in result:
+        return "%-42s skipped: %s" % (result["name"], result["skipped"])
+    return "%-42s %10.2f %10.2f %10.2f %12.3g %-10s %8s" % (
+        result["name"],
+        result["wall_time"] * 1000.0,
+        result["median_wall_time"] * 1000.0,
+        result["cpu_time"] * 1000.0,
+        result["throughput"],
+        result["unit"] + "/s",
+        _format_memory(result["peak_memory"]),
+    )
+
+
+_results_header = "%-42s %10s %10s %10s %23s %8s" % (
+    "benchmark",
+    "best (ms)",
+    "median",
+    "cpu (ms)",
+    "throughput",
+    "mem (MB)",
+)
+
+
+def format_results(results: Dict[str, Any]) -> str:
+    """A human readable table of benchmark results."""
+    lines = [_results_header]
+    lines += [format_result(r) for r in results["results"]]
+    return "\n".join(lines) + "\n"
+
+
+def format_comparison(comparisons: List[Dict[str, Any]]) -> str:
+    """A human readable table comparing results with a baseline."""
+    lines = ["%-42s %10s %10s %8s" % ("benchmark", "base (ms)", "now (ms)", "ratio")]
+    for c in comparisons:
+        line = "%-42s %10.2f %10.2f %8.2f" % (
+            c["name"],
+            c["baseline"] * 1000.0,
+            c["wall_time"] * 1000.0,
+            c["ratio"],
+        )
+        if c["status"] != "same":
+            line += " " + c["status"].upper()
+        lines.append(line)
+    return "\n".join(lines) + "\n"
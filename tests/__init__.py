@@ -4,7 +4,7 @@ from typing import TextIO
 import importlib_resources
 
 
-def data_string(name: str) -> bytes:
+def data_string(name: str) -> str:
     ref = data_ref(name)
     with ref.open() as f:
         data = f.read()
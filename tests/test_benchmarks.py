@@ -0,0 +1,112 @@
+#  Copyright (c) 2024 Gavin E. Crooks
+#
+#  This software is distributed under the MIT Open Source License.
+#  <http://www.opensource.org/licenses/mit-license.html>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#  THE SOFTWARE.
+
+
+import unittest
+from io import StringIO
+
+import numpy as np
+
+from benchmarks.generate import alignment_text, random_alignment
+from benchmarks.suite import (
+    benchmarks,
+    compare,
+    format_comparison,
+    format_results,
+    run_benchmarks,
+)
+from weblogo.seq_io import clustal_io, fasta_io
+
+
+class test_benchmarks(unittest.TestCase):
+    def test_random_alignment(self) -> None:
+        seqs = random_alignment(200, 30, "protein", gap_fraction=0.25, seed=3)
+        self.assertEqual(len(seqs), 200)
+        self.assertTrue(all(len(s) == 30 for s in seqs))
+        self.assertEqual(str(seqs.alphabet), "ACDEFGHIKLMNPQRSTVWY")
+
+        gaps = sum(s.count("-") for s in seqs) / (200 * 30)
+        self.assertTrue(0.2 < gaps < 0.3)
+        counts = np.asarray(seqs.profile())
+        self.assertEqual(counts.sum(), 200 * 30 - sum(s.count("-") for s in seqs))
+
+        # Reproducible
+        again = random_alignment(200, 30, "protein", gap_fraction=0.25, seed=3)
+        self.assertEqual(list(seqs), list(again))
+        other = random_alignment(200, 30, "protein", gap_fraction=0.25, seed=4)
+        self.assertNotEqual(list(seqs), list(other))
+
+        with self.assertRaises(ValueError):
+            random_alignment(10, 10, "rna")
+        with self.assertRaises(ValueError):
+            random_alignment(10, 10, gap_fraction=1.0)
+
+    def test_alignment_text(self) -> None:
+        seqs = random_alignment(5, 70, "dna")
+        for format, reader in [("fasta", fasta_io), ("clustal", clustal_io)]:
+            text = alignment_text(seqs, format)
+            self.assertEqual(
+                [str(s) for s in reader.read(StringIO(text))], [str(s) for s in seqs]
+            )
+        self.assertEqual(alignment_text(seqs, "plain").split(), [str(s) for s in seqs])
+        with self.assertRaises(ValueError):
+            alignment_text(seqs, "nexus")
+
+    def test_run(self) -> None:
+        names = [case.name for case in benchmarks(quick=True)]
+        self.assertEqual(len(names), len(set(names)))
+
+        results = run_benchmarks("profile.seqlist.protein", repeat=2, quick=True)
+        (result,) = results["results"]
+        self.assertEqual(result["items"], 200 * 300)
+        self.assertTrue(result["wall_time"] <= result["median_wall_time"])
+        self.assertTrue(result["peak_memory"] > 0)
+        self.assertTrue(results["environment"]["quick"])
+        self.assertTrue("profile.seqlist" in format_results(results))
+
+    def test_compare(self) -> None:
+        baseline = {
+            "results": [
+                {"name": "a", "wall_time": 1.0},
+                {"name": "b", "wall_time": 1.0},
+                {"name": "c", "wall_time": 1.0},
+                {"name": "d", "skipped": "Ghostscript not found"},
+            ]
+        }
+        results = {
+            "results": [
+                {"name": "a", "wall_time": 1.1},
+                {"name": "b", "wall_time": 1.5},
+                {"name": "c", "wall_time": 0.5},
+                {"name": "d", "wall_time": 1.0},
+                {"name": "e", "wall_time": 1.0},
+            ]
+        }
+        comparisons = compare(results, baseline, threshold=0.25)
+        status = {c["name"]: c["status"] for c in comparisons}
+        self.assertEqual(status, {"a": "same", "b": "slower", "c": "faster"})
+        self.assertTrue("SLOWER" in format_comparison(comparisons))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,8 @@
-import shutil
+import json
+from pathlib import Path
 from subprocess import PIPE, Popen
 from typing import List, Optional, TextIO
 
-import pytest
-
 from . import data_ref
 
 
@@ -51,6 +50,44 @@ def test_default_build() -> None:
     _exec([], ["%%Title:        Sequence Logo:"])
 
 
+def test_jobs() -> None:
+    _exec(["--jobs", "2"], ["%%Title:        Sequence Logo:"])
+    _exec(["--jobs", "-1"], [], 2)
+
+
+def test_weighting() -> None:
+    _exec(["--weighting", "henikoff"], ["%%Title:        Sequence Logo:"])
+    _exec(
+        ["--weighting", "cluster", "--cluster-identity", "0.9"],
+        ["%%Title:        Sequence Logo:"],
+    )
+    _exec(["--weighting", "unknown"], [], 2)
+    _exec(["--cluster-identity", "0"], [], 2)
+
+
+def test_timings() -> None:
+    p = Popen(
+        ["weblogo", "--timings", "-F", "logodata"],
+        stdin=data_ref("cap.fa").open(),
+        stdout=PIPE,
+        stderr=PIPE,
+    )
+    out, err = p.communicate()
+    assert p.returncode == 0, err
+    stages = [s["stage"] for s in json.loads(err)["stages"]]
+    assert stages[:3] == ["weblogo", "read_seq_data", "Alphabet.which"]
+    assert "SeqList.profile" in stages
+
+
+def test_stdin_pipe() -> None:
+    # Non-seekable input, as from a shell pipeline
+    for name in ["cap.fa", "transfac_matrix.txt", "dna.phy"]:
+        p = Popen(["weblogo"], stdin=PIPE, stdout=PIPE, stderr=PIPE)
+        out, err = p.communicate(data_ref(name).read_bytes())
+        assert p.returncode == 0, err
+        assert b"%%Title:        Sequence Logo:" in out
+
+
 # Format options
 def test_width() -> None:
     _exec(["-W", "1234"], ["/stack_width         1234"])
@@ -106,6 +143,18 @@ def test_formats() -> None:
     _exec(["--format", "csv"], [])
 
 
-@pytest.mark.skipif(shutil.which("pdf2svg") is None, reason="requires pdf2svg")
 def test_formats_svg() -> None:
-    _exec(["--format", "svg"], [])
+    _exec(["--format", "svg"], ["<svg", "</svg>"])
+
+
+def test_batch(tmp_path: Path) -> None:
+    files = [str(data_ref("cap.fa")), str(data_ref("cox2.msf"))]
+    _exec(["--batch", str(tmp_path), "--format", "eps"] + files, [])
+    assert (tmp_path / "cap.eps").read_text().startswith("%!PS")
+    assert (tmp_path / "cox2.eps").read_text().startswith("%!PS")
+
+    _exec(["--batch", str(tmp_path), "--format", "logodata"] + files, [])
+    assert (tmp_path / "cox2.txt").read_text().startswith("## LogoData")
+
+    _exec(["--batch", str(tmp_path)], [], 2)
+    _exec(["--batch", str(tmp_path), "--fin", files[0]] + files, [], 2)
@@ -24,13 +24,15 @@
 #  THE SOFTWARE.
 #
 
+import os
+import tempfile
 import unittest
 from io import StringIO
 
-from weblogo.seq import nucleic_alphabet, protein_alphabet
+from weblogo.seq import Alphabet, nucleic_alphabet, protein_alphabet
 from weblogo.seq_io import clustal_io, fasta_io, plain_io
 
-from . import data_stream
+from . import data_ref, data_stream
 
 example_with_optional_comments = """
 >SEQUENCE_1
@@ -182,6 +184,41 @@ class test_fasta_io(unittest.TestCase):
         assert not seqs.isaligned()
         self.assertEqual(len(seqs), 3)
 
+    def test_read_mapped(self) -> None:
+        # Regular files are memory mapped, and should parse exactly as streams
+        examples = [
+            fasta_io.example,
+            example_with_optional_comments,
+            example3,
+            example4,
+            ">a\r\nAC\r\n  GT \r\n>b\r\n",
+            ">a\nAC\n  >b\nGT\n",
+            ";comment\n\n>a\nACGT",
+        ]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "example.fa")
+            for example in examples:
+                with open(path, "w", newline="") as fout:
+                    fout.write(example)
+                expected = fasta_io.read(StringIO(example))
+                with open(path) as fin:
+                    seqs = fasta_io.read(fin)
+                self.assertEqual(seqs, expected)
+                for s, e in zip(seqs, expected):
+                    self.assertEqual(s.name, e.name)
+                    self.assertEqual(s.description, e.description)
+
+            with open(path, "w") as fout:
+                fout.write(">a\nACGT\n>b\nACGU\n")
+            with open(path) as fin:
+                with self.assertRaisesRegex(ValueError, "at line 2"):
+                    fasta_io.read(fin, Alphabet("ACGT"))
+
+        with data_ref("globin.fa").open() as fin:
+            seqs = fasta_io.read(fin, protein_alphabet)
+            self.assertEqual(len(seqs), 56)
+            self.assertEqual(fin.read(), "")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -26,11 +26,16 @@
 
 import unittest
 
+import numpy as np
 import pytest
 
+import weblogo.seq
 from weblogo import seq_io
+from weblogo.logo import LogoData, read_seq_data
 from weblogo.seq import (
+    Alignment,
     Alphabet,
+    ProfileAccumulator,
     Seq,
     SeqList,
     dna,
@@ -42,6 +47,7 @@ from weblogo.seq import (
     rna,
     unambiguous_dna_alphabet,
     unambiguous_protein_alphabet,
+    unambiguous_rna_alphabet,
 )
 
 from . import data_ref
@@ -61,6 +67,23 @@ class test_alphabet(unittest.TestCase):
         a = Alphabet("alphbet")
         self.assertTrue(a.alphabetic("alphbet"))
         self.assertTrue(not a.alphabetic("alphbetX"))
+        self.assertTrue(a.alphabetic(""))
+        self.assertTrue(not a.alphabetic("alph\x00"))
+        self.assertTrue(not a.alphabetic("alph\u03b2et"))
+
+    def test_alphabet_validate(self) -> None:
+        a = Alphabet("ACGT")
+        a.validate(["ACGT", "acgt", ""])
+        a.validate([])
+
+        with self.assertRaisesRegex(ValueError, "number 2 .*'N' at position 3"):
+            a.validate(["ACGT", "ACNT"])
+        with self.assertRaisesRegex(ValueError, "number 3 .*'X' at position 1"):
+            a.validate(["A", "", "X\u03b2"])
+        with self.assertRaisesRegex(ValueError, "number 1 .* position 2"):
+            a.validate(["A\u03b2"])
+        with self.assertRaisesRegex(ValueError, "number 12 .*'N' at position 3"):
+            a.validate(["ACGT", "ACNT"], start=10)
 
     def test_alphabet_ord(self) -> None:
         a = generic_alphabet
@@ -154,6 +177,45 @@ class test_alphabet(unittest.TestCase):
         f3.close()
         f4.close()
 
+    def test_which_alphabet_sample(self) -> None:
+        alphabets = [
+            unambiguous_dna_alphabet,
+            unambiguous_rna_alphabet,
+            unambiguous_protein_alphabet,
+            protein_alphabet,
+        ]
+        rng = np.random.default_rng(7)
+        for letters, expected in [
+            ("ACGT", unambiguous_dna_alphabet),
+            ("ACGU", unambiguous_rna_alphabet),
+            ("acgtn-", unambiguous_dna_alphabet),
+            ("ACDEFGHIKLMNPQRSTVWY", unambiguous_protein_alphabet),
+            ("ACDEFGHIKLMNPQRSTVWYBZX-", protein_alphabet),
+        ]:
+            chars = np.frombuffer(letters.encode(), dtype=np.uint8)
+            rows = chars[rng.integers(0, len(letters), (5000, 40))]
+            seqs = SeqList([Seq(r.tobytes().decode()) for r in rows])
+            aln = Alignment.from_seqs(seqs)
+
+            for s in (seqs, aln):
+                # Letters are counted exactly as by tally
+                tallies = [sum(s.tally(a)) for a in alphabets]
+                self.assertEqual(weblogo.seq._alphabet_tallies(s, alphabets), tallies)
+                self.assertEqual(Alphabet.which(s, alphabets), expected)
+                self.assertEqual(Alphabet.which(s, alphabets, sample=True), expected)
+
+        # Unaligned, and empty
+        seqs = SeqList([Seq("ACGT" * n) for n in range(300)])
+        self.assertEqual(Alphabet.which(seqs, sample=True), unambiguous_dna_alphabet)
+        self.assertEqual(
+            Alphabet.which(SeqList([]), sample=True), unambiguous_dna_alphabet
+        )
+
+        # read_seq_data samples only when asked to
+        for sample in (False, True):
+            seqs = read_seq_data(data_ref("cap.fa").open(), sample_alphabet=sample)
+            self.assertEqual(seqs.alphabet, unambiguous_dna_alphabet)
+
 
 class test_seq(unittest.TestCase):
     def test_create_seq(self) -> None:
@@ -428,6 +490,51 @@ class test_seqlist(unittest.TestCase):
         seqs = SeqList([Seq("AAACD", a), Seq("AAACD", a)])
         self.assertRaises(ValueError, seqs.profile)
 
+    def test_profile_parallel(self) -> None:
+        seqs = seq_io.read(data_ref("cap.fa").open(), dna_alphabet)
+        seqs.alphabet = unambiguous_dna_alphabet
+        expected = seqs.profile().array.tolist()
+
+        # Count even small alignments in worker processes
+        min_size = weblogo.seq._parallel_min_size
+        weblogo.seq._parallel_min_size = 0
+        try:
+            self.assertEqual(seqs.profile(jobs=2).array.tolist(), expected)
+            aln = Alignment.from_seqs(seqs)
+            self.assertEqual(aln.profile(jobs=3).array.tolist(), expected)
+            self.assertEqual(aln.profile(jobs=0).array.tolist(), expected)
+            self.assertEqual(aln[:1].profile(jobs=4).array.tolist()[0][0], 1)
+
+            weights = np.linspace(0.1, 1.0, len(seqs))
+            self.assertTrue(
+                np.allclose(
+                    aln.profile(jobs=2, weights=weights).array,
+                    seqs.profile(weights=weights).array,
+                )
+            )
+        finally:
+            weblogo.seq._parallel_min_size = min_size
+
+    def test_profile_nonalphabetic(self) -> None:
+        # Characters not in the profile alphabet are not counted
+        seqs = SeqList(
+            [dna("ACGT-N"), dna("acgtNN"), dna("AAAA-T")], unambiguous_dna_alphabet
+        )
+        tally = seqs.profile()
+        self.assertEqual(tally.shape, (6, 4))
+        self.assertEqual(list(tally[0]), [3, 0, 0, 0])
+        self.assertEqual(list(tally[1]), [1, 2, 0, 0])
+        self.assertEqual(list(tally[4]), [0, 0, 0, 0])
+        self.assertEqual(list(tally[5]), [0, 0, 0, 1])
+
+        # Agrees with a direct column by column count
+        seqs = seq_io.read(data_ref("cap.fa").open(), dna_alphabet)
+        seqs.alphabet = unambiguous_dna_alphabet
+        tally = seqs.profile()
+        for j in range(len(seqs[0])):
+            column = Seq("".join(s[j] for s in seqs), dna_alphabet)
+            self.assertEqual(list(tally[j]), column.tally(unambiguous_dna_alphabet))
+
     def test_tally(self) -> None:
         # 1234567890123456789012345678
         s0 = Seq("ACTTT", nucleic_alphabet)
@@ -469,6 +576,143 @@ class test_seqlist(unittest.TestCase):
         str(seqs)
 
 
+class test_profile_accumulator(unittest.TestCase):
+    def test_profile(self) -> None:
+        seqs = seq_io.read(data_ref("cap.fa").open(), dna_alphabet)
+
+        acc = ProfileAccumulator(chunk_size=7)
+        acc.update(seqs[:10])
+        acc.update(iter(seqs[10:]))
+        self.assertEqual(acc.nseqs, len(seqs))
+        self.assertEqual(acc.length, len(seqs[0]))
+
+        seqs.alphabet = unambiguous_dna_alphabet
+        self.assertEqual(
+            acc.profile(unambiguous_dna_alphabet).array.tolist(),
+            seqs.profile().array.tolist(),
+        )
+        self.assertEqual(
+            acc.tally(unambiguous_dna_alphabet), seqs.tally(unambiguous_dna_alphabet)
+        )
+        self.assertEqual(Alphabet.which(acc), unambiguous_dna_alphabet)
+
+    def test_errors(self) -> None:
+        acc = ProfileAccumulator()
+        self.assertRaises(ValueError, acc.profile, unambiguous_dna_alphabet)
+        self.assertEqual(acc.tally(unambiguous_dna_alphabet), [0, 0, 0, 0])
+
+        with pytest.raises(ValueError):
+            acc.update([dna("ACGT"), dna("ACG")])
+
+
+class test_alignment(unittest.TestCase):
+    def test_from_seqs(self) -> None:
+        seqs = seq_io.read(data_ref("cap.fa").open(), dna_alphabet)
+        seqs.alphabet = dna_alphabet
+        aln = Alignment.from_seqs(seqs, chunk_size=7)
+        self.assertEqual(aln.ords.shape, (len(seqs), len(seqs[0])))
+        self.assertEqual(aln.ords.dtype, np.uint8)
+        self.assertEqual(aln.alphabet, dna_alphabet)
+        self.assertTrue(aln.isaligned())
+
+        self.assertEqual(len(aln), len(seqs))
+        for s, t in zip(aln, seqs):
+            # Alternative letters are stored as the canonical letter
+            self.assertEqual(str(s), str(t).upper())
+            self.assertEqual(s.name, t.name)
+            self.assertEqual(s.description, t.description)
+            self.assertEqual(s.alphabet, dna_alphabet)
+        self.assertEqual(list(aln.names), [s.name for s in seqs])
+
+        self.assertEqual(aln.profile().array.tolist(), seqs.profile().array.tolist())
+        self.assertEqual(aln.tally(), seqs.tally())
+        self.assertEqual(
+            aln.tally(unambiguous_dna_alphabet), seqs.tally(unambiguous_dna_alphabet)
+        )
+        self.assertEqual(Alphabet.which(aln), unambiguous_dna_alphabet)
+
+        data = LogoData.from_seqs(aln)
+        expected = LogoData.from_seqs(seqs)
+        assert data.entropy is not None and expected.entropy is not None
+        self.assertEqual(data.entropy.tolist(), expected.entropy.tolist())
+
+        seqlist = aln.to_seqlist()
+        self.assertEqual([str(s) for s in seqlist], [str(s).upper() for s in seqs])
+        self.assertEqual(seqlist.alphabet, dna_alphabet)
+
+    def test_from_seqs_gaps(self) -> None:
+        # Gaps are not in the unambiguous alphabets, and are not counted
+        seqs = read_seq_data(data_ref("globin.fa").open())
+        self.assertEqual(seqs.alphabet, unambiguous_protein_alphabet)
+        aln = Alignment.from_seqs(seqs)
+        self.assertEqual(aln.alphabet, unambiguous_protein_alphabet)
+        gaps = np.array([list(str(s)) for s in seqs]) == "-"
+        self.assertTrue(gaps.any())
+        self.assertTrue(np.all(aln.ords[gaps] == 255))
+        self.assertEqual(aln.profile().array.tolist(), seqs.profile().array.tolist())
+        self.assertEqual(aln.tally(), seqs.tally())
+
+        with self.assertRaisesRegex(ValueError, "'-' at position"):
+            Alignment.from_seqs(seqs, validate=True)
+
+    def test_to_seqlist_gaps(self) -> None:
+        seqs = read_seq_data(data_ref("globin.fa").open())
+        aln = Alignment.from_seqs(seqs)
+        self.assertEqual(str(aln[0]), str(seqs[0]))
+        self.assertEqual(aln[0].alphabet, generic_alphabet)
+
+        seqlist = aln.to_seqlist()
+        self.assertEqual(seqlist.alphabet, unambiguous_protein_alphabet)
+        self.assertEqual([str(s) for s in seqlist], [str(s) for s in seqs])
+        self.assertEqual([s.name for s in seqlist], [s.name for s in seqs])
+        self.assertEqual(str(seqlist[0][:12]), str(seqs[0][:12]))
+
+        again = Alignment.from_seqs(seqlist)
+        self.assertTrue(np.array_equal(again.ords, aln.ords))
+
+    def test_slice(self) -> None:
+        seqs = SeqList(
+            [Seq("ACGTAC", name="a"), Seq("TTGGCC", name="bb"), Seq("A-A-A-")],
+            dna_alphabet,
+        )
+        aln = Alignment.from_seqs(seqs)
+
+        view = aln[1:, 2:5]
+        self.assertTrue(isinstance(view, Alignment))
+        self.assertTrue(np.shares_memory(view.ords, aln.ords))
+        self.assertEqual(len(view), 2)
+        self.assertEqual(str(view[0]), "GGC")
+        self.assertEqual(view[0].name, "bb")
+        self.assertEqual(view[-1].name, "")
+
+        self.assertEqual(str(aln[0]), "ACGTAC")
+        self.assertEqual(str(aln[0, 1:3]), "CG")
+        self.assertEqual(list(aln[::2].names), ["a", ""])
+        self.assertEqual(aln[:, 0:2].profile().array[0].tolist()[0:4], [2, 0, 0, 1])
+
+        with self.assertRaises(TypeError):
+            aln[[0, 2]]
+
+    def test_errors(self) -> None:
+        with self.assertRaisesRegex(ValueError, "number 2 differs in length"):
+            Alignment.from_seqs(["ACGT", "ACG"])
+        with self.assertRaisesRegex(ValueError, "number 3 .*'Z' at position 2"):
+            Alignment.from_seqs(
+                ["ACGT", "ACGT", "AZGT"], dna_alphabet, chunk_size=2, validate=True
+            )
+        aln = Alignment.from_seqs(["ACGT", "AZGT"], dna_alphabet)
+        self.assertEqual(aln.ords[1, 1], 255)
+        with self.assertRaises(ValueError):
+            Alignment(np.zeros((2, 3)), dna_alphabet)
+        with self.assertRaises(ValueError):
+            Alignment(np.zeros((2, 3), dtype=np.uint8), dna_alphabet, names=["a"])
+
+        aln = Alignment.from_seqs([])
+        self.assertEqual(len(aln), 0)
+        with self.assertRaises(ValueError):
+            LogoData.from_seqs(aln)
+
+
 def test_bad_mask() -> None:
     with pytest.raises(ValueError):
         dna("AAaaaaAAA").mask(mask="ABC")
@@ -24,6 +24,7 @@
 #  THE SOFTWARE.
 #
 
+import io
 import unittest
 from io import StringIO
 
@@ -43,7 +44,20 @@ from weblogo.seq_io import (
     table_io,
 )
 
-from . import data_ref, data_stream, test_genbank_io
+from . import data_ref, data_stream, data_string, test_genbank_io
+
+
+class UnseekableStream(StringIO):
+    """A text stream that, like a pipe, can only be read forwards."""
+
+    def seekable(self) -> bool:
+        return False
+
+    def seek(self, *args: int) -> int:
+        raise io.UnsupportedOperation("seek")
+
+    def tell(self) -> int:
+        raise io.UnsupportedOperation("tell")
 
 
 class test_seq_io(unittest.TestCase):
@@ -111,6 +125,78 @@ class test_seq_io(unittest.TestCase):
         for p in seq_io._parsers:
             self.assertTrue(type(p.names) is tuple)
 
+    def test_sniff(self) -> None:
+        examples = {
+            "cap.fa": fasta_io,
+            "cox2.nbrf": nbrf_io,
+            "clustal.aln": clustal_io,
+            "dna.phy": phylip_io,
+            "dna.msf": msf_io,
+            "cox2.msf": msf_io,
+            "nexus/dna.nex": nexus_io,
+            "pfam.txt": stockholm_io,
+            "genbank/cox2.gb": genbank_io,
+        }
+        for name, parser in examples.items():
+            f = data_stream(name)
+            self.assertEqual(seq_io.sniff(f)[0], parser)
+            self.assertEqual(f.tell(), 0)
+            self.assertTrue(len(parser.read(f)) > 0)
+
+        self.assertEqual(seq_io.sniff(StringIO(stockholm_io.example)), [stockholm_io])
+        self.assertEqual(seq_io.sniff(StringIO(array_io.example)), [])
+        self.assertEqual(seq_io.sniff(StringIO("")), [])
+
+    def test_read_unseekable(self) -> None:
+        for name in [
+            "cap.fa",
+            "cox2.nbrf",
+            "clustal.aln",
+            "dna.phy",
+            "cox2.msf",
+            "nexus/dna.nex",
+            "pfam.txt",
+            "genbank/cox2.gb",
+        ]:
+            text = data_string(name)
+            expected = seq_io.read(StringIO(text))
+            seqs = seq_io.read(UnseekableStream(text))
+            self.assertEqual(len(seqs), len(expected))
+            for s, e in zip(seqs, expected):
+                self.assertEqual(s.name, e.name)
+                self.assertEqual(str(s), str(e))
+
+        # Sniffed as fasta, so the rest of the stream goes straight to the
+        # fasta parser, and other formats are not tried.
+        with self.assertRaisesRegex(ValueError, "Tried fasta $"):
+            seq_io.read(UnseekableStream(">seq\nACGTQQ\n"), nucleic_alphabet)
+
+    def test_read_logs_format(self) -> None:
+        with self.assertLogs("weblogo.seq_io", level="DEBUG") as logs:
+            seq_io.read(data_ref("cap.fa").open())
+            seq_io.read(StringIO("ACGT\nACGA\n"))
+        self.assertEqual(logs.records[0].getMessage(), "Parsed as fasta (Tried fasta)")
+        message = logs.records[1].getMessage()
+        self.assertTrue(message.startswith("Parsed as array (Tried "))
+        self.assertTrue(message.endswith(", table, array)"))
+
+    def test_rewindable_stream(self) -> None:
+        text = "line one\nline two\nline three\n"
+        f = seq_io.RewindableStream(UnseekableStream(text))
+        self.assertTrue(f.seekable())
+        self.assertEqual(f.read(3), "lin")
+        self.assertEqual(f.readline(), "e one\n")
+        self.assertEqual(f.tell(), 9)
+        f.seek(0)
+        self.assertEqual(f.read(11), "line one\nli")
+        f.seek(0)
+        self.assertEqual(next(f), "line one\n")
+        f.stop_recording()
+        self.assertFalse(f.seekable())
+        self.assertEqual(list(f), ["line two\n", "line three\n"])
+        with self.assertRaises(io.UnsupportedOperation):
+            f.seek(0)
+
     def test_parsers(self) -> None:
         # seq_io._parsers is an ordered  list of sequence parsers that are
         # tried, in turn, on files of unknown format. Each parser must raise
@@ -0,0 +1,305 @@
+#  Copyright (c) 2024 Gavin E. Crooks
+#
+#  This software is distributed under the new BSD Open Source License.
+#  <http://www.opensource.org/licenses/bsd-license.html>
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  (1) Redistributions of source code must retain the above copyright notice,
+#  this list of conditions and the following disclaimer.
+#
+#  (2) Redistributions in binary form must reproduce the above copyright
+#  notice, this list of conditions and the following disclaimer in the
+#  documentation and or other materials provided with the distribution.
+#
+#  (3) Neither the name of the University of California, Lawrence Berkeley
+#  National Laboratory, U.S. Dept. of Energy nor the names of its contributors
+#  may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+#  LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+#  CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+#  SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+#  INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+#  CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import json
+import socket
+import threading
+import urllib.error
+import urllib.request
+from typing import Any, Iterator, Tuple
+
+import pytest
+
+from weblogo import (
+    LogoData,
+    LogoFormat,
+    LogoOptions,
+    eps_formatter,
+    parse_prior,
+    read_seq_data,
+)
+from weblogo._server import AsyncLogoServer, LogoRenderer, LogoServer
+
+from . import data_ref
+
+
+@pytest.fixture(scope="module")
+def server() -> Iterator[LogoServer]:
+    server = LogoServer(("127.0.0.1", 0), LogoRenderer(ghostscript_workers=0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _post(server: LogoServer, body: bytes) -> Tuple[int, str, bytes]:
+    url = "http://127.0.0.1:%d/render" % server.server_address[1]
+    request = urllib.request.Request(url, data=body, method="POST")
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers["Content-Type"], response.read()
+    except urllib.error.HTTPError as err:
+        return err.code, err.headers["Content-Type"], err.read()
+
+
+def _render(server: LogoServer, request: Any) -> Tuple[int, str, bytes]:
+    return _post(server, json.dumps(request).encode())
+
+
+def test_render_sequences(server: LogoServer) -> None:
+    sequences = data_ref("cap.fa").read_text()
+    status, content_type, logo = _render(
+        server, {"sequences": sequences, "format": "eps"}
+    )
+    assert status == 200
+    assert content_type == "application/postscript"
+
+    # The same logo as rendered locally
+    seqs = read_seq_data(data_ref("cap.fa").open())
+    assert seqs.alphabet is not None
+    data = LogoData.from_seqs(seqs, parse_prior("auto", seqs.alphabet))
+    expected = eps_formatter(data, LogoFormat(data, LogoOptions()))
+    assert logo.split(b"%%CreationDate")[0] == expected.split(b"%%CreationDate")[0]
+
+    status, content_type, logo = _render(
+        server,
+        {
+            "sequences": sequences,
+            "format": "svg",
+            "sequence_type": "dna",
+            "composition": "equiprobable",
+            "weight": None,
+            "options": {
+                "logo_title": "Served",
+                "color_scheme": "classic",
+                "stack_width": 12,
+                "show_xaxis": False,
+                "logo_start": None,
+            },
+        },
+    )
+    assert status == 200
+    assert content_type == "image/svg+xml"
+    assert b"Served" in logo
+
+
+def test_render_counts(server: LogoServer) -> None:
+    status, content_type, logo = _render(
+        server,
+        {
+            "counts": [[10, 0, 0, 0], [2, 2, 3.5, 2]],
+            "alphabet": "ACGT",
+            "format": "csv",
+        },
+    )
+    assert status == 200
+    assert content_type == "text/plain"
+    assert logo.decode().splitlines()[1].startswith("1,10.0,0.0,0.0,0.0,")
+
+
+def test_render_errors(server: LogoServer) -> None:
+    sequences = data_ref("cap.fa").read_text()
+    bad_requests = [
+        [],
+        {"sequences": sequences, "format": "gif"},
+        {"sequences": sequences, "counts": [[1]]},
+        {"counts": [[1, 2, 3, 4]]},
+        {"counts": [[1, 2]], "alphabet": "ACGT"},
+        {"counts": [[1, 2, 3, -4]], "alphabet": "ACGT"},
+        {"sequences": sequences, "sequence_type": "lipid"},
+        {"sequences": sequences, "options": {"not_an_option": 1}},
+        {"sequences": sequences, "options": {"color_scheme": "plaid"}},
+        {"sequences": ">a\nAC\n>b\nA\n"},
+        {"sequences": sequences, "unknown": 1},
+        {"sequences": 5},
+        {"sequences": "5"},
+        {"sequences": sequences, "format": ["png"]},
+        {"sequences": sequences, "sequence_type": ["dna"]},
+        {"sequences": sequences, "weight": "x"},
+        {"sequences": sequences, "composition": 5},
+        {"counts": [[1, 2, 3, 4]], "alphabet": 4},
+        {"sequences": sequences, "options": {"stack_width": "abc"}},
+        {"sequences": sequences, "options": {"annotate": 5}},
+        {"sequences": sequences, "options": {"annotate": [1, 2]}},
+        {"sequences": sequences, "options": {"fontsize": None}},
+        {"sequences": sequences, "options": {"show_xaxis": "no"}},
+        {"sequences": sequences, "options": {"logo_start": 1.5}},
+        {"sequences": sequences, "options": {"default_color": 5}},
+        {"sequences": sequences, "options": {"color_scheme": [1]}},
+    ]
+    for request in bad_requests:
+        status, content_type, body = _render(server, request)
+        assert status == 400, request
+        assert content_type == "application/json"
+        assert "error" in json.loads(body)
+
+    status, _, body = _post(server, b"{not json")
+    assert status == 400
+
+    # A negative length is refused, rather than reading until the client closes
+    port = server.server_address[1]
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        sock.sendall(b"POST /render HTTP/1.1\r\nContent-Length: -1\r\n\r\n{}")
+        assert sock.recv(1024).startswith(b"HTTP/1.0 400")
+
+    url = "http://127.0.0.1:%d/elsewhere" % server.server_address[1]
+    with pytest.raises(urllib.error.HTTPError):
+        urllib.request.urlopen(urllib.request.Request(url, data=b"{}", method="POST"))
+
+
+class _SlowRenderer(LogoRenderer):
+    # Holds every render until released, to fill the server's queue
+    def __init__(self) -> None:
+        super().__init__(ghostscript_workers=0)
+        self.release = threading.Event()
+
+    def render(self, request: Any) -> Tuple[str, bytes]:
+        self.release.wait(10)
+        return super().render(request)
+
+
+async def _async_post(
+    port: int, body: bytes, path: str = "/render"
+) -> Tuple[int, bytes]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        b"POST %s HTTP/1.1\r\nHost: localhost\r\nContent-Length: %d\r\n\r\n"
+        % (path.encode(), len(body))
+        + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), content
+
+
+def test_async_server() -> None:
+    sequences = data_ref("cap.fa").read_text()
+
+    async def run() -> None:
+        server = AsyncLogoServer(
+            ("127.0.0.1", 0), LogoRenderer(ghostscript_workers=0), concurrency=2
+        )
+        await server.start()
+        try:
+            request = json.dumps({"sequences": sequences, "format": "eps"}).encode()
+            results = await asyncio.gather(
+                *[_async_post(server.port, request) for _ in range(4)]
+            )
+            for status, logo in results:
+                assert status == 200
+                assert logo.startswith(b"%!PS-Adobe-3.0 EPSF-3.0")
+
+            status, body = await _async_post(server.port, b"[]")
+            assert status == 400
+            assert "error" in json.loads(body)
+            for bad in (
+                {"sequences": 5},
+                {"sequences": "5"},
+                {"sequences": sequences, "weight": "x"},
+                {"sequences": sequences, "options": {"fontsize": None}},
+                {"sequences": sequences, "options": {"color_scheme": [1]}},
+            ):
+                status, body = await _async_post(server.port, json.dumps(bad).encode())
+                assert status == 400, bad
+                assert "error" in json.loads(body)
+            status, _ = await _async_post(server.port, b"{}", "/elsewhere")
+            assert status == 404
+
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"POST /render HTTP/1.1\r\nContent-Length: -1\r\n\r\n{}")
+            assert (await reader.read()).startswith(b"HTTP/1.1 400")
+            writer.close()
+
+            # A stalled upload times out, without holding up other requests
+            server.timeout = 0.5
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"POST /render HTTP/1.1\r\nContent-Length: 100\r\n\r\n{")
+            status, _ = await _async_post(server.port, request)
+            assert status == 200
+            assert (await reader.read()).startswith(b"HTTP/1.1 408")
+            writer.close()
+        finally:
+            server.close()
+
+    asyncio.run(run())
+
+
+class _BrokenRenderer(LogoRenderer):
+    def __init__(self) -> None:
+        super().__init__(ghostscript_workers=0)
+
+    def render(self, request: Any) -> Tuple[str, bytes]:
+        raise AttributeError("broken")
+
+
+def test_async_server_error() -> None:
+    async def run() -> None:
+        server = AsyncLogoServer(("127.0.0.1", 0), _BrokenRenderer())
+        await server.start()
+        try:
+            status, body = await _async_post(server.port, b"{}")
+            assert status == 500
+            assert json.loads(body) == {"error": "broken"}
+        finally:
+            server.close()
+
+    asyncio.run(run())
+
+
+def test_async_server_busy() -> None:
+    request = json.dumps(
+        {"counts": [[1, 2, 3, 4]], "alphabet": "ACGT", "format": "logodata"}
+    )
+
+    async def run() -> None:
+        renderer = _SlowRenderer()
+        server = AsyncLogoServer(("127.0.0.1", 0), renderer, concurrency=1, max_queue=1)
+        await server.start()
+        try:
+            # One request renders, one waits, and the rest are refused
+            posts = [
+                asyncio.ensure_future(_async_post(server.port, request.encode()))
+                for _ in range(4)
+            ]
+            # (The refusals are immediate)
+            await asyncio.wait(posts, timeout=5, return_when=asyncio.FIRST_COMPLETED)
+            renderer.release.set()
+            statuses = sorted(status for status, _ in await asyncio.gather(*posts))
+            assert statuses == [200, 200, 503, 503]
+        finally:
+            server.close()
+
+    asyncio.run(run())
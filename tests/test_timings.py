@@ -0,0 +1,130 @@
+#  Copyright (c) 2024 Gavin E. Crooks
+#
+#  This software is distributed under the MIT Open Source License.
+#  <http://www.opensource.org/licenses/mit-license.html>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#  THE SOFTWARE.
+
+
+import asyncio
+import json
+import tracemalloc
+import unittest
+from typing import Tuple
+
+from weblogo import LogoData, LogoFormat, LogoOptions, eps_formatter
+from weblogo.seq import Seq, SeqList, unambiguous_dna_alphabet
+from weblogo.timings import Timings, timed
+
+
+class test_timings(unittest.TestCase):
+    def setUp(self) -> None:
+        self.seqs = SeqList(
+            [Seq(s) for s in ["ACGTACGT", "ACGTACGT", "ACGTACGA", "TTTTGGGG"]],
+            alphabet=unambiguous_dna_alphabet,
+        )
+
+    def test_disabled(self) -> None:
+        # Without an active recorder, stages are not timed
+        with timed("unrecorded"):
+            pass
+        timings = Timings()
+        LogoData.from_seqs(self.seqs)
+        self.assertEqual(timings.as_dict(), {"stages": []})
+
+    def test_stages(self) -> None:
+        with Timings() as timings:
+            with timed("logo"):
+                data = LogoData.from_seqs(self.seqs)
+                eps_formatter(data, LogoFormat(data, LogoOptions()))
+                LogoData.from_seqs(self.seqs)
+        self.assertFalse(tracemalloc.is_tracing())
+
+        stages = timings.as_dict()["stages"]
+        names = [s["stage"] for s in stages]
+        self.assertEqual(
+            names, ["logo", "SeqList.profile", "LogoData.from_counts", "eps_formatter"]
+        )
+        calls = {s["stage"]: s["calls"] for s in stages}
+        self.assertEqual(calls["logo"], 1)
+        self.assertEqual(calls["SeqList.profile"], 2)
+        for s in stages:
+            self.assertTrue(s["wall_time"] >= 0.0)
+            self.assertTrue(s["cpu_time"] >= 0.0)
+            self.assertTrue(s["peak_memory"] >= 0)
+
+        # The enclosing stage sees the memory allocated in nested stages
+        total = stages[0]["peak_memory"]
+        self.assertTrue(all(s["peak_memory"] <= total for s in stages))
+
+        self.assertEqual(json.loads(timings.to_json()), timings.as_dict())
+        report = timings.report()
+        self.assertEqual(len(report.splitlines()), 5)
+        self.assertTrue("eps_formatter" in report)
+
+    def test_memory(self) -> None:
+        with Timings() as timings:
+            with timed("outer"):
+                with timed("inner"):
+                    block = bytearray(1000000)
+                del block
+                with timed("small"):
+                    pass
+        memory = {s["stage"]: s["peak_memory"] for s in timings.as_dict()["stages"]}
+        self.assertTrue(memory["inner"] >= 1000000)
+        self.assertTrue(memory["outer"] >= 1000000)
+        self.assertTrue(memory["small"] < 1000000)
+
+    def test_no_trace_memory(self) -> None:
+        with Timings(trace_memory=False) as timings:
+            with timed("stage"):
+                pass
+        self.assertFalse("peak_memory" in timings.as_dict()["stages"][0])
+        self.assertTrue("-" in timings.report())
+
+    def test_start_stop(self) -> None:
+        timings = Timings(trace_memory=False).start()
+        with self.assertRaises(RuntimeError):
+            timings.start()
+        with timed("stage"):
+            pass
+        timings.stop()
+        timings.stop()
+        with timed("stage"):
+            pass
+        self.assertEqual(timings.as_dict()["stages"][0]["calls"], 1)
+
+    def test_tasks(self) -> None:
+        # Concurrent tasks record to their own recorders
+        async def task(name: str) -> Timings:
+            with Timings(trace_memory=False) as timings:
+                with timed(name):
+                    await asyncio.sleep(0.01)
+            return timings
+
+        async def both() -> Tuple[Timings, Timings]:
+            return await asyncio.gather(task("a"), task("b"))
+
+        a, b = asyncio.run(both())
+        self.assertEqual([s["stage"] for s in a.as_dict()["stages"]], ["a"])
+        self.assertEqual([s["stage"] for s in b.as_dict()["stages"]], ["b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -34,33 +34,63 @@
 #  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 #  POSSIBILITY OF SUCH DAMAGE.
 
+import os
+import shutil
 import unittest
+from io import StringIO
 from math import log, sqrt
-from typing import Tuple
+from pathlib import Path
+from typing import Optional, Tuple
+from xml.etree import ElementTree
 
+import importlib_resources
+import numpy as np
 import pytest
 from numpy import all, array, float64, ones, zeros
 from scipy.stats import entropy
 
 from weblogo import (
     GhostscriptAPI,
+    GhostscriptPool,
+    LogoCache,
     LogoData,
     LogoFormat,
     LogoOptions,
+    eps_formatter,
     equiprobable_distribution,
+    format_batch,
+    formatters,
     parse_prior,
+    seq_io,
+    set_ghostscript_pool,
+    svg_formatter,
 )
 from weblogo.color import Color
 from weblogo.colorscheme import ColorScheme, IndexColor, RefSeqColor, SymbolColor
-from weblogo.logomath import Dirichlet, Gamma
+from weblogo.logo_formatter import _eps_template
+from weblogo.logomath import (
+    Dirichlet,
+    Gamma,
+    dirichlet_interval_relative_entropy,
+    dirichlet_mean_entropy,
+    dirichlet_mean_relative_entropy,
+    dirichlet_variance_entropy,
+    dirichlet_variance_relative_entropy,
+    gamma_inverse_cdf,
+)
 from weblogo.seq import (
+    Alignment,
     Alphabet,
+    Seq,
+    SeqList,
     unambiguous_dna_alphabet,
     unambiguous_protein_alphabet,
     unambiguous_rna_alphabet,
 )
 from weblogo.utils import ArgumentError
 
+from . import data_ref
+
 
 class test_logoformat(unittest.TestCase):
     def test_options(self) -> None:
@@ -148,11 +178,302 @@ def test_logoformats() -> None:
     LogoFormat(logodata, logooptions)
 
 
+def test_logodata_from_iterseq() -> None:
+    seqs = seq_io.read(data_ref("cap.fa").open())
+    seqs.alphabet = Alphabet.which(seqs)
+    prior = parse_prior("equiprobable", seqs.alphabet)
+    expected = LogoData.from_seqs(seqs, prior)
+
+    data = LogoData.from_iterseq(seq_io.fasta_io.iterseq(data_ref("cap.fa").open()))
+    assert data.alphabet == expected.alphabet
+    assert data.length == expected.length
+    assert (data.counts.array == expected.counts.array).all()  # type: ignore
+
+    data = LogoData.from_iterseq(iter(seqs), seqs.alphabet, prior)
+    assert all(data.entropy == expected.entropy)
+    assert all(data.entropy_interval == expected.entropy_interval)
+
+    with pytest.raises(ValueError):
+        LogoData.from_iterseq(iter([]))
+
+
+def test_logodata_update() -> None:
+    seqs = seq_io.read(data_ref("cap.fa").open())
+    seqs.alphabet = Alphabet.which(seqs)
+    first = SeqList(seqs[:10], seqs.alphabet)
+    rest = SeqList(seqs[10:], seqs.alphabet)
+
+    for prior in [None, parse_prior("equiprobable", seqs.alphabet)]:
+        expected = LogoData.from_seqs(seqs, prior)
+
+        data = LogoData.from_seqs(first, prior)
+        data.update(rest)
+        assert str(data) == str(expected)
+
+        data = LogoData.from_seqs(first, prior)
+        data.merge(LogoData.from_seqs(Alignment.from_seqs(rest), prior))
+        assert str(data) == str(expected)
+
+    # Only columns with new counts change
+    data = LogoData.from_seqs(first)
+    before = data.entropy.copy()  # type: ignore
+    data.update(SeqList([Seq("-" * 21 + "A")], seqs.alphabet))
+    assert all(data.entropy[:-1] == before[:-1])  # type: ignore
+    assert data.entropy[-1] != before[-1]  # type: ignore
+
+    with pytest.raises(ValueError):
+        data.update(SeqList([Seq("ACGT")], seqs.alphabet))
+    with pytest.raises(ValueError):
+        data.merge(LogoData.from_seqs(SeqList([Seq("ACGT")], seqs.alphabet)))
+    with pytest.raises(ValueError):
+        data.merge(
+            LogoData.from_seqs(SeqList([Seq("A" * 22)], unambiguous_rna_alphabet))
+        )
+
+
+def test_logodata_save_load(tmp_path: Path) -> None:
+    seqs = seq_io.read(data_ref("cap.fa").open())
+    seqs.alphabet = Alphabet.which(seqs)
+
+    for prior in [None, parse_prior("equiprobable", seqs.alphabet)]:
+        data = LogoData.from_seqs(seqs, prior)
+        filename = tmp_path / "logodata.npz"
+        data.save(filename)
+
+        loaded = LogoData.load(filename)
+        assert str(loaded) == str(data)
+        assert loaded.alphabet == data.alphabet
+        assert not loaded.entropy.flags.writeable  # type: ignore  # mapped
+
+        loaded = LogoData.load(str(filename), mmap_mode=None)
+        assert str(loaded) == str(data)
+        assert loaded.entropy.flags.writeable  # type: ignore
+
+        # Copy on write mapping leaves the archive untouched
+        loaded = LogoData.load(filename, mmap_mode="c")
+        loaded.entropy[:] = 0  # type: ignore
+        assert str(LogoData.load(filename)) == str(data)
+
+        # Modes that would write to the archive are refused
+        for mode in ["r+", "w+"]:
+            with pytest.raises(ValueError):
+                LogoData.load(filename, mmap_mode=mode)
+        assert str(LogoData.load(filename)) == str(data)
+
+        # Mapped logo data can still be updated
+        loaded = LogoData.load(filename)
+        loaded.update(seqs)
+        data.update(seqs)
+        assert str(loaded) == str(data)
+
+    # Compressed archives and file objects are read rather than mapped
+    data.save(filename)
+    with np.load(filename) as npz:
+        np.savez_compressed(tmp_path / "compressed.npz", **npz)
+    assert str(LogoData.load(tmp_path / "compressed.npz")) == str(data)
+    with open(filename, "rb") as f:
+        assert str(LogoData.load(f)) == str(data)
+
+
+def test_logodata_tables() -> None:
+    alphabet = Alphabet("ACGT")
+    data = LogoData.from_counts(alphabet, array([[1, 0, 3, 0], [2, 2, 0, 0]]))
+    assert str(data).splitlines()[7:11] == [
+        "#\tA \tC \tG \tT \tEntropy\tLow\tHigh\tWeight",
+        "1 \t1 \t0 \t3 \t0 \t0.8240 \t\t \t1.0000",
+        "2 \t2 \t2 \t0 \t0 \t0.6931 \t\t \t1.0000",
+        "# End LogoData",
+    ]
+    assert data.csv().splitlines() == [
+        "Position,A,C,G,T,Entropy,Low,High,Weight",
+        "1,1,0,3,0,0.8240,, ,1.0000",
+        "2,2,2,0,0,0.6931,, ,1.0000",
+    ]
+
+    # Fractional counts, with intervals
+    prior = parse_prior("equiprobable", alphabet)
+    data = LogoData.from_counts(alphabet, array([[0.5, 0.0, 1.25, 0.1]]), prior)
+    assert (
+        data.csv().splitlines()[1] == "1,0.5,0.0,1.25,0.1,0.4204,0.0937,0.9876,1.0000"
+    )
+
+    # Single precision counts are written as short as their precision allows
+    counts32 = array([[0.1, 0.2, 0.3, 0.4], [1 / 3, 0, 2, 1e-7]], dtype=np.float32)
+    data32 = LogoData.from_counts(alphabet, counts32)
+    assert data32.csv().splitlines()[1:] == [
+        "1,0.1,0.2,0.3,0.4,0.1064,, ,0.4286",
+        "2,0.33333334,0.0,2.0,1e-07,0.9762,, ,1.0000",
+    ]
+    assert str(data32).splitlines()[8] == (
+        "1 \t0.1 \t0.2 \t0.3 \t0.4 \t0.1064 \t\t \t0.4286"
+    )
+
+    # Streamed output matches the string forms
+    out = StringIO()
+    data.write(out)
+    assert out.getvalue() == str(data)
+    out = StringIO()
+    data.write_csv(out)
+    assert out.getvalue() == data.csv()
+
+
+def test_eps_template() -> None:
+    header, prolog, trailer = _eps_template()
+    assert _eps_template()[1] is prolog
+    assert "$" not in prolog.decode() + trailer.decode()
+
+    template = importlib_resources.files("weblogo").joinpath("template.eps")
+    text = header.template + prolog.decode() + "${logo_data}" + trailer.decode()
+    assert text == template.read_text()
+
+
+def test_svg_formatter() -> None:
+    seqs = seq_io.read(data_ref("cap.fa").open())
+    seqs.alphabet = Alphabet.which(seqs)
+    logodata = LogoData.from_seqs(seqs)
+    options = [
+        {},
+        dict(show_errorbars=True, show_boxes=True, show_ends=True),
+        dict(logo_title="<Title> & more", rotate_numbers=True),
+        dict(unit_name="probability", stacks_per_line=10, show_yaxis=False),
+    ]
+    for kwargs in options:
+        logoformat = LogoFormat(logodata, LogoOptions(**kwargs))  # type: ignore
+        svg = ElementTree.fromstring(svg_formatter(logodata, logoformat))
+        assert svg.tag == "{http://www.w3.org/2000/svg}svg"
+        assert svg.get("width") == "%spt" % logoformat.logo_width
+
+
 class test_ghostscript(unittest.TestCase):
     def test_version(self) -> None:
         GhostscriptAPI().version()
 
 
+@pytest.mark.skipif(shutil.which("gs") is None, reason="requires ghostscript")
+def test_ghostscript_pool() -> None:
+    seqs = seq_io.read(data_ref("cap.fa").open())
+    seqs.alphabet = Alphabet.which(seqs)
+    logodata = LogoData.from_seqs(seqs)
+    logoformat = LogoFormat(logodata, LogoOptions())
+    eps = eps_formatter(logodata, logoformat).decode()
+    width, height = logoformat.logo_width, logoformat.logo_height
+
+    with GhostscriptPool(size=1) as pool:
+        for _ in range(2):
+            png = pool.convert("png", eps, width, height, 96)
+            assert png.startswith(b"\x89PNG")
+        assert pool.convert("pdf", eps, width, height).startswith(b"%PDF")
+        assert pool.check() == 1
+
+        with pytest.raises(RuntimeError):
+            pool.convert("png", "%!PS\nnotarealoperator\n", width, height)
+        png = pool.convert("png", eps, width, height)
+        assert png.startswith(b"\x89PNG")
+
+        set_ghostscript_pool(pool)
+        try:
+            assert formatters["pdf"](logodata, logoformat).startswith(b"%PDF")
+        finally:
+            set_ghostscript_pool(None)
+
+    with pytest.raises(RuntimeError):
+        pool.convert("png", eps, width, height)
+
+
+@pytest.mark.skipif(shutil.which("gs") is None, reason="requires ghostscript")
+def test_ghostscript_batch() -> None:
+    seqs = seq_io.read(data_ref("cap.fa").open())
+    seqs.alphabet = Alphabet.which(seqs)
+    logodata = LogoData.from_seqs(seqs)
+    logoformat = LogoFormat(logodata, LogoOptions())
+    eps = eps_formatter(logodata, logoformat).decode()
+    job = (eps, logoformat.logo_width, logoformat.logo_height, 96)
+
+    pngs = GhostscriptAPI().convert_batch("png", [job, job])
+    assert len(pngs) == 2
+    assert pngs[0] == pngs[1]
+
+    pdfs = format_batch([(logodata, logoformat)] * 3, "pdf")
+    assert len(pdfs) == 3
+    for pdf in pdfs:
+        assert pdf.startswith(b"%PDF")
+
+    logoformat.resolution = 72
+    pngs = format_batch([(logodata, logoformat)], "png")
+    prints = format_batch([(logodata, logoformat)], "png_print")
+    assert logoformat.resolution == 72
+    assert len(prints[0]) > len(pngs[0])
+
+
+def test_format_batch() -> None:
+    seqs = seq_io.read(data_ref("cap.fa").open())
+    seqs.alphabet = Alphabet.which(seqs)
+    logodata = LogoData.from_seqs(seqs)
+    logoformat = LogoFormat(logodata, LogoOptions())
+
+    logos = format_batch([(logodata, logoformat)] * 2, "svg")
+    assert logos == [svg_formatter(logodata, logoformat)] * 2
+
+    with pytest.raises(ValueError):
+        format_batch([(logodata, logoformat)], "notaformat")
+
+
+def test_logo_cache(tmp_path: Path) -> None:
+    seqs = seq_io.read(data_ref("cap.fa").open())
+    seqs.alphabet = Alphabet.which(seqs)
+    logodata = LogoData.from_seqs(seqs)
+    logoformat = LogoFormat(logodata, LogoOptions())
+
+    cache = LogoCache(maxsize=2, directory=str(tmp_path))
+    svg = cache.format("svg", logodata, logoformat)
+    assert svg == svg_formatter(logodata, logoformat)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert cache.formatter("svg")(logodata, logoformat) == svg
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # The key depends on the data, format and options, but not creation date
+    key = LogoCache.key("svg", logodata, logoformat)
+    assert key == LogoCache.key("svg", logodata, LogoFormat(logodata, LogoOptions()))
+    assert key != LogoCache.key("eps", logodata, logoformat)
+    titled = LogoOptions()
+    titled.logo_title = "Title"
+    assert key != LogoCache.key("svg", logodata, LogoFormat(logodata, titled))
+    prior = parse_prior("equiprobable", seqs.alphabet)
+    other = LogoData.from_seqs(seqs, prior)
+    assert key != LogoCache.key("svg", other, LogoFormat(other, LogoOptions()))
+
+    # Putting a logo that is already on disk does not count its size again
+    cache.put(key, svg)
+    assert cache._disk_bytes == len(svg)
+
+    # Logos are still found on disk after leaving memory, or in a new cache
+    cache.format("eps", logodata, logoformat)
+    cache.format("logodata", logodata, logoformat)
+    assert key not in cache._memory
+    assert cache.get(key) == svg
+    assert LogoCache(directory=str(tmp_path)).get(key) == svg
+
+    # Least recently used logos are evicted from disk
+    for path in tmp_path.iterdir():
+        if path.name != key:
+            os.utime(path, (0, 0))
+    cache = LogoCache(directory=str(tmp_path), max_disk_bytes=len(svg) + 100)
+    assert len(list(tmp_path.iterdir())) == 1
+    assert cache.get(key) == svg
+
+    cache.clear()
+    assert cache.get(key) is None
+    assert list(tmp_path.iterdir()) == []
+
+    with pytest.raises(ValueError):
+        cache.format("notaformat", logodata, logoformat)
+
+
+def test_ghostscript_pool_errors() -> None:
+    with pytest.raises(ValueError):
+        GhostscriptPool(size=0)
+
+
 class test_parse_prior(unittest.TestCase):
     def test_parse_prior_none(self) -> None:
         self.assertEqual(None, parse_prior(None, unambiguous_protein_alphabet))
@@ -344,6 +665,44 @@ class test_colorscheme(unittest.TestCase):
         )
         self.assertRaises(KeyError, cs.symbol_color, 1, "X", 1)
 
+    def test_symbol_colors(self) -> None:
+        cs = ColorScheme(
+            [SymbolColor("G", "orange"), SymbolColor("GT", "red")],
+            alphabet=Alphabet("ACGT"),
+        )
+        self.assertEqual(
+            cs.symbol_colors("GTA"),
+            [Color.by_name("orange"), Color.by_name("red"), cs.default_color],
+        )
+        self.assertEqual(cs.symbol_colors("GX"), None)
+
+        cs.rules.append(IndexColor([1, 3], "black"))
+        self.assertEqual(cs.symbol_colors("GTA"), None)
+
+        # Subclasses that only override symbol_color() are asked one symbol
+        # at a time
+        class FirstOnly(SymbolColor):
+            def symbol_color(
+                self, seq_index: int, symbol: str, rank: int
+            ) -> Optional[Color]:
+                return self.color if rank == 0 else None
+
+        class Blue(ColorScheme):
+            def symbol_color(self, seq_index: int, symbol: str, rank: int) -> Color:
+                return Color.by_name("blue")
+
+        cs = ColorScheme([FirstOnly("GT", "red")], alphabet=Alphabet("ACGT"))
+        self.assertEqual(FirstOnly("GT", "red").symbol_colors("GT"), None)
+        self.assertEqual(cs.symbol_colors("GT"), None)
+        self.assertEqual(Blue(alphabet=Alphabet("ACGT")).symbol_colors("GT"), None)
+
+        # Position dependent color schemes are still applied to logos
+        logodata = LogoData.from_counts(Alphabet("ACGT"), array([[1, 2, 3, 4]] * 3))
+        logooptions = LogoOptions()
+        logooptions.color_scheme = ColorScheme([IndexColor([1], "red")])
+        eps = eps_formatter(logodata, LogoFormat(logodata, logooptions)).decode()
+        self.assertEqual(eps.count("[ 1.0 0.0 0.0 ]"), 4)
+
 
 class test_color(unittest.TestCase):
     def test_color_names(self) -> None:
@@ -577,6 +936,22 @@ class test_gamma(unittest.TestCase):
         self.assertAlmostEqual(0.975, g.cdf(g.inverse_cdf(0.975)))
         self.assertAlmostEqual(0.025, g.cdf(g.inverse_cdf(0.025)))
 
+    def test_inverse_cdf_array(self) -> None:
+        gammas = [
+            Gamma.from_mean_variance(2.34, 4),
+            Gamma.from_mean_variance(10.34, 2),
+            Gamma.from_mean_variance(1.34, 4),
+        ]
+        alpha = array([g.alpha for g in gammas])
+        beta = array([g.beta for g in gammas])
+
+        for p in (0.025, 0.5, 0.975):
+            x = gamma_inverse_cdf(alpha, beta, p)
+            self.assertEqual(x.shape, (3,))
+            for i, g in enumerate(gammas):
+                self.assertAlmostEqual(p, g.cdf(float(x[i])))
+                self.assertAlmostEqual(x[i], g.inverse_cdf(p))
+
 
 class test_Dirichlet(unittest.TestCase):
     def test_init(self) -> None:
@@ -702,6 +1077,78 @@ class test_Dirichlet(unittest.TestCase):
         self.assertTrue(abs(low - sent[int(samples * 0.025)]) < 0.2)
         self.assertTrue(abs(high - sent[int(samples * 0.975)]) < 0.2)
 
+    def test_batched(self) -> None:
+        alphas = array(
+            [
+                (2.0, 10.0, 1.0, 1.0),
+                (1.0, 1.0, 1.0, 1.0),
+                (0.1, 0.2, 0.1, 0.1),
+                (100.0, 1.0, 3.0, 0.5),
+            ]
+        )
+        pvec = (0.1, 0.2, 0.3, 0.4)
+
+        # Mean and variance of the entropy and relative entropy, and the 95%
+        # interval of the relative entropy, from the original per-Dirichlet
+        # double loop over the alphabet
+        expected = [
+            (
+                0.8022992880135735,
+                0.04402241916655991,
+                0.8276873438813681,
+                0.05164075010678393,
+                0.38228515977107314,
+                1.273089527991663,
+            ),
+            (
+                1.083333333333333,
+                0.036650671002175894,
+                0.4247383020737261,
+                0.09086104566498966,
+                0.05084998650218224,
+                1.186506086970881,
+            ),
+            (
+                0.40635889686209786,
+                0.1043138344247238,
+                1.1219859939503698,
+                0.24997084655151505,
+                0.36618506195833306,
+                2.293362696653269,
+            ),
+            (
+                0.20204482219859088,
+                0.005444309802875781,
+                2.055735187282304,
+                0.005884448821315339,
+                1.9053832714582448,
+                2.2060871031063636,
+            ),
+        ]
+
+        mean = dirichlet_mean_entropy(alphas)
+        variance = dirichlet_variance_entropy(alphas)
+        rmean = dirichlet_mean_relative_entropy(alphas, pvec)
+        rvariance = dirichlet_variance_relative_entropy(alphas, pvec)
+        low, high = dirichlet_interval_relative_entropy(alphas, pvec, 0.95)
+        self.assertEqual(mean.shape, (4,))
+        self.assertEqual(low.shape, (4,))
+
+        for i, alpha in enumerate(alphas):
+            batched = (mean[i], variance[i], rmean[i], rvariance[i], low[i], high[i])
+            for value, reference in zip(batched, expected[i]):
+                self.assertAlmostEqual(value, reference)
+
+            d = Dirichlet(alpha)
+            single = (
+                d.mean_entropy(),
+                d.variance_entropy(),
+                d.mean_relative_entropy(pvec),
+                d.variance_relative_entropy(pvec),
+            ) + tuple(d.interval_relative_entropy(pvec, 0.95))
+            for stat, reference in zip(single, expected[i]):
+                self.assertAlmostEqual(stat, reference)
+
 
 class _from_URL_fileopen_Tests(unittest.TestCase):
     def test_URLscheme(self) -> None:
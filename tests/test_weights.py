@@ -0,0 +1,157 @@
+#  Copyright (c) 2024 Gavin E. Crooks
+#
+#  This software is distributed under the MIT Open Source License.
+#  <http://www.opensource.org/licenses/mit-license.html>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#  THE SOFTWARE.
+
+
+import unittest
+from typing import List
+
+import numpy as np
+
+from weblogo import LogoData
+from weblogo.seq import Alignment, Seq, SeqList, unambiguous_dna_alphabet
+from weblogo.weights import cluster_weights, henikoff_weights, sequence_weights
+
+
+def _brute_cluster_weights(ords: np.ndarray, identity: float) -> np.ndarray:
+    # Greedy clustering, comparing every sequence with every representative
+    rows, L = ords.shape
+    need = L - int(np.floor((1.0 - identity) * L + 1e-9))
+    reps: List[int] = []
+    cluster: List[int] = []
+    for i in range(rows):
+        same = [np.count_nonzero(ords[r] == ords[i]) for r in reps]
+        if same and max(same) >= need:
+            cluster.append(cluster[reps[int(np.argmax(same))]])
+        else:
+            cluster.append(len(reps))
+            reps.append(i)
+    sizes = np.bincount(cluster)
+    return 1.0 / sizes[cluster]
+
+
+class test_weights(unittest.TestCase):
+    def setUp(self) -> None:
+        self.seqs = SeqList(
+            [Seq(s) for s in ["ACGTACGT", "ACGTACGT", "ACGTACGA", "TTTTGGGG"]],
+            alphabet=unambiguous_dna_alphabet,
+        )
+
+    def test_henikoff(self) -> None:
+        w = sequence_weights(self.seqs, "henikoff")
+        assert w is not None
+        # Duplicates share weight, the most distinct sequence has weight 1
+        self.assertEqual(w[0], w[1])
+        self.assertLess(w[1], w[2])
+        self.assertEqual(w.max(), 1.0)
+        self.assertEqual(w.argmax(), 3)
+
+        # Equally distinct sequences have equal weights
+        w = henikoff_weights(np.array([[0, 1], [1, 0], [2, 2]], dtype=np.uint8))
+        self.assertTrue(np.allclose(w, 1.0))
+
+    def test_cluster(self) -> None:
+        w = sequence_weights(self.seqs, "cluster", identity=0.8)
+        assert w is not None
+        self.assertEqual(w.tolist(), [1 / 3, 1 / 3, 1 / 3, 1.0])
+
+        w = sequence_weights(self.seqs, "cluster", identity=1.0)
+        assert w is not None
+        self.assertEqual(w.tolist(), [0.5, 0.5, 1.0, 1.0])
+
+        w = sequence_weights(self.seqs, "cluster", identity=0.01)
+        assert w is not None
+        self.assertEqual(w.tolist(), [0.25] * 4)
+
+        with self.assertRaises(ValueError):
+            sequence_weights(self.seqs, "cluster", identity=0.0)
+        with self.assertRaises(ValueError):
+            sequence_weights(self.seqs, "cluster", identity=1.5)
+
+    def test_cluster_prefilter(self) -> None:
+        # Families of related sequences. The block prefilter must find the
+        # same clusters as comparing with every representative.
+        rng = np.random.default_rng(42)
+        families = rng.integers(0, 4, (20, 50), dtype=np.uint8)
+        ords = families[rng.integers(0, 20, 1000)]
+        mutate = rng.random(ords.shape) < 0.15
+        ords[mutate] = rng.integers(0, 4, np.count_nonzero(mutate))
+        for identity in [0.5, 0.8, 0.9]:
+            self.assertTrue(
+                np.array_equal(
+                    cluster_weights(ords, identity),
+                    _brute_cluster_weights(ords, identity),
+                )
+            )
+
+    def test_cluster_prefilter_conserved(self) -> None:
+        # Conserved columns and gaps, shared by most sequences, must not hide
+        # similar sequences from the prefilter.
+        rng = np.random.default_rng(7)
+        families = rng.integers(0, 20, (10, 60), dtype=np.uint8)
+        ords = families[rng.integers(0, 10, 1000)]
+        mutate = rng.random(ords.shape) < 0.15
+        ords[mutate] = rng.integers(0, 20, np.count_nonzero(mutate))
+        ords[:, 10:30] = 5
+        ords[rng.random(ords.shape) < 0.3] = 255
+        for identity in [0.5, 0.8, 0.9]:
+            self.assertTrue(
+                np.array_equal(
+                    cluster_weights(ords, identity),
+                    _brute_cluster_weights(ords, identity),
+                )
+            )
+
+    def test_schemes(self) -> None:
+        self.assertIsNone(sequence_weights(self.seqs, "none"))
+        with self.assertRaises(ValueError):
+            sequence_weights(self.seqs, "unknown")
+
+        alignment = Alignment.from_seqs(self.seqs)
+        for scheme in ["henikoff", "cluster"]:
+            self.assertTrue(
+                np.array_equal(
+                    sequence_weights(alignment, scheme),  # type: ignore
+                    sequence_weights(self.seqs, scheme),  # type: ignore
+                )
+            )
+
+    def test_weighted_profile(self) -> None:
+        w = sequence_weights(self.seqs, "cluster", identity=1.0)
+        counts = self.seqs.profile(weights=w)
+        self.assertEqual(counts.array[0].tolist(), [2.0, 0.0, 0.0, 1.0])
+        self.assertEqual(counts.array.sum(), 3.0 * 8)
+
+        alignment = Alignment.from_seqs(self.seqs)
+        self.assertTrue(
+            np.array_equal(alignment.profile(weights=w).array, counts.array)
+        )
+
+        data = LogoData.from_seqs(self.seqs, weights=w)
+        self.assertEqual(np.sum(data.counts), 3.0 * 8)
+
+        with self.assertRaises(ValueError):
+            self.seqs.profile(weights=[1.0, 2.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
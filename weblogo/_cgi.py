@@ -532,12 +532,8 @@ def send_form(
         substitutions["png"] = 'disabled="disabled"'
         substitutions["jpeg"] = 'disabled="disabled"'
         substitutions["pdf"] = 'disabled="disabled"'
-        substitutions["svg"] = 'disabled="disabled"'
         substitutions["eps"] = 'selected="selected"'
 
-    if shutil.which("pdf2svg") is None:
-        substitutions["svg"] = 'disabled="disabled"'
-
     if errors:
         print(errors, file=sys.stderr)
         error_message: List[str] = []
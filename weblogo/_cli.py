@@ -45,10 +45,8 @@ import atexit
 import os
 import sys
 from contextlib import ExitStack
-from io import StringIO
 from optparse import OptionGroup
-from os import PathLike
-from typing import Any, Union
+from typing import Any, List
 
 import importlib_resources
 
@@ -58,6 +56,7 @@ from . import (
     LogoOptions,
     default_formatter,
     description,
+    format_batch,
     formatters,
     parse_prior,
     read_seq_data,
@@ -71,7 +70,9 @@ from . import (
 from .colorscheme import ColorScheme, SymbolColor
 from .logo import _seq_formats, _seq_names
 from .seq import Seq, SeqList, nucleic_alphabet
+from .timings import Timings, timed
 from .utils.deoptparse import DeOptionParser
+from .weights import sequence_weights, weighting_schemes
 
 
 # ====================== Main: Parse Command line =============================
@@ -81,23 +82,46 @@ def main() -> None:
     # ------ Parse Command line ------
     parser = _build_option_parser()
     (opts, args) = parser.parse_args(sys.argv[1:])
-    if args:
+    if opts.batch is not None:
+        if not args:
+            parser.error("option --batch requires one or more sequence files")
+        if opts.fin is not None or opts.upload is not None:
+            parser.error("option --batch is incompatible with --fin and --upload")
+    elif args:
         parser.error("Unparsable arguments: %s " % args)
 
+    if opts.jobs < 0:
+        parser.error("option --jobs must be zero or a positive number")
+    if not 0.0 < opts.cluster_identity <= 1.0:
+        parser.error("option --cluster-identity must be greater than 0 and at most 1")
+
+    if opts.concurrency < 0:
+        parser.error("option --concurrency must be zero or a positive number")
+    if opts.max_queue < 0:
+        parser.error("option --max-queue must be zero or a positive number")
+
     if opts.serve:
-        httpd_serve_forever(opts.port)  # Never returns?    # pragma: no cover
+        if opts.serve_async:  # pragma: no cover
+            httpd_serve_async(opts.port, opts.concurrency, opts.max_queue)
+        else:
+            httpd_serve_forever(opts.port)  # Never returns?    # pragma: no cover
         sys.exit(0)  # pragma: no cover
 
     # ------ Create Logo ------
+    timings = Timings() if opts.timings else None
     try:
-        data = _build_logodata(opts)
-        format = _build_logoformat(data, opts)
+        with timings or ExitStack(), timed("weblogo"):
+            if opts.batch is not None:
+                _batch(opts, args)
+            else:
+                data = _build_logodata(opts)
+                format = _build_logoformat(data, opts)
 
-        formatter = opts.formatter
-        logo = formatter(data, format)
-        # logo = logo.encode()
+                formatter = opts.formatter
+                logo = formatter(data, format)
+                # logo = logo.encode()
 
-        opts.fout.buffer.write(logo)
+                opts.fout.buffer.write(logo)
 
     except ValueError as err:
         print("Error:", err, file=sys.stderr)
@@ -105,32 +129,45 @@ def main() -> None:
     except KeyboardInterrupt:  # pragma: no cover
         sys.exit(0)
 
+    if timings is not None:
+        print(timings.to_json(), file=sys.stderr)
+
 
 # End main()
 
 
+def _batch(opts: Any, filenames: List[str]) -> None:
+    """Create a logo for each sequence file, and write the logos to the
+    directory opts.batch, named after the sequence files."""
+    format = next(k for k, v in formatters.items() if v is opts.formatter)
+    extension = _batch_extensions.get(format, format)
+
+    logos = []
+    for filename in filenames:
+        with open(filename) as fin:
+            opts.fin = fin
+            try:
+                data = _build_logodata(opts)
+            except ValueError as err:
+                raise ValueError("%s: %s" % (filename, err))
+        logos.append((data, _build_logoformat(data, opts)))
+
+    os.makedirs(opts.batch, exist_ok=True)
+    for filename, logo in zip(filenames, format_batch(logos, format)):
+        name = os.path.splitext(os.path.basename(filename))[0] + "." + extension
+        with open(os.path.join(opts.batch, name), "wb") as fout:
+            fout.write(logo)
+
+
+_batch_extensions = {"png_print": "png", "logodata": "txt"}
+
+
 def httpd_serve_forever(port: int = 8080) -> None:
-    """Start a webserver on a local port."""
-
-    import http.server as server
-    import http.server as cgiserver
-
-    class __HTTPRequestHandler(cgiserver.CGIHTTPRequestHandler):
-        # Modify CGIHTTPRequestHandler so that it will run the cgi script directly,
-        # instead of exec'ing
-        # This bypasses the need for the cgi script to have execute permissions set,
-        # since distutils install does not preserve permissions.
-        def is_cgi(self) -> bool:
-            self.have_fork = False  # Prevent CGIHTTPRequestHandler from using fork
-            if self.path == "/create.cgi":
-                self.cgi_info = "", "create.cgi"
-                return True
-            return False
-
-        def is_python(
-            self, path: Union[str, PathLike]
-        ) -> bool:  # Let CGIHTTPRequestHandler know that cgi script is python
-            return True
+    """Start a webserver on a local port. The server renders logos from JSON
+    requests posted to /render (See weblogo._server), and serves the WebLogo
+    web pages."""
+
+    from ._server import LogoServer
 
     # Add current directory to PYTHONPATH. This is
     # so that we can run the standalone server
@@ -146,20 +183,41 @@ def httpd_serve_forever(port: int = 8080) -> None:
 
     os.chdir(path)
 
-    HandlerClass = __HTTPRequestHandler
-    ServerClass = server.HTTPServer
-    httpd = ServerClass(("", port), HandlerClass)
+    httpd = LogoServer(("", port))
     print("WebLogo server running at http://localhost:%d/" % port)
 
     try:
         httpd.serve_forever()
     except KeyboardInterrupt:
+        httpd.server_close()
         sys.exit(0)
 
 
 # end httpd_serve_forever()
 
 
+def httpd_serve_async(
+    port: int = 8080, concurrency: int = 0, max_queue: int = 64
+) -> None:  # pragma: no cover
+    """Start an asyncio based server on a local port, which only renders logos
+    from JSON requests posted to /render (See weblogo._server). At most
+    `concurrency` logos are rendered at once, and `max_queue` requests wait,
+    beyond which requests are refused."""
+    import asyncio
+
+    from ._server import AsyncLogoServer
+
+    server = AsyncLogoServer(("", port), concurrency=concurrency, max_queue=max_queue)
+    print("WebLogo server running at http://localhost:%d/render" % port)
+
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        sys.exit(0)
+    finally:
+        server.close()
+
+
 def _build_logodata(options: Any) -> LogoData:
     motif_flag = False
 
@@ -167,7 +225,7 @@ def _build_logodata(options: Any) -> LogoData:
 
     if options.upload is None:
         if fin is None:
-            fin = StringIO(sys.stdin.read())
+            fin = sys.stdin
     else:
         if fin is None:
             from .logo import _from_URL_fileopen
@@ -176,16 +234,23 @@ def _build_logodata(options: Any) -> LogoData:
         else:
             raise ValueError("error: options --fin and --upload are incompatible")
 
-    try:
-        # Try reading data in transfac format first.
-        from .matrix import Motif
-
-        motif = Motif.read_transfac(fin, alphabet=options.alphabet)
-        motif_flag = True
-    except ValueError as motif_err:
-        # Failed reading Motif, try reading as multiple sequence data.
-        if options.input_parser == "transfac":
-            raise motif_err  # Adding transfac as str insted of parser is a bit of a ugly kludge
+    if not fin.seekable():
+        fin = seq_io.RewindableStream(fin)
+
+    # Try reading data in transfac format first, unless the start of the file
+    # already identifies a multiple sequence format.
+    if options.input_parser == "transfac" or not seq_io.sniff(fin):
+        try:
+            from .matrix import Motif
+
+            motif = Motif.read_transfac(fin, alphabet=options.alphabet)
+            motif_flag = True
+        except ValueError as motif_err:
+            if options.input_parser == "transfac":
+                raise motif_err  # Adding transfac as str insted of parser is a bit of a ugly kludge
+
+    if not motif_flag:
+        # Read as multiple sequence data.
         seqs = read_seq_data(
             fin,
             options.input_parser.read,
@@ -224,64 +289,67 @@ def _build_logodata(options: Any) -> LogoData:
         a = seqs.alphabet
         assert a is not None
         prior = parse_prior(options.composition, a, options.weight)
-        data = LogoData.from_seqs(seqs, prior)
+        weights = sequence_weights(seqs, options.weighting, options.cluster_identity)
+        data = LogoData.from_seqs(seqs, prior, jobs=options.jobs, weights=weights)
 
     return data
 
 
+# Options copied directly from the command line options to the LogoOptions
+_logoformat_options = [
+    # Logo Data Options.
+    "alphabet",
+    "unit_name",
+    "first_index",
+    "logo_start",
+    "logo_end",
+    # Logo Format Options.
+    "stack_width",
+    "stacks_per_line",
+    "logo_title",
+    "logo_label",
+    "show_xaxis",
+    "xaxis_label",
+    "annotate",
+    "rotate_numbers",
+    "number_interval",
+    "yaxis_scale",
+    "show_yaxis",
+    "yaxis_label",
+    "show_ends",
+    "fineprint",
+    "yaxis_tic_interval",
+    "show_errorbars",
+    "reverse_stacks",
+    # Color Options.
+    "color_scheme",
+    "default_color",
+    # Font Format Options.
+    "fontsize",
+    "title_fontsize",
+    "small_fontsize",
+    "number_fontsize",
+    "text_font",
+    "logo_font",
+    "title_font",
+    # Advanced Format Options.
+    "stack_aspect_ratio",
+    "show_boxes",
+    "resolution",
+    "scale_width",
+    "debug",
+    "errorbar_fraction",
+    "errorbar_width_fraction",
+    "errorbar_gray",
+]
+
+
 def _build_logoformat(logodata: LogoData, opts: Any) -> LogoFormat:
     """Extract and process relevant option values and return a
     LogoFormat object."""
 
     args = {}
-    direct_from_opts = [
-        # Logo Data Options.
-        "alphabet",
-        "unit_name",
-        "first_index",
-        "logo_start",
-        "logo_end",
-        # Logo Format Options.
-        "stack_width",
-        "stacks_per_line",
-        "logo_title",
-        "logo_label",
-        "show_xaxis",
-        "xaxis_label",
-        "annotate",
-        "rotate_numbers",
-        "number_interval",
-        "yaxis_scale",
-        "show_yaxis",
-        "yaxis_label",
-        "show_ends",
-        "fineprint",
-        "yaxis_tic_interval",
-        "show_errorbars",
-        "reverse_stacks",
-        # Color Options.
-        "color_scheme",
-        "default_color",
-        # Font Format Options.
-        "fontsize",
-        "title_fontsize",
-        "small_fontsize",
-        "number_fontsize",
-        "text_font",
-        "logo_font",
-        "title_font",
-        # Advanced Format Options.
-        "stack_aspect_ratio",
-        "show_boxes",
-        "resolution",
-        "scale_width",
-        "debug",
-        "errorbar_fraction",
-        "errorbar_width_fraction",
-        "errorbar_gray",
-    ]
-
-    for k in direct_from_opts:
+    for k in _logoformat_options:
         args[k] = opts.__dict__[k]
 
     # logo_size = copy.copy(opts.__dict__['logo_size'])
@@ -415,6 +483,18 @@ def _build_option_parser() -> DeOptionParser:
         metavar="FILENAME",
     )
 
+    io_grp.add_option(
+        "",
+        "--batch",
+        dest="batch",
+        action="store",
+        default=None,
+        help="Create a logo for each sequence file given as an argument, and "
+        "write the logos to DIRECTORY. Logos in PDF and bitmap formats are "
+        "converted by a single Ghostscript process.",
+        metavar="DIRECTORY",
+    )
+
     io_grp.add_option(
         "-F",
         "--format",
@@ -428,6 +508,16 @@ def _build_option_parser() -> DeOptionParser:
         default=default_formatter,
     )
 
+    io_grp.add_option(
+        "",
+        "--timings",
+        dest="timings",
+        action="store_true",
+        default=False,
+        help="Report the wall time, CPU time and peak memory of each stage of "
+        "creating the logo, as JSON written to stderr.",
+    )
+
     # ========================== Data OPTIONS ==========================
 
     data_grp.add_option(
@@ -495,6 +585,44 @@ def _build_option_parser() -> DeOptionParser:
         metavar="NUMBER",
     )
 
+    data_grp.add_option(
+        "",
+        "--jobs",
+        dest="jobs",
+        action="store",
+        type="int",
+        default=1,
+        help="Count the sequences of large alignments in parallel, using this "
+        "many worker processes. Use 0 for one process per CPU. (Default: 1)",
+        metavar="N",
+    )
+
+    data_grp.add_option(
+        "",
+        "--weighting",
+        dest="weighting",
+        action="store",
+        choices=list(weighting_schemes),
+        type="choice",
+        default="none",
+        help="Weight sequences to correct for redundancy in the alignment: "
+        "'none' (default), 'henikoff' (position based weights), or 'cluster' "
+        "(one over the size of each cluster of similar sequences)",
+        metavar="SCHEME",
+    )
+
+    data_grp.add_option(
+        "",
+        "--cluster-identity",
+        dest="cluster_identity",
+        action="store",
+        type="float",
+        default=0.8,
+        help="The fractional sequence identity at which sequences are clustered "
+        "by '--weighting cluster'. (Default: 0.8)",
+        metavar="FRACTION",
+    )
+
     data_grp.add_option(
         "-i",
         "--first-index",
@@ -997,7 +1125,8 @@ def _build_option_parser() -> DeOptionParser:
         dest="serve",
         action="store_true",
         default=False,
-        help="Start a standalone WebLogo server for creating sequence logos.",
+        help="Start a standalone WebLogo server for creating sequence logos. "
+        "Also renders logos from JSON requests posted to /render.",
     )
 
     server_grp.add_option(
@@ -1011,6 +1140,40 @@ def _build_option_parser() -> DeOptionParser:
         metavar="PORT",
     )
 
+    server_grp.add_option(
+        "",
+        "--async",
+        dest="serve_async",
+        action="store_true",
+        default=False,
+        help="Serve only JSON render requests, handled with asyncio, with a "
+        "bounded number of logos rendered at once and requests waiting.",
+    )
+
+    server_grp.add_option(
+        "",
+        "--concurrency",
+        dest="concurrency",
+        action="store",
+        type="int",
+        default=0,
+        help="With --async, the number of logos rendered at once. "
+        "(Default: one per CPU)",
+        metavar="N",
+    )
+
+    server_grp.add_option(
+        "",
+        "--max-queue",
+        dest="max_queue",
+        action="store",
+        type="int",
+        default=64,
+        help="With --async, the number of requests that can wait to be "
+        "rendered. Further requests are refused. (Default: %default)",
+        metavar="N",
+    )
+
     return parser
 
     # END _build_option_parser
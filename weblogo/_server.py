@@ -0,0 +1,534 @@
+#  Copyright (c) 2024 Gavin E. Crooks
+#
+#  This software is distributed under the new BSD Open Source License.
+#  <http://www.opensource.org/licenses/bsd-license.html>
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  (1) Redistributions of source code must retain the above copyright notice,
+#  this list of conditions and the following disclaimer.
+#
+#  (2) Redistributions in binary form must reproduce the above copyright
+#  notice, this list of conditions and the following disclaimer in the
+#  documentation and or other materials provided with the distribution.
+#
+#  (3) Neither the name of the University of California, Lawrence Berkeley
+#  National Laboratory, U.S. Dept. of Energy nor the names of its contributors
+#  may be used to endorse or promote products derived from this software
+#  without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+#  LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+#  CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+#  SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+#  INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+#  CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+"""A long running WebLogo server, which renders logos from JSON requests.
+
+The server keeps its state warm between requests: the weblogo modules and
+the EPS template are loaded once, formatted logos are cached, and, if
+Ghostscript is available, a pool of running Ghostscript interpreters converts
+logos to PDF and bitmaps. LogoServer handles each request in a thread.
+AsyncLogoServer handles requests with asyncio, and bounds the number of logos
+rendered at once, and the number of requests waiting.
+
+POST a JSON object to /render, and the logo is returned in the body of the
+response, with the matching Content-Type. For example,
+
+    {
+        "sequences": ">seq1\\nACGT\\n>seq2\\nACGA\\n",
+        "format": "png",
+        "options": {"logo_title": "My logo", "color_scheme": "classic"}
+    }
+
+Request fields :
+- sequences   -- A multiple sequence alignment, in any format that
+                 seq_io can recognize
+- counts      -- Or, a matrix of symbol counts, one row per position
+- alphabet    -- The symbols of the counts columns, e.g. "ACGT", or the
+                 alphabet of the sequences (Default: guessed from the data)
+- sequence_type -- Or, one of "protein", "dna" or "rna"
+- composition -- The expected composition (See parse_prior, Default: "auto")
+- weight      -- The weight of the prior (Default depends on alphabet length)
+- format      -- An output format name, one of the keys of weblogo.formatters
+                 (Default: "png")
+- options     -- LogoOptions attributes, e.g. logo_title, stack_width, or
+                 color_scheme, one of the names in std_color_schemes.
+
+Invalid requests get a "400 Bad Request" response, with a JSON body
+{"error": message}. LogoServer also serves the WebLogo web pages and form,
+as did the original CGI based server.
+"""
+
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import CGIHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from os import PathLike
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from ._cgi import mime_type
+from ._cli import _logoformat_options
+from .color import Color
+from .logo import (
+    LogoData,
+    LogoFormat,
+    LogoOptions,
+    parse_prior,
+    read_seq_data,
+    std_alphabets,
+    std_color_schemes,
+)
+from .logo_formatter import (
+    GhostscriptPool,
+    LogoCache,
+    _eps_template,
+    formatters,
+    set_ghostscript_pool,
+)
+from .seq import Alphabet
+
+
+class LogoRenderer:
+    """Renders logos from JSON requests, holding the warm state shared between
+    requests: a cache of formatted logos, and, if Ghostscript is installed, a
+    pool of running Ghostscript interpreters. Safe to use from many threads.
+    """
+
+    def __init__(self, cache_size: int = 128, ghostscript_workers: int = 2) -> None:
+        self.cache = LogoCache(maxsize=cache_size)
+
+        _eps_template()  # Load the EPS template now, rather than on first use
+
+        self.ghostscript_pool: Optional[GhostscriptPool] = None
+        if ghostscript_workers > 0:
+            try:
+                self.ghostscript_pool = GhostscriptPool(size=ghostscript_workers)
+            except EnvironmentError:
+                pass  # Ghostscript is not installed. EPS and SVG still work.
+            set_ghostscript_pool(self.ghostscript_pool)
+
+    def close(self) -> None:
+        if self.ghostscript_pool is not None:
+            set_ghostscript_pool(None)
+            self.ghostscript_pool.close()
+            self.ghostscript_pool = None
+
+    def render(self, request: Any) -> Tuple[str, bytes]:
+        """Render a logo described by a JSON request (See module docs).
+
+        Returns:
+            (format, logo) -- The name of the output format, and the logo
+        Raises:
+            ValueError: If the request is invalid
+        """
+        if not isinstance(request, dict):
+            raise ValueError("Request must be a JSON object")
+        unknown = set(request) - set(_request_fields)
+        if unknown:
+            raise ValueError("Unknown request field: '%s'" % sorted(unknown)[0])
+        for name, value in request.items():
+            if value is not None or name != "weight":
+                _check_type(name, value, _request_fields[name])
+
+        format = request.get("format", "png")
+        if format not in formatters:
+            raise ValueError("Unknown logo format: '%s'" % format)
+
+        logodata = _build_logodata(request)
+        logoformat = LogoFormat(logodata, _build_logooptions(request))
+        return format, self.cache.format(format, logodata, logoformat)
+
+
+# end class LogoRenderer
+
+
+class LogoServer(ThreadingHTTPServer):
+    """A threaded HTTP server that renders sequence logos, and serves the
+    WebLogo web pages.
+
+    Usage:
+        server = LogoServer(("", 8080))
+        server.serve_forever()
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        renderer: Optional[LogoRenderer] = None,
+        max_request_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        super().__init__(address, LogoRequestHandler)
+        self.renderer = renderer if renderer is not None else LogoRenderer()
+        self.max_request_bytes = max_request_bytes
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.renderer.close()
+
+
+# end class LogoServer
+
+
+class LogoRequestHandler(CGIHTTPRequestHandler):
+    """Handle JSON render requests to /render. Otherwise, serve the WebLogo
+    web pages from the current directory, and run the create.cgi script.
+    """
+
+    server: LogoServer
+
+    def is_cgi(self) -> bool:
+        # Run the cgi script directly, instead of exec'ing, so that the script
+        # does not need execute permissions, which distutils install does not
+        # preserve.
+        self.have_fork = False  # Prevent CGIHTTPRequestHandler from using fork
+        if self.path == "/create.cgi":
+            self.cgi_info = "", "create.cgi"
+            return True
+        return False
+
+    def is_python(self, path: Union[str, PathLike]) -> bool:
+        # Let CGIHTTPRequestHandler know that cgi script is python
+        return True
+
+    def do_POST(self) -> None:
+        if self.path.split("?")[0] != "/render":
+            super().do_POST()
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self._send_error(411, "Content-Length required")
+            return
+        if length < 0:
+            self._send_error(400, "Invalid Content-Length")
+            return
+        if length > self.server.max_request_bytes:
+            self._send_error(413, "Request too large")
+            return
+
+        try:
+            request = json.loads(self.rfile.read(length))
+            format, logo = self.server.renderer.render(request)
+        except _request_errors as err:  # Includes JSON decoding errors
+            self._send_error(400, str(err))
+            return
+        except Exception as err:
+            self._send_error(500, str(err))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", mime_type[format])
+        self.send_header("Content-Length", str(len(logo)))
+        self.end_headers()
+        self.wfile.write(logo)
+
+    def _send_error(self, code: int, message: str) -> None:
+        body = json.dumps({"error": message}).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# end class LogoRequestHandler
+
+
+class AsyncLogoServer:
+    """An asyncio based server that renders logos from JSON requests posted to
+    /render, with bounded concurrency.
+
+    Requests are read by the event loop, so slow uploads do not hold up other
+    clients. At most `concurrency` logos are rendered at once, by a pool of
+    worker threads, and at most `max_queue` more requests wait their turn.
+    Further requests are refused at once with "503 Service Unavailable",
+    rather than piling up. Requests that take longer than `timeout` seconds to
+    arrive get "408 Request Timeout". Unlike LogoServer, the web pages are not
+    served.
+
+    Usage:
+        server = AsyncLogoServer(("", 8080), concurrency=4)
+        asyncio.run(server.serve_forever())
+    """
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        renderer: Optional[LogoRenderer] = None,
+        concurrency: int = 0,
+        max_queue: int = 64,
+        timeout: float = 60.0,
+        max_request_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        """
+        Args:
+            concurrency: The number of logos rendered at once. If 0, one per CPU
+        """
+        if concurrency < 0 or max_queue < 0:
+            raise ValueError("Concurrency and queue length must not be negative.")
+        self.address = address
+        self.renderer = renderer if renderer is not None else LogoRenderer()
+        self.concurrency = concurrency or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.max_request_bytes = max_request_bytes
+
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pending = 0  # Requests being rendered or waiting to be rendered
+
+    async def start(self) -> None:
+        """Start listening for connections."""
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        host, port = self.address
+        self._server = await asyncio.start_server(self._handle, host or None, port)
+
+    @property
+    def port(self) -> int:
+        """The port the server is listening on (once started)"""
+        assert self._server is not None
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        assert self._server is not None
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        self._executor.shutdown(wait=False)
+        self.renderer.close()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            try:
+                body = await asyncio.wait_for(self._read_request(reader), self.timeout)
+                status, content_type, response = await self._render(body)
+            except _HTTPError as err:
+                status, content_type = err.status, "application/json"
+                response = json.dumps({"error": err.message}).encode()
+            except asyncio.TimeoutError:
+                status, content_type = 408, "application/json"
+                response = json.dumps({"error": "Request timeout"}).encode()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception as err:  # Still answer, whatever went wrong
+                status, content_type = 500, "application/json"
+                response = json.dumps({"error": str(err)}).encode()
+
+            head = "HTTP/1.1 %d %s\r\n" % (status, HTTPStatus(status).phrase)
+            head += "Content-Type: %s\r\n" % content_type
+            head += "Content-Length: %d\r\n" % len(response)
+            if status == 503:
+                head += "Retry-After: 1\r\n"
+            head += "Connection: close\r\n\r\n"
+            writer.write(head.encode("latin-1") + response)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # The client went away
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> bytes:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            raise _HTTPError(431, "Request header too large")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, path, _ = lines[0].split(" ", 2)
+            headers = dict(line.split(":", 1) for line in lines[1:] if line)
+        except ValueError:
+            raise _HTTPError(400, "Malformed request")
+        headers = {k.strip().lower(): v.strip() for k, v in headers.items()}
+
+        if path.split("?")[0] != "/render":
+            raise _HTTPError(404, "Not found")
+        if method != "POST":
+            raise _HTTPError(405, "Method not allowed")
+        try:
+            length = int(headers["content-length"])
+        except (KeyError, ValueError):
+            raise _HTTPError(411, "Content-Length required")
+        if length < 0:
+            raise _HTTPError(400, "Invalid Content-Length")
+        if length > self.max_request_bytes:
+            raise _HTTPError(413, "Request too large")
+        return await reader.readexactly(length)
+
+    async def _render(self, body: bytes) -> Tuple[int, str, bytes]:
+        # Refuse requests once the queue is full, rather than letting them
+        # pile up.
+        if self._pending >= self.concurrency + self.max_queue:
+            raise _HTTPError(503, "Server busy")
+        assert self._semaphore is not None
+
+        self._pending += 1
+        try:
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                format, logo = await loop.run_in_executor(
+                    self._executor, self._render_json, body
+                )
+        except _request_errors as err:  # Includes JSON decoding errors
+            raise _HTTPError(400, str(err))
+        finally:
+            self._pending -= 1
+        return 200, mime_type[format], logo
+
+    def _render_json(self, body: bytes) -> Tuple[str, bytes]:
+        # Runs in a worker thread
+        return self.renderer.render(json.loads(body))
+
+
+# end class AsyncLogoServer
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# Errors raised by invalid requests, which get a "400 Bad Request" response.
+# Malformed data that gets past the checks below can fail deep in the parsers
+# and logo code with any of these.
+_request_errors = (ValueError, TypeError, KeyError, IndexError)
+
+# Request fields, and the JSON type of their values
+_request_fields: Dict[str, type] = {
+    "sequences": str,
+    "counts": list,
+    "alphabet": str,
+    "sequence_type": str,
+    "composition": str,
+    "weight": float,
+    "format": str,
+    "options": dict,
+}
+
+# The JSON type of logo options, where the LogoOptions default does not
+# give the type, or where only integers will do.
+_option_types: Dict[str, type] = {
+    "first_index": int,
+    "logo_start": int,
+    "logo_end": int,
+    "stacks_per_line": int,
+    "number_interval": int,
+    "annotate": list,
+    "yaxis_scale": float,
+    "yaxis_label": str,
+    "color_scheme": str,
+    "default_color": str,
+}
+
+_type_names = {
+    bool: "true or false",
+    int: "an integer",
+    float: "a number",
+    str: "a string",
+    list: "a list",
+    dict: "a JSON object",
+}
+
+
+def _check_type(name: str, value: Any, kind: type) -> None:
+    # Raise a ValueError unless the JSON value is of the given type. Numbers
+    # may be integers, but booleans are not numbers.
+    if kind is float:
+        valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+    elif kind is int:
+        valid = isinstance(value, int) and not isinstance(value, bool)
+    else:
+        valid = isinstance(value, kind)
+    if not valid:
+        raise ValueError("'%s' must be %s" % (name, _type_names[kind]))
+
+
+def _option_type(name: str, default: Any) -> type:
+    if name in _option_types:
+        return _option_types[name]
+    if isinstance(default, bool) or isinstance(default, str):
+        return type(default)
+    return float
+
+
+def _build_logodata(request: Dict[str, Any]) -> LogoData:
+    alphabet: Optional[Alphabet] = None
+    if "sequence_type" in request:
+        if request["sequence_type"] not in std_alphabets:
+            raise ValueError("Unknown sequence type: '%s'" % request["sequence_type"])
+        alphabet = std_alphabets[request["sequence_type"]]
+    if "alphabet" in request:
+        alphabet = Alphabet(str(request["alphabet"]))
+
+    composition = request.get("composition", "auto")
+    weight = request.get("weight")
+
+    if ("sequences" in request) == ("counts" in request):
+        raise ValueError("Request must include one of 'sequences' or 'counts'")
+
+    if "counts" in request:
+        if alphabet is None:
+            raise ValueError("Request with 'counts' must include an 'alphabet'")
+        counts = np.asarray(request["counts"])
+        if counts.ndim != 2 or counts.shape[1] != len(alphabet):
+            raise ValueError("Counts must have one column per alphabet symbol")
+        if counts.dtype.kind not in "iuf" or np.any(counts < 0):
+            raise ValueError("Counts must be non-negative numbers")
+        prior = parse_prior(composition, alphabet, weight)
+        return LogoData.from_counts(alphabet, counts, prior)
+
+    seqs = read_seq_data(StringIO(str(request["sequences"])), alphabet=alphabet)
+    assert seqs.alphabet is not None
+    prior = parse_prior(composition, seqs.alphabet, weight)
+    return LogoData.from_seqs(seqs, prior)
+
+
+def _build_logooptions(request: Dict[str, Any]) -> LogoOptions:
+    options = request.get("options", {})
+    if not isinstance(options, dict):
+        raise ValueError("Options must be a JSON object")
+
+    logooptions = LogoOptions()
+    for name, value in options.items():
+        if name not in _logoformat_options or name == "alphabet":
+            raise ValueError("Unknown logo option: '%s'" % name)
+        default = getattr(logooptions, name)
+        if value is None and default is None:
+            continue
+        _check_type(name, value, _option_type(name, default))
+        if name == "annotate":
+            if not all(isinstance(label, str) for label in value):
+                raise ValueError("'annotate' must be a list of strings")
+        elif name == "color_scheme":
+            if value not in std_color_schemes:
+                raise ValueError("Unknown color scheme: '%s'" % value)
+            value = std_color_schemes[value]
+        elif name == "default_color":
+            value = Color.from_string(value)
+        setattr(logooptions, name, value)
+    return logooptions
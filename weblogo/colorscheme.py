@@ -70,6 +70,14 @@ class ColorRule:
     def symbol_color(self, seq_index: int, symbol: str, rank: int) -> Optional[Color]:
         raise NotImplementedError  # pragma: no cover
 
+    def symbol_colors(self, symbols: str) -> Optional[List[Optional[Color]]]:
+        """The color of each of the given symbols, if this rule colors symbols
+        regardless of their position and rank. Otherwise None.
+
+        Subclasses that implement this method must return None if a further
+        subclass overrides symbol_color(), since those colors may differ."""
+        return None
+
 
 class ColorScheme(ColorRule):
     """
@@ -107,6 +115,21 @@ class ColorScheme(ColorRule):
 
         return self.default_color
 
+    def symbol_colors(self, symbols: str) -> Optional[List[Optional[Color]]]:
+        if type(self).symbol_color is not ColorScheme.symbol_color:
+            return None
+        if any(symbol not in self.alphabet for symbol in symbols):
+            return None
+
+        colors: List[Optional[Color]] = [None] * len(symbols)
+        for rule in self.rules:
+            rule_colors = rule.symbol_colors(symbols)
+            if rule_colors is None:
+                return None
+            colors = [c if c is not None else rc for c, rc in zip(colors, rule_colors)]
+
+        return [c if c is not None else self.default_color for c in colors]
+
 
 class SymbolColor(ColorRule):
     """
@@ -126,6 +149,11 @@ class SymbolColor(ColorRule):
             return self.color
         return None
 
+    def symbol_colors(self, symbols: str) -> Optional[List[Optional[Color]]]:
+        if type(self).symbol_color is not SymbolColor.symbol_color:
+            return None
+        return [self.color if symbol in self.symbols else None for symbol in symbols]
+
 
 class IndexColor(ColorRule):
     """
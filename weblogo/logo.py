@@ -40,18 +40,33 @@
 """
 
 import os
-import sys
+import struct
+import zipfile
 from datetime import datetime
 from io import StringIO, TextIOWrapper
+from itertools import chain
 from math import log, sqrt
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+    Union,
+)
 from urllib.parse import urlparse, urlunparse
 from urllib.request import Request, urlopen
 
 import numpy as np
 
 # Avoid 'from numpy import *' since numpy has lots of names defined
-from numpy import any, array, asarray, float64, ones, zeros
+from numpy import any, array, asarray, float64, ones
+from numpy.typing import ArrayLike
 from scipy.stats import entropy
 
 from . import __version__, seq_io
@@ -66,14 +81,21 @@ from .colorscheme import (
     monochrome,
 )
 from .data import amino_acid_composition
-from .logomath import Dirichlet
+from .logomath import (
+    dirichlet_interval_relative_entropy,
+    dirichlet_mean_relative_entropy,
+)
+from .matrix import AlphabeticArray, Motif
 from .seq import (
+    Alignment,
     Alphabet,
+    ProfileAccumulator,
     SeqList,
     unambiguous_dna_alphabet,
     unambiguous_protein_alphabet,
     unambiguous_rna_alphabet,
 )
+from .timings import timed
 from .utils import ArgumentError, isfloat, stdrepr
 
 # Shorten development version string of the form weblogo-3.6.1.dev43+g64d9f12.d20190304
@@ -770,23 +792,29 @@ def _seq_names() -> List[str]:
     return fin_names
 
 
+@timed("read_seq_data")
 def read_seq_data(
-    fin: Union[StringIO, TextIOWrapper, None],
+    fin: Union[StringIO, TextIOWrapper, seq_io.RewindableStream, None],
     input_parser: Callable = seq_io.read,
     alphabet: Optional[Alphabet] = None,
     ignore_lower_case: bool = False,
     max_file_size: int = 0,
+    sample_alphabet: bool = False,
 ) -> SeqList:
     """Read sequence data from the input stream and return a seqs object.
 
     The environment variable WEBLOGO_MAX_FILE_SIZE overides the max_file_size argument.
     Used to limit the load on the WebLogo webserver.
+
+    If no alphabet is given, it is guessed from all of the sequences, or, if
+    sample_alphabet is true, from a random sample of them (See Alphabet.which).
     """
 
     max_file_size = int(os.environ.get("WEBLOGO_MAX_FILE_SIZE", max_file_size))
 
-    # If max_file_size is set, or if fin==stdin (which is non-seekable), we
-    # read the data and replace fin with a StringIO object.
+    # If max_file_size is set, we read the data and replace fin with a
+    # StringIO object. Non-seekable streams (such as stdin) are otherwise
+    # passed to the parser as is (see seq_io.read)
     assert fin is not None
 
     if max_file_size > 0:
@@ -796,10 +824,9 @@ def read_seq_data(
         if more_data != "":
             raise IOError("File exceeds maximum allowed size: %d bytes" % max_file_size)
         fin = StringIO(data)
-    elif fin == sys.stdin:
-        fin = StringIO(fin.read())
 
-    fin.seek(0)
+    if fin.seekable():
+        fin.seek(0)
     seqs = input_parser(fin)
 
     if seqs is None or len(seqs) == 0:
@@ -814,7 +841,7 @@ def read_seq_data(
     if alphabet:
         seqs.alphabet = Alphabet(str(alphabet))
     else:
-        seqs.alphabet = Alphabet.which(seqs)
+        seqs.alphabet = Alphabet.which(seqs, sample=sample_alphabet)
     return seqs
 
 
@@ -828,6 +855,8 @@ class LogoData:
         counts:   An array of character counts
         entropy:  The relative entropy of each column
         entropy_interval: entropy confidence interval
+        weight:   The relative number of symbols counted in each column
+        prior:    The prior counts added to each column, if any
     """
 
     def __init__(
@@ -838,6 +867,7 @@ class LogoData:
         entropy: Optional[np.ndarray] = None,
         entropy_interval: Optional[np.ndarray] = None,
         weight: Optional[np.ndarray] = None,
+        prior: Optional[np.ndarray] = None,
     ) -> None:
         """Creates a new LogoData object"""
         self.length = length
@@ -846,8 +876,10 @@ class LogoData:
         self.entropy = entropy
         self.entropy_interval = entropy_interval
         self.weight = weight
+        self.prior = prior
 
     @classmethod
+    @timed("LogoData.from_counts")
     def from_counts(
         cls,
         alphabet: Optional[Alphabet],
@@ -862,144 +894,363 @@ class LogoData:
 
         if prior is not None:
             prior = array(prior, float64)
+            if sum(prior) == 0.0:
+                prior = None
 
-        if prior is None or sum(prior) == 0.0:
-            R = log(A)
-            ent = zeros(seq_length, float64)
-            entropy_interval = None
-            for i in range(0, seq_length):
-                C = sum(counts[i])
-                # FIXME: fixup .moremath.entropy()?
-                if C == 0:
-                    ent[i] = 0.0
-                else:
-                    ent[i] = R - entropy(counts[i])
-        else:
-            ent = zeros(seq_length, float64)
-            entropy_interval = zeros((seq_length, 2), float64)
-
-            R = log(A)
-
-            for i in range(0, seq_length):
-                alpha = array(counts[i], float64)
-                alpha += prior
-
-                posterior = Dirichlet(alpha)
-                ent[i] = posterior.mean_relative_entropy(prior / sum(prior))
-                (
-                    entropy_interval[i][0],
-                    entropy_interval[i][1],
-                ) = posterior.interval_relative_entropy(prior / sum(prior), 0.95)
-
-        weight = array(np.sum(counts, axis=1), float)
-        max_weight = max(weight)
-        if max_weight == 0.0:
-            raise ValueError("No counts.")
-        weight /= max_weight
+        ent, entropy_interval = _column_entropy(counts, prior)
+        weight = _column_weight(counts)
 
-        return cls(seq_length, alphabet, counts, ent, entropy_interval, weight)
+        return cls(seq_length, alphabet, counts, ent, entropy_interval, weight, prior)
 
     @classmethod
-    def from_seqs(cls, seqs: SeqList, prior: Optional[np.ndarray] = None) -> "LogoData":
-        """Build a LogoData object from a SeqList, a list of sequences."""
+    def from_seqs(
+        cls,
+        seqs: Union[SeqList, Alignment],
+        prior: Optional[np.ndarray] = None,
+        jobs: int = 1,
+        weights: Optional[ArrayLike] = None,
+    ) -> "LogoData":
+        """Build a LogoData object from a SeqList, a list of sequences, or an
+        Alignment. Large alignments can be counted in parallel by several
+        worker processes (jobs), or one per CPU if jobs is 0. Optional
+        sequence weights give fractional counts (See weblogo.weights)."""
         # --- VALIDATE DATA ---
         # check that at least one sequence of length at least 1 long
         if len(seqs) == 0 or len(seqs[0]) == 0:
             raise ValueError("No sequence data found.")
 
-        # Check sequence lengths
+        # Check sequence lengths. (An Alignment is aligned by construction.)
         seq_length = len(seqs[0])
-        for i, s in enumerate(seqs):
-            # print(i, s, len(s))
-            # TODO: Redundant? Should be checked in SeqList?
-            if seq_length != len(s):
-                raise ArgumentError(
-                    "Sequence number %d differs in length from the previous sequences"
-                    % (i + 1),
-                    "sequences",
-                )
+        if not isinstance(seqs, Alignment):
+            for i, s in enumerate(seqs):
+                # TODO: Redundant? Should be checked in SeqList?
+                if seq_length != len(s):
+                    raise ArgumentError(
+                        "Sequence number %d differs in length from the previous "
+                        "sequences" % (i + 1),
+                        "sequences",
+                    )
 
         # FIXME: Check seqs.alphabet?
 
-        counts = seqs.profile()
+        counts = seqs.profile(jobs=jobs, weights=weights)
         return cls.from_counts(seqs.alphabet, counts, prior)
 
-    def __str__(self) -> str:
-        out = StringIO()
-        print("## LogoData", file=out)
-        print("# First column is position number, counting from zero", file=out)
-        print("# Subsequent columns are raw symbol counts", file=out)
-        print("# Entropy is mean entropy measured in nats.", file=out)
-        print("# Low and High are the 95% confidence limits.", file=out)
-        print("# Weight is the fraction of non-gap symbols in the column.", file=out)
-        print("#\t", file=out)
-        # Show column names
-        print("#", end="\t", file=out)
+    @classmethod
+    def from_iterseq(
+        cls,
+        seqs: Iterable[str],
+        alphabet: Optional[Alphabet] = None,
+        prior: Optional[np.ndarray] = None,
+    ) -> "LogoData":
+        """Build a LogoData object from an iteration over aligned sequences,
+        e.g. seq_io.fasta_io.iterseq(fin). Only the per-column counts are kept,
+        so memory use does not grow with the number of sequences.
 
-        # asserts checks that defaults that were initialized to None have been set
+        If no alphabet is given, then the most appropriate alphabet is
+        guessed from the data. (See Alphabet.which)
+        """
+        acc = ProfileAccumulator()
+        acc.update(seqs)
+
+        if acc.nseqs == 0 or acc.length == 0:
+            raise ValueError("No sequence data found.")
+
+        if alphabet is None:
+            alphabet = Alphabet.which(acc)
+
+        counts = acc.profile(alphabet)
+        return cls.from_counts(alphabet, counts, prior)
+
+    def update(
+        self,
+        seqs: Union[SeqList, Alignment],
+        jobs: int = 1,
+        weights: Optional[ArrayLike] = None,
+    ) -> None:
+        """Add the counts of more aligned sequences, e.g. the latest batch of a
+        growing alignment. The entropies of only those columns whose counts
+        change are recalculated. (See also from_seqs)
+        """
+        if len(seqs) == 0:
+            return
+        if len(seqs[0]) != self.length:
+            raise ValueError("Sequences differ in length from the logo data.")
         assert self.alphabet is not None
-        assert self.length is not None
+        counts = seqs.profile(self.alphabet, jobs=jobs, weights=weights)
+        self._add_counts(asarray(counts))
+
+    def merge(self, other: "LogoData") -> None:
+        """Add the counts of another LogoData, built from different sequences
+        of the same alignment. The entropies of only those columns whose
+        counts change are recalculated.
+        """
+        if other.length != self.length:
+            raise ValueError("Cannot merge logo data of different lengths.")
+        if list(other.alphabet or []) != list(self.alphabet or []):
+            raise ValueError("Cannot merge logo data of different alphabets.")
+        assert other.counts is not None
+        self._add_counts(asarray(other.counts))
+
+    def _add_counts(self, delta: np.ndarray) -> None:
         assert self.counts is not None
         assert self.entropy is not None
 
-        for a in self.alphabet:
-            print(a, end=" \t", file=out)
-        print("Entropy\tLow\tHigh\tWeight", file=out)
+        if isinstance(self.counts, AlphabeticArray):
+            self.counts.array = self.counts.array + delta
+        else:
+            self.counts = self.counts + delta
+        counts = asarray(self.counts)
+
+        changed = np.flatnonzero(np.any(delta != 0, axis=1))
+        if len(changed) == 0:
+            return
+
+        ent, entropy_interval = _column_entropy(counts[changed], self.prior)
+        # (Loaded logo data may be read only. See LogoData.load)
+        if not self.entropy.flags.writeable:
+            self.entropy = self.entropy.copy()
+        self.entropy[changed] = ent
+        if self.entropy_interval is not None and entropy_interval is not None:
+            if not self.entropy_interval.flags.writeable:
+                self.entropy_interval = self.entropy_interval.copy()
+            self.entropy_interval[changed] = entropy_interval
+
+        # Column weights are relative to the largest column, so may all change.
+        self.weight = _column_weight(counts)
+
+    def save(self, file: Union[str, "os.PathLike[str]", BinaryIO]) -> None:
+        """Save the logo data in a compact binary form, an uncompressed numpy
+        .npz archive, that can be read back with LogoData.load.
+        """
+        assert self.alphabet is not None
+        assert self.counts is not None
+        assert self.entropy is not None
 
-        # Write the data table
+        arrays = dict(
+            alphabet=np.array(str(self.alphabet)),
+            alternatives=np.array(self.alphabet._alternatives),
+            counts=asarray(self.counts),
+            entropy=asarray(self.entropy),
+        )
+        if self.entropy_interval is not None:
+            arrays["entropy_interval"] = asarray(self.entropy_interval)
+        if self.weight is not None:
+            arrays["weight"] = asarray(self.weight)
+        if self.prior is not None:
+            arrays["prior"] = asarray(self.prior)
+        np.savez(file, **arrays)
 
-        for i in range(self.length):
-            print(i + 1, end=" \t", file=out)
+    @classmethod
+    def load(
+        cls,
+        file: Union[str, "os.PathLike[str]", BinaryIO],
+        mmap_mode: Optional[str] = "r",
+    ) -> "LogoData":
+        """Load logo data saved by LogoData.save.
 
-            for c in self.counts[i]:
-                print(c, end=" \t", file=out)
-            print("%6.4f" % self.entropy[i], end=" \t", file=out)
-            if self.entropy_interval is not None:
-                print("%6.4f" % self.entropy_interval[i][0], end=" \t", file=out)
-                print("%6.4f" % self.entropy_interval[i][1], end=" \t", file=out)
-            else:
-                print("\t", "\t", end="", file=out)
-            if self.weight is not None:
-                print("%6.4f" % self.weight[i], end="", file=out)
-            print("", file=out)
-        print("# End LogoData", file=out)
+        If file is a filename, the arrays are memory mapped rather than read
+        into memory, either read only ("r") or copy on write ("c"), so that
+        changes to the arrays are not written back to the file. Use
+        mmap_mode=None to read the arrays instead.
 
+        Raises:
+            ValueError: For any other mmap_mode
+        """
+        if mmap_mode not in (None, "r", "c"):
+            raise ValueError("mmap_mode must be 'r', 'c' or None")
+        arrays = None
+        if mmap_mode is not None and isinstance(file, (str, os.PathLike)):
+            arrays = _npz_memmap(file, mmap_mode)
+        if arrays is None:
+            with np.load(file, allow_pickle=False) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+
+        from_, to = (str(a) for a in arrays["alternatives"])
+        alphabet = Alphabet(str(arrays["alphabet"]), tuple(zip(from_, to)))
+        counts = arrays["counts"]
+
+        return cls(
+            len(counts),
+            alphabet,
+            Motif(alphabet, counts),  # type: ignore
+            arrays["entropy"],
+            arrays.get("entropy_interval"),
+            arrays.get("weight"),
+            arrays.get("prior"),
+        )
+
+    def __str__(self) -> str:
+        out = StringIO()
+        self.write(out)
         return out.getvalue()
 
     def csv(self) -> str:
         """Return logodata as a csv formatted string"""
         out = StringIO()
+        self.write_csv(out)
+        return out.getvalue()
 
-        # asserts checks that defaults that were initialized to None have been set
-        assert self.alphabet is not None
-        assert self.length is not None
-        assert self.counts is not None
-        assert self.entropy is not None
+    def write(self, fout: TextIO) -> None:
+        """Write the logo data as a text table to a file, without building
+        the whole table in memory. (Same format as str(logodata))
+        """
+        fout.write("## LogoData\n")
+        fout.write("# First column is position number, counting from zero\n")
+        fout.write("# Subsequent columns are raw symbol counts\n")
+        fout.write("# Entropy is mean entropy measured in nats.\n")
+        fout.write("# Low and High are the 95% confidence limits.\n")
+        fout.write("# Weight is the fraction of non-gap symbols in the column.\n")
+        fout.write("#\t\n")
 
         # Show column names
-        print("Position", end=",", file=out)
+        assert self.alphabet is not None
+        fout.write("#\t" + "".join(a + " \t" for a in self.alphabet))
+        fout.write("Entropy\tLow\tHigh\tWeight\n")
 
-        for a in self.alphabet:
-            print(a, end=",", file=out)
-        print("Entropy,Low,High,Weight", file=out)
+        # Write the data table
+        for rows in self._table(" \t", "\t \t"):
+            fout.write(rows)
+        fout.write("# End LogoData\n")
+
+    def write_csv(self, fout: TextIO) -> None:
+        """Write the logo data as csv to a file, without building the whole
+        table in memory. (Same format as logodata.csv())
+        """
+        # Show column names
+        assert self.alphabet is not None
+        fout.write("Position," + "".join(a + "," for a in self.alphabet))
+        fout.write("Entropy,Low,High,Weight\n")
 
         # Write the data table
+        for rows in self._table(",", ", ,"):
+            fout.write(rows)
 
-        for i in range(self.length):
-            print(i + 1, end=",", file=out)
+    def _table(self, sep: str, no_interval: str) -> Iterator[str]:
+        # Generate the rows of the data table, in blocks of many rows. Each
+        # block is formatted with a single string format operation.
 
-            for c in self.counts[i]:
-                print(c, end=",", file=out)
-            print("%6.4f" % self.entropy[i], end=",", file=out)
-            if self.entropy_interval is not None:
-                print("%6.4f" % self.entropy_interval[i][0], end=",", file=out)
-                print("%6.4f" % self.entropy_interval[i][1], end=",", file=out)
+        # asserts checks that defaults that were initialized to None have been set
+        assert self.length is not None
+        assert self.counts is not None
+        assert self.entropy is not None
+
+        counts = asarray(self.counts)
+        # Integer counts are written as integers, fractional counts as str()
+        # writes the numpy scalar, i.e. the shortest repr for their dtype.
+        # (For float64 that is also the repr of the Python float.)
+        if counts.dtype.kind in "iu":
+            count_format = "%d"
+        elif counts.dtype == float64:
+            count_format = "%r"
+        else:
+            count_format = "%s"
+        row_format = "%d" + sep + (count_format + sep) * counts.shape[1]
+        row_format += "%6.4f" + sep
+        columns: List[np.ndarray] = [asarray(self.entropy, float64)]
+        if self.entropy_interval is not None:
+            row_format += "%6.4f" + sep + "%6.4f" + sep
+            interval = asarray(self.entropy_interval, float64)
+            columns.extend([interval[:, 0], interval[:, 1]])
+        else:
+            row_format += no_interval
+        if self.weight is not None:
+            row_format += "%6.4f"
+            columns.append(asarray(self.weight, float64))
+        row_format += "\n"
+
+        for start in range(0, self.length, _table_block_size):
+            end = min(start + _table_block_size, self.length)
+            block = counts[start:end]
+            if count_format == "%s":
+                block = block.astype(str)
+            rows = zip(
+                range(start + 1, end + 1),
+                *block.T.tolist(),
+                *(c[start:end].tolist() for c in columns),
+            )
+            yield (row_format * (end - start)) % tuple(chain.from_iterable(rows))
+
+
+# The number of rows of the text and csv tables formatted at a time
+_table_block_size = 4096
+
+
+def _npz_memmap(
+    filename: Union[str, "os.PathLike[str]"], mode: str
+) -> Optional[Dict[str, np.ndarray]]:
+    # Memory map each array of an uncompressed .npz archive, in place within
+    # the zip file. (numpy.load only maps plain .npy files.) Returns None if
+    # an array cannot be mapped, e.g. if the archive is compressed.
+    arrays: Dict[str, np.ndarray] = {}
+    with zipfile.ZipFile(filename) as zf, open(filename, "rb") as f:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                return None
+            if not info.filename.endswith(".npy"):
+                return None
+
+            # The array data follows the zip local file header, and then the
+            # npy header.
+            f.seek(info.header_offset)
+            header = f.read(30)
+            if header[:4] != b"PK\x03\x04":
+                return None
+            name_length, extra_length = struct.unpack("<HH", header[26:30])
+            f.seek(name_length + extra_length, os.SEEK_CUR)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
             else:
-                print(",", ",", end="", file=out)
-            if self.weight is not None:
-                print("%6.4f" % self.weight[i], end="", file=out)
-            print("", file=out)
-        return out.getvalue()
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            if dtype.hasobject:
+                return None
+
+            name = info.filename[:-4]
+            if np.prod(shape) == 0:
+                arrays[name] = np.zeros(shape, dtype)
+            else:
+                arrays[name] = np.memmap(  # type: ignore
+                    filename,
+                    dtype=dtype,
+                    mode=mode,
+                    offset=f.tell(),
+                    shape=shape,
+                    order="F" if fortran_order else "C",
+                )
+    return arrays
+
+
+def _column_entropy(
+    counts: np.ndarray, prior: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    # The relative entropy of each column of counts, and, if there is a prior,
+    # the 95% confidence interval of the entropy.
+    if prior is None:
+        R = log(counts.shape[1])
+        C = np.sum(counts, axis=1)
+        with np.errstate(invalid="ignore"):
+            ent = R - entropy(asarray(counts, float64), axis=1)
+        ent[C == 0] = 0.0
+        return ent, None
+
+    alpha = array(counts, float64)
+    alpha += prior
+    pvec = prior / sum(prior)
+
+    ent = dirichlet_mean_relative_entropy(alpha, pvec)
+    low, high = dirichlet_interval_relative_entropy(alpha, pvec, 0.95)
+    return ent, np.column_stack((low, high))
+
+
+def _column_weight(counts: np.ndarray) -> np.ndarray:
+    # The number of symbols counted in each column, relative to the largest
+    weight = array(np.sum(counts, axis=1), float)
+    max_weight = max(weight)
+    if max_weight == 0.0:
+        raise ValueError("No counts.")
+    weight /= max_weight
+    return weight
 
 
 def _from_URL_fileopen(target_url: str) -> StringIO:  # pragma: no cover
@@ -5,17 +5,25 @@ a representation of the logo. The main graphical formatter is eps_formatter. A m
 and data formats can decoded to strings, e.g. eps_as_string = eps_data.decode()
 """
 
+import hashlib
 import os
 import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from math import log
 from string import Template
-from subprocess import PIPE, Popen
-from typing import Optional
+from subprocess import PIPE, Popen, TimeoutExpired
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
 
 import importlib_resources
+import numpy as np
 
 from .color import Color
 from .logo import LogoData, LogoFormat
+from .timings import timed
 
 __all__ = [
     "pdf_formatter",
@@ -26,7 +34,11 @@ __all__ = [
     "eps_formatter",
     "formatters",
     "default_formatter",
+    "format_batch",
     "GhostscriptAPI",
+    "GhostscriptPool",
+    "LogoCache",
+    "set_ghostscript_pool",
 ]
 
 std_units = {
@@ -44,7 +56,7 @@ std_units = {
 def pdf_formatter(logodata: LogoData, logoformat: LogoFormat) -> bytes:
     """Generate a logo in PDF format."""
     eps = eps_formatter(logodata, logoformat).decode()
-    gs = GhostscriptAPI()
+    gs = _ghostscript()
     assert logoformat.logo_height is not None
     assert logoformat.logo_width is not None
     return gs.convert("pdf", eps, logoformat.logo_width, logoformat.logo_height)
@@ -52,7 +64,7 @@ def pdf_formatter(logodata: LogoData, logoformat: LogoFormat) -> bytes:
 
 def _bitmap_formatter(logodata: LogoData, logoformat: LogoFormat, device: str) -> bytes:
     eps = eps_formatter(logodata, logoformat).decode()
-    gs = GhostscriptAPI()
+    gs = _ghostscript()
     return gs.convert(
         device,
         eps,
@@ -67,36 +79,318 @@ def jpeg_formatter(logodata: LogoData, logoformat: LogoFormat) -> bytes:
     return _bitmap_formatter(logodata, logoformat, device="jpeg")
 
 
+@timed("svg_formatter")
 def svg_formatter(logodata: LogoData, logoformat: LogoFormat) -> bytes:
     """Generate a logo in Scalable Vector Graphics (SVG) format.
-    Requires the program 'pdf2svg' be installed.
+
+    The SVG is drawn directly from the logo data, following the same layout
+    as the EPS template. Symbols are drawn as text stretched to fill their
+    boxes, using the font's cap height, so the exact appearance depends on
+    the fonts available to the SVG viewer.
     """
-    pdf = pdf_formatter(logodata, logoformat)
+    f = logoformat
+    # assert checks for logoformat attributes that are intialized to None
+    assert f.logo_width is not None and f.logo_height is not None
+    assert f.yaxis_scale is not None
+    assert f.xaxis_label_height is not None
+    assert f.line_margin_right is not None
+    assert f.logo_start is not None
+    assert f.char_width is not None
+
+    width = f.logo_width
+    height = f.logo_height
+    yaxis_scale = f.yaxis_scale
+    char_width = f.char_width
+    points_per_unit = f.stack_height / yaxis_scale
+
+    def Y(y: float) -> float:
+        # PostScript coordinates run bottom up, SVG top down.
+        return height - y
+
+    strokes: List[str] = []  # Axes, tics and boxes
+    errorbars: List[str] = []
+    texts: List[str] = []
+
+    def line(path: List[str], x1: float, y1: float, x2: float, y2: float) -> None:
+        path.append("M%s %sL%s %s" % (_n(x1), _n(Y(y1)), _n(x2), _n(Y(y2))))
+
+    def text(
+        x: float,
+        y: float,
+        string: str,
+        font: str,
+        fontsize: float,
+        anchor: str = "start",
+        rotate: bool = False,
+    ) -> None:
+        if rotate:
+            position = 'transform="translate(%s %s) rotate(-90)"' % (_n(x), _n(Y(y)))
+        else:
+            position = 'x="%s" y="%s"' % (_n(x), _n(Y(y)))
+        texts.append(
+            '<text %s %s font-size="%s" text-anchor="%s">%s</text>'
+            % (position, _svg_font(font), _n(fontsize), anchor, escape(string))
+        )
 
-    command = shutil.which("pdf2svg")
-    if command is None:
-        raise EnvironmentError(
-            "Scalable Vector Graphics (SVG) format requires the program" "'pdf2svg'."
-        )  # pragma: no cover
+    # Titles, labels and fine print
+    if f.show_title:
+        y = height - f.title_fontsize - f.logo_margin + f.title_fontsize / 4
+        text(width / 2, y, f.logo_title, f.title_font, f.title_fontsize, "middle")
+
+    if f.logo_label:
+        y = height - f.title_fontsize - f.logo_margin + f.title_fontsize / 4
+        text(f.logo_margin, y, f.logo_label, f.title_font, f.title_fontsize)
+
+    if f.show_xaxis_label:
+        y = f.xaxis_label_height + f.logo_margin - f.fontsize
+        text(width / 2, y, f.xaxis_label, f.text_font, f.fontsize, "middle")
+
+    if f.show_fineprint:
+        x = width - f.logo_margin - f.line_margin_right
+        text(x, f.logo_margin, f.fineprint, f.text_font, f.small_fontsize, "end")
+
+    ends = {"d": ("5\u2032", "3\u2032"), "p": ("N", "C")}
+
+    def start_line(line_index: int) -> Tuple[float, float]:
+        # Lower left corner of the stacks of this line
+        assert f.line_margin_left is not None
+        assert f.title_height is not None and f.line_height is not None
+        assert f.line_margin_bottom is not None
+        x0 = f.logo_margin + f.line_margin_left
+        y0 = (
+            height
+            - f.logo_margin
+            - f.title_height
+            - f.line_height * (line_index + 1)
+            + f.line_margin_bottom
+        )
 
-    import tempfile
+        if f.show_yaxis:
+            bar = x0 - f.stack_margin
+            line(strokes, bar - f.tic_length, y0, bar, y0)
+            line(strokes, bar, y0, bar, y0 + f.stack_height)
+
+            if f.yaxis_tic_interval > 0:
+                half_height = _CAP_HEIGHT * f.number_fontsize / 2
+                for tic in _tics(f.yaxis_tic_interval, yaxis_scale):
+                    y = y0 + tic * points_per_unit
+                    line(strokes, bar - f.tic_length, y, bar, y)
+                    text(
+                        bar - f.tic_length - f.stack_margin,
+                        y - half_height,
+                        _ps_number(tic),
+                        f.text_font,
+                        f.number_fontsize,
+                        "end",
+                    )
+
+            if f.yaxis_minor_tic_interval:
+                for tic in _tics(f.yaxis_minor_tic_interval, yaxis_scale):
+                    y = y0 + tic * points_per_unit
+                    line(strokes, bar, y, bar - f.tic_length / 2, y)
+
+            if f.yaxis_label and f.yaxis_tic_interval > 0:
+                widest = int(yaxis_scale / f.yaxis_tic_interval) * float(
+                    f.yaxis_tic_interval
+                )
+                x = x0 - _text_width(_ps_number(widest), f.fontsize)
+                x -= f.tic_length * 1.25
+                y = y0 + f.stack_height / 2
+                text(x, y, f.yaxis_label, f.text_font, f.fontsize, "middle", True)
+
+        if f.show_xaxis and f.show_ends and f.end_type in ends:
+            x = x0 - f.fontsize
+            y = y0 - f.fontsize * 1.25
+            text(x, y, ends[f.end_type][0], f.text_font, f.fontsize)
+
+        return x0, y0
+
+    def end_line(x: float, y0: float) -> None:
+        if f.show_xaxis and f.show_ends and f.end_type in ends:
+            x += f.fontsize * 0.25
+            y = y0 - f.fontsize * 1.25
+            text(x, y, ends[f.end_type][1], f.text_font, f.fontsize)
+
+    glyphs: List[str] = []
+    seq_from = f.logo_start - f.first_index
+    x = y0 = 0.0
+
+    for seq_index, symbols, fraction_width, errorbar in _logo_stacks(
+        logodata, logoformat
+    ):
+        stack_index = seq_index - seq_from
+        if stack_index % f.stacks_per_line == 0:
+            if stack_index != 0:
+                end_line(x, y0)
+            x, y0 = start_line(stack_index // f.stacks_per_line)
+
+        # x-axis tic and number
+        if f.show_xaxis:
+            number = f.annotate[seq_index]
+            middle = x + f.stack_width / 2
+            line(strokes, x, y0, x + f.stack_width, y0)
+            tic = f.tic_length / 2 if number else f.tic_length / 4
+            line(strokes, middle, y0, middle, y0 - tic)
+
+            if number and f.rotate_numbers:
+                text(
+                    middle + _CAP_HEIGHT * f.number_fontsize / 2,
+                    y0 - f.tic_length / 2 - f.stack_margin,
+                    number,
+                    f.text_font,
+                    f.number_fontsize,
+                    "end",
+                    True,
+                )
+            elif number:
+                y = y0 - f.tic_length / 2 - f.number_fontsize
+                text(middle, y, number, f.text_font, f.number_fontsize, "middle")
+
+        # Symbols, from the bottom of the stack up
+        y = y0
+        for symbol, interval, color in symbols:
+            char_height = interval * points_per_unit - f.stack_margin
+            if char_height > 0.01:
+                if f.show_boxes:
+                    strokes.append(
+                        "M%s %sh%sv%sh%sz"
+                        % (
+                            _n(x),
+                            _n(Y(y)),
+                            _n(f.stack_width),
+                            _n(-(char_height + f.stack_margin)),
+                            _n(-f.stack_width),
+                        )
+                    )
+
+                gw = fraction_width * char_width
+                gh = char_height
+                gx = x + f.stack_margin + (1 - fraction_width) * char_width / 2
+                gy = y + f.stack_margin
+                if f.show_boxes:
+                    gx += gw * (1 - f.shrink_fraction) / 2
+                    gy += gh * (1 - f.shrink_fraction) / 2
+                    gw *= f.shrink_fraction
+                    gh *= f.shrink_fraction
+
+                # Deal with the lack of bars on the letter 'I' in Arial and
+                # Helvetica by replacing with 'I' from Courier.
+                font = "Courier" if symbol == "I" else f.logo_font
+                glyphs.append(
+                    '<text x="%s" y="%s" %s font-size="%s" textLength="%s" '
+                    'lengthAdjust="spacingAndGlyphs" fill="%s">%s</text>'
+                    % (
+                        _n(gx),
+                        _n(Y(gy)),
+                        _svg_font(font),
+                        _n(gh / _CAP_HEIGHT),
+                        _n(gw),
+                        _svg_color(color),
+                        escape(symbol),
+                    )
+                )
+            y += interval * points_per_unit
+
+        if errorbar is not None and f.show_errorbars:
+            down, up = errorbar
+            middle = x + f.stack_width / 2
+            half_width = char_width * f.errorbar_width_fraction / 2
+            for end, length in (
+                (y - down * points_per_unit, down),
+                (y + up * points_per_unit, -up),
+            ):
+                line(errorbars, middle - half_width, end, middle + half_width, end)
+                length *= points_per_unit * f.errorbar_fraction
+                line(errorbars, middle, end, middle, end + length)
+
+        x += f.stack_width
+
+    end_line(x, y0)
+
+    out = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="no"?>',
+        '<svg xmlns="http://www.w3.org/2000/svg" version="1.1" '
+        'width="%spt" height="%spt" viewBox="0 0 %s %s">'
+        % (width, height, width, height),
+        "<title>Sequence Logo: %s</title>" % escape(f.logo_title),
+        "<desc>%s</desc>" % escape(f.creator_text),
+        '<g fill="%s">' % _svg_color(f.default_color),
+    ]
+    out.extend(glyphs)
+    out.extend(texts)
+    out.append("</g>")
+    if strokes:
+        out.append(
+            '<path fill="none" stroke="black" stroke-width="%s" d="%s"/>'
+            % (_n(f.stroke_width), "".join(strokes))
+        )
+    if errorbars:
+        gray = Color(f.errorbar_gray, f.errorbar_gray, f.errorbar_gray)
+        out.append(
+            '<path fill="none" stroke="%s" stroke-width="%s" d="%s"/>'
+            % (_svg_color(gray), _n(f.stroke_width), "".join(errorbars))
+        )
+    out.append("</svg>")
+    out.append("")
+
+    return "\n".join(out).encode()
 
-    fpdfi, fname_pdf = tempfile.mkstemp(suffix=".pdf")
-    fsvgi, fname_svg = tempfile.mkstemp(suffix=".svg")
-    try:
-        fpdf2 = open(fname_pdf, "w")
-        fpdf2.buffer.write(pdf)
-        fpdf2.seek(0)
 
-        args = [command, fname_pdf, fname_svg]
-        p = Popen(args)
-        (out, err) = p.communicate()
+# Font metrics used to lay out SVG text. Symbols are scaled so that the cap
+# height fills the symbol box. Widths are only needed to place the y-axis
+# label, and are approximated by Arial's advance widths.
+_CAP_HEIGHT = 0.716
+_CHAR_WIDTHS = {".": 0.278, "-": 0.333, " ": 0.278}
 
-        fsvg = open(fname_svg)
-        return fsvg.read().encode()
-    finally:
-        os.remove(fname_svg)
-        os.remove(fname_pdf)
+
+def _text_width(string: str, fontsize: float) -> float:
+    return sum(_CHAR_WIDTHS.get(c, 0.556) for c in string) * fontsize
+
+
+def _tics(interval: float, limit: float) -> List[float]:
+    # Equivalent to the postscript loop '0 interval limit {...} for'
+    count = int(limit / interval + 1e-9)
+    return [i * interval for i in range(count + 1)]
+
+
+def _ps_number(value: float) -> str:
+    # Format a real number as postscript's 'cvs' would, e.g. 1.0, 0.5
+    string = "%g" % float(value)
+    if "." not in string and "e" not in string:
+        string += ".0"
+    return string
+
+
+def _n(value: float) -> str:
+    # Compact format for SVG coordinates
+    string = "%.3f" % value
+    string = string.rstrip("0").rstrip(".")
+    return "0" if string == "-0" else string
+
+
+def _svg_color(color: Color) -> str:
+    rgb = (color.red, color.green, color.blue)
+    return "#%02x%02x%02x" % tuple(int(round(c * 255)) for c in rgb)
+
+
+def _svg_font(name: str) -> str:
+    """Convert a postscript font name, e.g. 'Arial-BoldMT', into SVG font
+    attributes."""
+    family, _, style = name.partition("-")
+    if family.endswith("MT"):
+        family = family[:-2]
+    generic = "sans-serif"
+    if family in ("Courier", "CourierNew"):
+        generic = "monospace"
+    elif family.startswith("Times"):
+        generic = "serif"
+
+    attributes = 'font-family="%s, %s"' % (family, generic)
+    if "Bold" in style:
+        attributes += ' font-weight="bold"'
+    if "Italic" in style or "Oblique" in style:
+        attributes += ' font-style="italic"'
+    return attributes
 
 
 # def png_formatter(logodata: LogoData, logoformat: LogoFormat) -> bytes:
@@ -120,6 +414,7 @@ def csv_formatter(logodata: LogoData, logoformat: LogoFormat) -> bytes:
     return logodata.csv().encode()
 
 
+@timed("eps_formatter")
 def eps_formatter(logodata: LogoData, logoformat: LogoFormat) -> bytes:
     """Generate a logo in Encapsulated Postscript (EPS)"""
     substitutions = {}
@@ -187,28 +482,26 @@ def eps_formatter(logodata: LogoData, logoformat: LogoFormat) -> bytes:
     def format_color(color: Color) -> str:  # (no fold)
         return " ".join(("[", str(color.red), str(color.green), str(color.blue), "]"))
 
+    # The end of each ShowSymbol line, by symbol and color. The colors are
+    # kept, so that their ids cannot be reused.
+    symbol_strings: Dict[Tuple[str, int], str] = {}
+    colors = []
+
     substitutions["default_color"] = format_color(logoformat.default_color)
 
     data = []
 
-    # Unit conversion. 'None' for probability units
-    conv_factor = std_units[logoformat.unit_name]
-
     data.append("StartLine")
 
     # assert checks for logoformat attributes that are intialized to None
     assert logoformat.logo_start is not None
     assert logoformat.first_index is not None
-    assert logoformat.logo_end is not None
 
     seq_from = logoformat.logo_start - logoformat.first_index
-    seq_to = logoformat.logo_end - logoformat.first_index + 1
 
-    # seq_index : zero based index into sequence data
-    # logo_index : User visible coordinate, first_index based
-    # stack_index : zero based index of visible stacks
-    for seq_index in range(seq_from, seq_to):
-        # logo_index = seq_index + logoformat.first_index
+    for seq_index, symbols, fraction_width, errorbar in _logo_stacks(
+        logodata, logoformat
+    ):
         stack_index = seq_index - seq_from
 
         if stack_index != 0 and (stack_index % logoformat.stacks_per_line) == 0:
@@ -219,79 +512,152 @@ def eps_formatter(logodata: LogoData, logoformat: LogoFormat) -> bytes:
 
         data.append("(%s) StartStack" % logoformat.annotate[seq_index])
 
-        if conv_factor:
-            assert logodata.entropy is not None
-            assert logoformat.unit_name is not None
-
-            stack_height = logodata.entropy[seq_index] * std_units[logoformat.unit_name]
-        else:
-            stack_height = 1.0  # probability   # pragma: no cover
-
-        # Sort by frequency. If equal frequency then reverse alphabetic
-        # (So sort reverse alphabetic first, then frequency)
-        # TODO: doublecheck this actual works
-        assert logodata.alphabet is not None
-        assert logodata.counts is not None
-        s = list(zip(logodata.counts[seq_index], logodata.alphabet))
-        s.sort(key=lambda x: x[1])
-        s.reverse()
-        s.sort(key=lambda x: x[0])
-
-        if not logoformat.reverse_stacks:
-            s.reverse()  # pragma: no cover
-
-        C = float(sum(logodata.counts[seq_index]))
-        if C > 0.0:
-            fraction_width = 1.0
-
-            assert logoformat.scale_width is not None
-            if logoformat.scale_width:
-                assert logodata.weight is not None
-                fraction_width = float(logodata.weight[seq_index])
-
-            for rank, c in enumerate(s):
-                assert logoformat.color_scheme is not None
-                color = logoformat.color_scheme.symbol_color(seq_index, c[1], rank)
-
-                data.append(
-                    " %f %f %s (%s) ShowSymbol"
-                    % (
-                        fraction_width,
-                        c[0] * stack_height / C,
-                        format_color(color),
-                        c[1],
-                    )
-                )
-
-        # Draw error bar on top of logo. Replaced by DrawErrorbarFirst above.
-        if logodata.entropy_interval is not None and conv_factor and C > 0.0:
-            low, high = logodata.entropy_interval[seq_index]
-
-            assert logodata.entropy is not None
-            center = logodata.entropy[seq_index]
-            low *= conv_factor
-            high *= conv_factor
-            center *= conv_factor
-
-            if high > logoformat.yaxis_scale:
-                high = logoformat.yaxis_scale  # pragma: no cover
+        width = "%f" % fraction_width
+        for symbol, height, color in symbols:
+            key = (symbol, id(color))
+            symbol_string = symbol_strings.get(key)
+            if symbol_string is None:
+                symbol_string = "%s (%s) ShowSymbol" % (format_color(color), symbol)
+                symbol_strings[key] = symbol_string
+                colors.append(color)
+            data.append(" %s %f %s" % (width, height, symbol_string))
 
-            down = center - low
-            up = high - center
-            data.append(" %f %f DrawErrorbar" % (down, up))
+        if errorbar is not None:
+            data.append(" %f %f DrawErrorbar" % errorbar)
 
         data.append("EndStack")
         data.append("")
 
     data.append("EndLine")
-    substitutions["logo_data"] = "\n".join(data)
 
+    header, prolog, trailer = _eps_template()
+    return b"".join(
+        (
+            header.substitute(substitutions).encode(),
+            prolog,
+            "\n".join(data).encode(),
+            trailer,
+        )
+    )
+
+
+@lru_cache(maxsize=None)
+def _eps_template() -> Tuple[Template, bytes, bytes]:
+    """Load and split the EPS template into the per-logo header, the static
+    postscript prolog, and the trailer that follows the logo data.
+
+    Returns:
+        (header, prolog, trailer) -- the header is a Template of the logo
+        parameters, the prolog and trailer are fixed.
+    """
     ref = importlib_resources.files("weblogo").joinpath("template.eps")
     template = ref.read_bytes().decode()
 
-    logo = Template(template).substitute(substitutions)
+    start, end = template.split("${logo_data}")
+    # The prolog starts after the last line with a placeholder
+    split = start.index("\n", start.rindex("${")) + 1
+    header, prolog = start[:split], start[split:]
+
+    # Unescape any '$$', and check that all placeholders are in the header
+    prolog = Template(prolog).substitute()
+    trailer = Template(end).substitute()
+    return Template(header), prolog.encode(), trailer.encode()
+
+
+def _logo_stacks(
+    logodata: LogoData, logoformat: LogoFormat
+) -> Iterator[
+    Tuple[int, List[Tuple[str, float, Color]], float, Optional[Tuple[float, float]]]
+]:
+    """Generate the contents of each visible stack of the logo, in order.
+
+    Yields:
+        (seq_index, symbols, fraction_width, errorbar) -- seq_index is the zero
+        based index into the sequence data. symbols is a list of
+        (symbol, height, color), drawn from the bottom of the stack up, with
+        heights in the logo's units. fraction_width is the visible fraction of
+        the stack width. errorbar is either None, or the extent of the error
+        bar (down, up) about the top of the stack.
+    """
+    # The layout of all the stacks is calculated at once, as arrays indexed by
+    # (stack, symbol).
 
-    return logo.encode()
+    # Unit conversion. 'None' for probability units
+    conv_factor = std_units[logoformat.unit_name]
+
+    # assert checks for logoformat attributes that are intialized to None
+    assert logoformat.logo_start is not None
+    assert logoformat.first_index is not None
+    assert logoformat.logo_end is not None
+    assert logoformat.color_scheme is not None
+    assert logodata.alphabet is not None
+    assert logodata.counts is not None
+
+    seq_from = logoformat.logo_start - logoformat.first_index
+    seq_to = logoformat.logo_end - logoformat.first_index + 1
+
+    letters = str(logodata.alphabet)
+    counts = np.asarray(logodata.counts)[seq_from:seq_to]
+    stacks, K = counts.shape
+
+    # Column totals, summed in order as the builtin sum() would
+    totals = np.zeros(stacks)
+    if K:
+        totals = np.cumsum(counts, axis=1, dtype=np.float64)[:, -1]
+    visible = (totals > 0.0).tolist()
+
+    if conv_factor:
+        assert logodata.entropy is not None
+        stack_heights = logodata.entropy[seq_from:seq_to] * conv_factor
+    else:
+        stack_heights = np.ones(stacks)  # probability
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        heights = counts * stack_heights[:, np.newaxis] / totals[:, np.newaxis]
+
+    # Sort by frequency. If equal frequency then reverse alphabetic
+    codes = np.array([ord(c) for c in letters], dtype=np.int64)
+    order = np.lexsort((np.broadcast_to(-codes, counts.shape), counts), axis=-1)
+    if not logoformat.reverse_stacks:
+        order = order[:, ::-1]  # pragma: no cover
+    heights = np.take_along_axis(heights, order, axis=1)
+
+    fraction_widths = [1.0] * stacks
+    if logoformat.scale_width:
+        assert logodata.weight is not None
+        fraction_widths = logodata.weight[seq_from:seq_to].tolist()
+
+    errorbars: List[Optional[Tuple[float, float]]] = [None] * stacks
+    if logodata.entropy_interval is not None and conv_factor:
+        assert logodata.entropy is not None
+        interval = logodata.entropy_interval[seq_from:seq_to]
+        low = interval[:, 0] * conv_factor
+        high = np.minimum(interval[:, 1] * conv_factor, logoformat.yaxis_scale)
+        center = logodata.entropy[seq_from:seq_to] * conv_factor
+        errorbars = list(zip((center - low).tolist(), (high - center).tolist()))
+
+    # Colors are looked up once per symbol, unless the color scheme depends
+    # upon position or rank.
+    color_scheme = logoformat.color_scheme
+    colors = color_scheme.symbol_colors(letters)
+
+    for stack, (symbol_order, symbol_heights) in enumerate(
+        zip(order.tolist(), heights.tolist())
+    ):
+        seq_index = seq_from + stack
+        if not visible[stack]:
+            yield seq_index, [], 1.0, None
+            continue
+
+        symbols = []
+        for rank, (j, height) in enumerate(zip(symbol_order, symbol_heights)):
+            if colors is not None:
+                color = colors[j]
+            else:
+                color = color_scheme.symbol_color(seq_index, letters[j], rank)
+            symbols.append((letters[j], height, color))
+
+        yield seq_index, symbols, fraction_widths[stack], errorbars[stack]
 
 
 formatters = {
@@ -311,6 +677,47 @@ default_formatter = eps_formatter
 """The default logo formatter."""
 
 
+def format_batch(
+    logos: Sequence[Tuple[LogoData, LogoFormat]], format: str = "eps"
+) -> List[bytes]:
+    """Format many logos at once.
+
+    PDF and bitmap logos are converted by a single Ghostscript process (or
+    the pool set with set_ghostscript_pool()), rather than by a new process
+    for every logo. 'png_print' logos are converted at 600 DPI, without
+    changing the resolution of the given logo formats.
+
+    Args:
+        logos: A sequence of (logodata, logoformat) pairs
+        format: An output format name, one of the keys of 'formatters'
+    Returns:
+        The formatted logos, in order
+    Raises:
+        ValueError: For an unrecognized format.
+    """
+    if format not in formatters:
+        raise ValueError("Unknown logo format: '%s'" % format)
+
+    device = _batch_devices.get(format)
+    if device is None:
+        formatter = formatters[format]
+        return [formatter(logodata, logoformat) for logodata, logoformat in logos]
+
+    jobs = []
+    for logodata, logoformat in logos:
+        eps = eps_formatter(logodata, logoformat).decode()
+        resolution = 600 if format == "png_print" else logoformat.resolution
+        jobs.append((eps, logoformat.logo_width, logoformat.logo_height, resolution))
+
+    gs = _ghostscript()
+    return gs.convert_batch(device, jobs)
+
+
+# Formats created by converting postscript with Ghostscript, and the
+# corresponding GhostscriptAPI formats
+_batch_devices = {"pdf": "pdf", "png": "png", "png_print": "png", "jpeg": "jpeg"}
+
+
 class GhostscriptAPI:
     """Interface to the command line program Ghostscript ('gs')"""
 
@@ -350,6 +757,7 @@ class GhostscriptAPI:
             )  # pragma: no cover
         return out.strip()
 
+    @timed("GhostscriptAPI.convert")
     def convert(
         self,
         format: str,
@@ -365,10 +773,8 @@ class GhostscriptAPI:
         Raises:
             ValueError: For an unrecognized format.
         """
-        device_map = {"png": "png16m", "pdf": "pdfwrite", "jpeg": "jpeg"}
-
         try:
-            device = device_map[format]
+            device = _gs_devices[format]
         except KeyError:  # pragma: no cover
             raise ValueError("Unsupported format.")
 
@@ -417,5 +823,597 @@ class GhostscriptAPI:
 
         return out
 
+    @timed("GhostscriptAPI.convert_batch")
+    def convert_batch(
+        self,
+        format: str,
+        jobs: Sequence[Tuple[str, Optional[int], Optional[int], int]],
+        timeout: float = 60.0,
+    ) -> List[bytes]:
+        """Convert many postscript documents with a single Ghostscript process
+
+        Args:
+            format: 'png', 'pdf', or 'jpeg'
+            jobs: A sequence of (postscript, width, height, resolution) tuples,
+                the arguments to convert() for each document
+            timeout: Maximum time in seconds to convert any one document
+        Returns:
+            The converted documents, in order
+        Raises:
+            ValueError: For an unrecognized format.
+            RuntimeError: If any conversion fails.
+        """
+        if format not in _gs_devices:
+            raise ValueError("Unsupported format.")
+        if not jobs:
+            return []
+
+        worker = _GhostscriptWorker(self.command, format, timeout)
+        try:
+            return [worker.convert(*job) for job in jobs]
+        finally:
+            worker.close()
+
 
 # end class Ghostscript
+
+
+class GhostscriptPool:
+    """A pool of long running Ghostscript interpreters.
+
+    Starting Ghostscript is the bulk of the cost of converting a small logo,
+    so a pool keeps up to `size` interpreters running and feeds each one
+    conversion jobs over its standard input. Each interpreter is dedicated to
+    one output format, and idle interpreters are recycled for other formats
+    as needed. The pool has the same convert() method as GhostscriptAPI, and
+    can be used by the formatters with set_ghostscript_pool().
+
+    Interpreters that crash, hang for longer than `timeout` seconds, or
+    have run `max_jobs` conversions are replaced. Requires Ghostscript 9.50
+    or later.
+
+    Usage:
+        with GhostscriptPool(size=4) as pool:
+            set_ghostscript_pool(pool)
+            png = formatters["png"](logodata, logoformat)
+    """
+
+    formats = GhostscriptAPI.formats
+
+    def __init__(
+        self,
+        size: int = 2,
+        path: Optional[os.PathLike] = None,
+        timeout: float = 60.0,
+        max_jobs: int = 1000,
+    ) -> None:
+        """
+        Raises:
+            ValueError: If the pool size is not positive
+            EnvironmentError: If cannot find Ghostscript executable on
+                path
+        """
+        if size < 1:
+            raise ValueError("Ghostscript pool size must be positive.")
+        self.command = GhostscriptAPI(path).command
+        self.size = size
+        self.timeout = timeout
+        self.max_jobs = max_jobs
+
+        self._lock = threading.Condition()
+        self._idle: List[_GhostscriptWorker] = []
+        self._busy = 0
+        self._closed = False
+
+    def __enter__(self) -> "GhostscriptPool":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    @timed("GhostscriptPool.convert")
+    def convert(
+        self,
+        format: str,
+        postscript: str,
+        width: Optional[int],
+        height: Optional[int],
+        resolution: int = 300,
+    ) -> bytes:
+        """Convert a string of postscript into a different graphical format
+
+        Supported formats are 'png', 'pdf', and 'jpeg'.
+
+        Raises:
+            ValueError: For an unrecognized format.
+            RuntimeError: If the conversion fails.
+        """
+        if format not in _gs_devices:
+            raise ValueError("Unsupported format.")
+
+        worker = self._acquire(format)
+        try:
+            return worker.convert(postscript, width, height, resolution)
+        finally:
+            # Invalid postscript leaves the interpreter usable, but a crashed
+            # or timed out interpreter is replaced.
+            if worker.alive() and worker.jobs < self.max_jobs:
+                self._release(worker)
+            else:
+                worker.close()
+                self._release(None)
+
+    @timed("GhostscriptPool.convert_batch")
+    def convert_batch(
+        self,
+        format: str,
+        jobs: Sequence[Tuple[str, Optional[int], Optional[int], int]],
+    ) -> List[bytes]:
+        """Convert many postscript documents. See GhostscriptAPI.convert_batch()"""
+        return [self.convert(format, *job) for job in jobs]
+
+    def check(self) -> int:
+        """Ping each idle interpreter, and discard any that fail to respond.
+
+        Returns:
+            The number of healthy idle interpreters
+        """
+        with self._lock:
+            workers, self._idle = self._idle, []
+            self._busy += len(workers)
+
+        for worker in workers:
+            if worker.ping():
+                self._release(worker)
+            else:
+                worker.close()
+                self._release(None)
+
+        with self._lock:
+            return len(self._idle)
+
+    def close(self) -> None:
+        """Shut down all idle interpreters. Busy interpreters are shut down
+        as their current job finishes."""
+        with self._lock:
+            self._closed = True
+            workers, self._idle = self._idle, []
+            self._lock.notify_all()
+        for worker in workers:
+            worker.close()
+
+    def _acquire(self, format: str) -> "_GhostscriptWorker":
+        recycled = None
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Ghostscript pool is closed.")
+                for worker in self._idle:
+                    if worker.format == format:
+                        self._idle.remove(worker)
+                        self._busy += 1
+                        return worker
+                if self._busy + len(self._idle) < self.size:
+                    break
+                if self._idle:
+                    # Recycle an interpreter dedicated to another format
+                    recycled = self._idle.pop(0)
+                    break
+                self._lock.wait()
+            self._busy += 1
+
+        if recycled is not None:
+            recycled.close()
+        try:
+            return _GhostscriptWorker(self.command, format, self.timeout)
+        except BaseException:
+            self._release(None)
+            raise
+
+    def _release(self, worker: Optional["_GhostscriptWorker"]) -> None:
+        with self._lock:
+            self._busy -= 1
+            if worker is not None:
+                if self._closed:
+                    worker.close()
+                else:
+                    self._idle.append(worker)
+            self._lock.notify()
+
+
+# end class GhostscriptPool
+
+
+_gs_devices = {"png": "png16m", "pdf": "pdfwrite", "jpeg": "jpeg"}
+
+_gs_done = b"%%WebLogo-Done%%"
+_gs_failed = b"%%WebLogo-Failed%%"
+
+# Each job runs the logo from a file inside save/restore, so that an error or
+# stray definitions cannot leak into later jobs. Before the restore, the
+# operand and dictionary stacks are cleared, leaving only the error flag.
+# Switching the OutputFile back to the idle file closes the job's output file,
+# which completes PDF output.
+_gs_job = Template("""
+userdict /WebLogoJob save put
+{
+  << /OutputFile ($output) /PageSize [$width $height] $device_params >>
+  setpagedevice
+  ($input) (r) file cvx exec
+  showpage
+} stopped { 1 } { 0 } ifelse
+count 1 roll count 1 sub { pop } repeat
+cleardictstack
+userdict /WebLogoJob get restore
+<< /OutputFile ($idle) >> setpagedevice
+0 eq { (\\n%s\\n) } { (\\n%s\\n) } ifelse print flush
+""" % (_gs_done.decode(), _gs_failed.decode()))
+
+
+def _ps_string(string: str) -> str:
+    # Escape a string for use inside a postscript string literal
+    return string.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+class _GhostscriptWorker:
+    """A single long running Ghostscript interpreter, for GhostscriptPool"""
+
+    def __init__(self, command: str, format: str, timeout: float) -> None:
+        self.format = format
+        self.timeout = timeout
+        self.jobs = 0
+
+        self.tempdir = tempfile.TemporaryDirectory(prefix="weblogo-gs-")
+        directory = self.tempdir.name
+        self.input = os.path.join(directory, "logo.eps")
+        self.output = os.path.join(directory, "logo." + format)
+        self.idle = os.path.join(directory, "idle")
+        self.log = open(os.path.join(directory, "gs.log"), "w+b")
+
+        args = [
+            command,
+            "-sDEVICE=%s" % _gs_devices[format],
+            "-dPDFSETTINGS=/printer",
+            "-q",
+            "-dNOPROMPT",
+            "-dNOPAUSE",
+            "-dNOEPS",  # Logos are run as plain postscript, see _gs_job
+            "-dColorConversionStrategy=/LeaveColorUnchanged",
+            "-sOutputFile=%s" % self.idle,
+            "-dSAFER",
+            "--permit-file-all=%s%s" % (directory, os.sep),
+            "-",
+        ]
+        try:
+            self.process = Popen(args, stdin=PIPE, stdout=PIPE, stderr=self.log)
+        except OSError:  # pragma: no cover
+            self.close()
+            raise RuntimeError("Cannot communicate with ghostscript.")
+
+        if not self.ping():
+            message = self._error("Ghostscript failed to start.")
+            self.close()
+            raise RuntimeError(message)
+
+    def convert(
+        self,
+        postscript: str,
+        width: Optional[int],
+        height: Optional[int],
+        resolution: int,
+    ) -> bytes:
+        self.jobs += 1
+        device_params = ""
+        if self.format != "pdf":
+            device_params = "/HWResolution [%s %s]" % (resolution, resolution)
+            if resolution < 300:  # Antialias, as GhostscriptAPI.convert()
+                device_params += (
+                    " /GraphicsAlphaBits 4 /TextAlphaBits 4 /AlignToPixels 0"
+                )
+            else:
+                device_params += " /GraphicsAlphaBits 1 /TextAlphaBits 1"
+
+        with open(self.input, "wb") as f:
+            f.write(postscript.encode())
+
+        job = _gs_job.substitute(
+            output=_ps_string(self.output),
+            input=_ps_string(self.input),
+            idle=_ps_string(self.idle),
+            width=width,
+            height=height,
+            device_params=device_params,
+        )
+
+        if self._send(job.encode()) != _gs_done:
+            raise RuntimeError(
+                self._error(
+                    "Unrecoverable error : Ghostscript conversion failed "
+                    "(Invalid postscript?)."
+                )
+            )
+
+        with open(self.output, "rb") as f:
+            return f.read()
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def ping(self) -> bool:
+        """Returns: True if the interpreter is alive and responsive"""
+        try:
+            return self._send(b"(\\n%s\\n) print flush\n" % _gs_done) == _gs_done
+        except RuntimeError:
+            return False
+
+    def close(self) -> None:
+        process = getattr(self, "process", None)
+        if process is not None and process.poll() is None:
+            try:
+                process.stdin.write(b"quit\n")
+                process.stdin.close()
+                process.wait(timeout=5)
+            except (OSError, ValueError, TimeoutExpired):
+                process.kill()
+                process.wait()
+        self.log.close()
+        self.tempdir.cleanup()
+
+    def _send(self, job: bytes) -> bytes:
+        # Send a job, and wait for its completion marker
+        process = self.process
+        assert process.stdin is not None and process.stdout is not None
+        if process.poll() is not None:
+            raise RuntimeError("Ghostscript has exited.")
+
+        timer = threading.Timer(self.timeout, process.kill)
+        timer.start()
+        try:
+            process.stdin.write(job)
+            process.stdin.flush()
+            while True:
+                line = process.stdout.readline()
+                if not line:
+                    raise RuntimeError("Ghostscript has exited.")
+                line = line.strip()
+                if line in (_gs_done, _gs_failed):
+                    return line
+        except OSError:
+            raise RuntimeError("Cannot communicate with ghostscript.")
+        finally:
+            timer.cancel()
+
+    def _error(self, message: str) -> str:
+        self.log.seek(0)
+        err = self.log.read()
+        self.log.seek(0)
+        self.log.truncate()
+        if err:
+            message += "\n" + err.decode(errors="replace")
+        return message
+
+
+# end class _GhostscriptWorker
+
+
+_ghostscript_pool: Optional[GhostscriptPool] = None
+
+
+def set_ghostscript_pool(pool: Optional[GhostscriptPool]) -> None:
+    """Convert PDF and bitmap logos with a pool of running Ghostscript
+    interpreters, rather than starting Ghostscript for every logo. Pass None
+    to go back to starting a new Ghostscript process for each conversion."""
+    global _ghostscript_pool
+    _ghostscript_pool = pool
+
+
+def _ghostscript() -> "GhostscriptAPI | GhostscriptPool":
+    if _ghostscript_pool is not None:
+        return _ghostscript_pool
+    return GhostscriptAPI()
+
+
+class LogoCache:
+    """A cache of formatted logos.
+
+    Logos are keyed by a hash of the logo data (counts, entropies and
+    weights, which in turn depend upon the prior), the logo format, and the
+    output format name, so that a cache hit skips both the eps_formatter and
+    Ghostscript. Recently used logos are kept in memory, and, if a directory
+    is given, on disk, where the least recently used logos are removed once
+    the total size exceeds max_disk_bytes. The disk tier can be shared
+    between processes.
+
+    The creation date of the logo is not part of the key, so a cached logo
+    retains the date it was first created.
+
+    Usage:
+        cache = LogoCache(directory="/var/cache/weblogo")
+        png = cache.format("png", logodata, logoformat)
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        directory: Optional[str] = None,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+    ) -> None:
+        self.maxsize = maxsize
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_bytes = sum(size for _, _, size in self._disk_entries())
+            if self._disk_bytes > max_disk_bytes:
+                self._evict()
+
+    def format(self, format: str, logodata: LogoData, logoformat: LogoFormat) -> bytes:
+        """Return the logo in the named output format (One of the keys of
+        'formatters'), from the cache if possible.
+
+        Raises:
+            ValueError: For an unrecognized format.
+        """
+        if format not in formatters:
+            raise ValueError("Unknown logo format: '%s'" % format)
+
+        key = self.key(format, logodata, logoformat)
+        logo = self.get(key)
+        if logo is None:
+            logo = formatters[format](logodata, logoformat)
+            self.put(key, logo)
+        return logo
+
+    def formatter(self, format: str) -> Callable[[LogoData, LogoFormat], bytes]:
+        """Returns: A cached version of the named formatter"""
+
+        def cached_formatter(logodata: LogoData, logoformat: LogoFormat) -> bytes:
+            return self.format(format, logodata, logoformat)
+
+        return cached_formatter
+
+    @staticmethod
+    def key(format: str, logodata: LogoData, logoformat: LogoFormat) -> str:
+        """Returns: The cache key of a formatted logo"""
+        h = hashlib.sha256()
+        h.update(format.encode())
+        _hash_value(h, vars(logodata))
+        _hash_value(
+            h, {k: v for k, v in vars(logoformat).items() if k != "creation_date"}
+        )
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns: The cached logo, or None"""
+        with self._lock:
+            logo = self._memory.get(key)
+            if logo is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return logo
+
+        if self.directory is not None:
+            path = os.path.join(self.directory, key)
+            try:
+                with open(path, "rb") as f:
+                    logo = f.read()
+                os.utime(path)  # Mark as recently used
+            except OSError:
+                logo = None
+
+        with self._lock:
+            if logo is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, logo)
+        return logo
+
+    def put(self, key: str, logo: bytes) -> None:
+        """Add a logo to the cache"""
+        with self._lock:
+            self._remember(key, logo)
+
+        if self.directory is None:
+            return
+
+        # Logos are keyed by content, so a logo already on disk (perhaps put
+        # by another process) need not be written, or counted, again.
+        path = os.path.join(self.directory, key)
+        try:
+            os.utime(path)  # Mark as recently used
+            return
+        except OSError:
+            pass
+
+        # Write to a temporary file first, so that other processes never see
+        # a partial logo.
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(logo)
+        os.replace(tmp, path)
+
+        with self._lock:
+            self._disk_bytes += len(logo)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict()
+
+    def clear(self) -> None:
+        """Remove all logos from the cache"""
+        with self._lock:
+            self._memory.clear()
+            for path, _, _ in self._disk_entries():
+                _remove(path)
+            self._disk_bytes = 0
+
+    def _remember(self, key: str, logo: bytes) -> None:
+        self._memory[key] = logo
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _evict(self) -> None:
+        # Remove least recently used logos from disk
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if total <= self.max_disk_bytes:
+                break
+            _remove(path)
+            total -= size
+        self._disk_bytes = total
+
+    def _disk_entries(self) -> List[Tuple[str, float, int]]:
+        # (path, last used time, size) of logos cached on disk
+        assert self.directory is not None
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    try:
+                        stat = entry.stat()
+                    except OSError:  # pragma: no cover
+                        continue  # Removed by another process
+                    entries.append((entry.path, stat.st_mtime, stat.st_size))
+        return entries
+
+
+# end class LogoCache
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:  # pragma: no cover
+        pass  # Already removed by another process
+
+
+def _hash_value(h: "hashlib._Hash", value: Any) -> None:
+    # Feed a stable representation of a value into a hash. Objects that do not
+    # define their own repr are hashed by class and attributes.
+    if isinstance(value, np.ndarray):
+        h.update(b"ndarray%s%s" % (value.dtype.str.encode(), str(value.shape).encode()))
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        h.update(b"{")
+        for k in sorted(value):
+            h.update(repr(k).encode())
+            _hash_value(h, value[k])
+        h.update(b"}")
+    elif isinstance(value, (list, tuple)):
+        h.update(b"[")
+        for item in value:
+            _hash_value(h, item)
+        h.update(b"]")
+    elif type(value).__repr__ is object.__repr__ and hasattr(value, "__dict__"):
+        h.update(type(value).__qualname__.encode())
+        _hash_value(h, vars(value))
+    else:
+        h.update(repr(value).encode())
+    h.update(b";")
@@ -37,14 +37,13 @@
 #  POSSIBILITY OF SUCH DAMAGE.
 
 import random
-from math import exp, log, sqrt
+from math import exp
 from typing import Tuple
 
 import numpy as np
-import scipy.optimize
 from numpy import asarray, float64, shape, zeros
 from numpy.typing import ArrayLike  # pragma: no cover
-from scipy.special import digamma, gamma, gammaincc, polygamma
+from scipy.special import digamma, gamma, gammaincc, gammaincinv, polygamma
 
 
 class Dirichlet(object):
@@ -161,16 +160,7 @@ class Dirichlet(object):
             GEC 2005
 
         """
-        # TODO: Optimize
-        alpha = self.alpha
-        A = float(sum(alpha))
-        ent = 0.0
-        for a in alpha:
-            if a > 0:
-                ent += -1.0 * a * digamma(1.0 + a)  # FIXME: Check
-        ent /= A
-        ent += digamma(A + 1.0)
-        return ent
+        return float(dirichlet_mean_entropy(self.alpha))
 
     def variance_entropy(self) -> float:
         """Calculate the variance of the Dirichlet entropy.
@@ -179,43 +169,7 @@ class Dirichlet(object):
             Wolpert & Wolf, PRE 53:6841-6854 (1996) Theorem 8
             (Warning: this paper contains typos.)
         """
-        alpha = self.alpha
-        A = float(sum(alpha))
-        A2 = A * (A + 1)
-        L = len(alpha)
-
-        dg1 = zeros((L), float64)
-        dg2 = zeros((L), float64)
-        tg2 = zeros((L), float64)
-
-        for i in range(L):
-            dg1[i] = digamma(alpha[i] + 1.0)
-            dg2[i] = digamma(alpha[i] + 2.0)
-            tg2[i] = polygamma(1, alpha[i] + 2.0)
-
-        dg_Ap2 = digamma(A + 2.0)
-        tg_Ap2 = polygamma(1, A + 2.0)
-
-        mean = self.mean_entropy()
-        var = 0.0
-
-        for i in range(L):
-            for j in range(L):
-                if i != j:
-                    var += (
-                        ((dg1[i] - dg_Ap2) * (dg1[j] - dg_Ap2) - tg_Ap2)
-                        * (alpha[i] * alpha[j])
-                        / A2
-                    )
-                else:
-                    var += (
-                        ((dg2[i] - dg_Ap2) ** 2 + (tg2[i] - tg_Ap2))
-                        * (alpha[i] * (alpha[i] + 1.0))
-                        / A2
-                    )
-
-        var -= mean**2
-        return var
+        return float(dirichlet_variance_entropy(self.alpha))
 
     def mean_relative_entropy(self, pvec: "ArrayLike") -> float:
         pvec = asarray(pvec)
@@ -230,21 +184,8 @@ class Dirichlet(object):
     def interval_relative_entropy(
         self, pvec: "ArrayLike", frac: float
     ) -> Tuple[float, float]:
-        pvec = asarray(pvec)
-        mean = self.mean_relative_entropy(pvec)
-        variance = self.variance_relative_entropy(pvec)
-        sd = sqrt(variance)
-
-        # If the variance is small, use the standard 95%
-        # confidence interval: mean +/- 1.96 * sd
-        if mean / sd > 3.0:
-            return max(0.0, mean - sd * 1.96), mean + sd * 1.96
-
-        g = Gamma.from_mean_variance(mean, variance)
-        low_limit = g.inverse_cdf((1.0 - frac) / 2.0)
-        high_limit = g.inverse_cdf(1.0 - (1.0 - frac) / 2.0)
-
-        return low_limit, high_limit
+        low, high = dirichlet_interval_relative_entropy(self.alpha, pvec, frac)
+        return float(low), float(high)
 
 
 class Gamma(object):
@@ -294,8 +235,119 @@ class Gamma(object):
         return 1.0 - gammaincc(self.alpha, self.beta * x)
 
     def inverse_cdf(self, p: float) -> float:
-        def rootof(x: float) -> float:
-            return self.cdf(exp(x)) - p
+        return float(gamma_inverse_cdf(self.alpha, self.beta, p))
+
+
+def gamma_inverse_cdf(
+    alpha: "ArrayLike", beta: "ArrayLike", p: "ArrayLike"
+) -> np.ndarray:
+    """The inverse cumulative distribution function of the gamma distribution,
+    evaluated elementwise over arrays of shape parameters alpha, rate
+    parameters beta, and probabilities p. (See Gamma.inverse_cdf)
+    """
+    alpha = asarray(alpha, float64)
+    beta = asarray(beta, float64)
+    return gammaincinv(alpha, asarray(p, float64)) / beta
+
+
+# Batched Dirichlet statistics. Each function accepts an array of Dirichlet
+# parameters of shape (..., K), and treats each row along the last axis as an
+# independent distribution, e.g. the posterior distributions of every column
+# of a sequence logo.
+
+
+def dirichlet_mean_entropy(alpha: "ArrayLike") -> np.ndarray:
+    """The average entropy of probabilities sampled from each Dirichlet
+    distribution. (See Dirichlet.mean_entropy)
+    """
+    alpha = asarray(alpha, float64)
+    A = alpha.sum(axis=-1)
+    with np.errstate(invalid="ignore"):
+        terms = np.where(alpha > 0, alpha * digamma(1.0 + alpha), 0.0)
+    return digamma(A + 1.0) - terms.sum(axis=-1) / A
+
+
+def dirichlet_variance_entropy(alpha: "ArrayLike") -> np.ndarray:
+    """The variance of the entropy of probabilities sampled from each
+    Dirichlet distribution. (See Dirichlet.variance_entropy)
+    """
+    alpha = asarray(alpha, float64)
+    A = alpha.sum(axis=-1)
+    A2 = A * (A + 1)
+    dg_Ap2 = digamma(A + 2.0)[..., np.newaxis]
+    tg_Ap2 = polygamma(1, A + 2.0)[..., np.newaxis]
+
+    # Off diagonal terms, sum_{i!=j} x_i x_j = (sum_i x_i)^2 - sum_i x_i^2
+    x = (digamma(alpha + 1.0) - dg_Ap2) * alpha
+    off = x.sum(axis=-1) ** 2 - (x * x).sum(axis=-1)
+    off -= tg_Ap2[..., 0] * (A**2 - (alpha * alpha).sum(axis=-1))
+
+    diag = (
+        (digamma(alpha + 2.0) - dg_Ap2) ** 2 + (polygamma(1, alpha + 2.0) - tg_Ap2)
+    ) * (alpha * (alpha + 1.0))
+
+    return (off + diag.sum(axis=-1)) / A2 - dirichlet_mean_entropy(alpha) ** 2
+
+
+def dirichlet_mean_relative_entropy(
+    alpha: "ArrayLike", pvec: "ArrayLike"
+) -> np.ndarray:
+    """The average relative entropy, with respect to the distribution pvec, of
+    probabilities sampled from each Dirichlet distribution.
+    """
+    alpha = asarray(alpha, float64)
+    ln_p = np.log(asarray(pvec, float64))
+    A = alpha.sum(axis=-1)
+    return -(alpha * ln_p).sum(axis=-1) / A - dirichlet_mean_entropy(alpha)
+
+
+def dirichlet_variance_relative_entropy(
+    alpha: "ArrayLike", pvec: "ArrayLike"
+) -> np.ndarray:
+    """The variance of the relative entropy, with respect to the distribution
+    pvec, of probabilities sampled from each Dirichlet distribution.
+    """
+    alpha = asarray(alpha, float64)
+    ln_p = np.log(asarray(pvec, float64))
+    A = alpha.sum(axis=-1)
+    mean_x = (alpha * ln_p).sum(axis=-1) / A
+    mean_x2 = (alpha * ln_p * ln_p).sum(axis=-1) / A
+    variance_x = (mean_x2 - mean_x**2) / (A + 1.0)
+    return variance_x + dirichlet_variance_entropy(alpha)
+
+
+def dirichlet_interval_relative_entropy(
+    alpha: "ArrayLike", pvec: "ArrayLike", frac: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Confidence intervals of the relative entropy, with respect to the
+    distribution pvec, of probabilities sampled from each Dirichlet
+    distribution. (See Dirichlet.interval_relative_entropy)
+
+    Returns:
+        (low, high) -- Arrays of lower and upper limits.
+    """
+    mean = asarray(dirichlet_mean_relative_entropy(alpha, pvec))
+    variance = asarray(dirichlet_variance_relative_entropy(alpha, pvec))
+    sd = np.sqrt(variance)
+
+    # If the variance is small, use the standard 95%
+    # confidence interval: mean +/- 1.96 * sd
+    low = np.array(np.maximum(0.0, mean - sd * 1.96))
+    high = np.array(mean + sd * 1.96)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        skewed = ~(mean / sd > 3.0)
+
+    # Otherwise, approximate the distribution with a gamma distribution of the
+    # same mean and variance.
+    if np.any(skewed):
+        m = mean[skewed]
+        v = variance[skewed]
+        shape = m**2 / v
+        if np.any(~(shape > 0.0)):
+            raise ValueError("alpha must be positive")
+        rate = shape / m
+        low[skewed] = gamma_inverse_cdf(shape, rate, (1.0 - frac) / 2.0)
+        high[skewed] = gamma_inverse_cdf(shape, rate, 1.0 - (1.0 - frac) / 2.0)
 
-        root = scipy.optimize.newton(rootof, log(self.mean()))
-        return exp(root)
+    return low, high
@@ -35,6 +35,7 @@ Classes ::
     Alphabet    -- A subset of non-null ascii characters
     Seq         -- An alphabetic string
     SeqList     -- A collection of Seq's
+    Alignment   -- A compact, array based, collection of aligned sequences
 
 Alphabets ::
 
@@ -129,8 +130,27 @@ Authors:
 # 'ACGT-NNNN'
 
 import codecs
+import os
 from array import array
-from typing import Any, Generator, Iterator, List, Optional, Sequence, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import shared_memory
+from typing import (
+    Any,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from .timings import timed
 
 __all__ = [
     "Alphabet",
@@ -139,6 +159,8 @@ __all__ = [
     "dna",
     "protein",
     "SeqList",
+    "Alignment",
+    "ProfileAccumulator",
     "generic_alphabet",
     "protein_alphabet",
     "nucleic_alphabet",
@@ -167,8 +189,15 @@ class Alphabet(object):
     _alternatives: Tuple[str, str]
     _ord_table: bytes
     _chr_table: str
+    _valid_bytes: bytes
 
-    __slots__ = ["_letters", "_alternatives", "_ord_table", "_chr_table"]
+    __slots__ = [
+        "_letters",
+        "_alternatives",
+        "_ord_table",
+        "_chr_table",
+        "_valid_bytes",
+    ]
 
     # We're immutable, so use __new__ not __init__
     def __new__(
@@ -248,6 +277,10 @@ class Alphabet(object):
         assert ord_table[0] == 0xFF
         self._ord_table = ord_table
 
+        # All the (latin-1) characters in the alphabet, including alternatives,
+        # so that strings can be checked with a single bytes.translate()
+        self._valid_bytes = bytes([n for n in range(256) if ord_table[n] != 0xFF])
+
         # The chr_table maps between ordinal position in the alphabet letters
         # and the ordinal position in ascii. This map is not the inverse of
         # ord_table if there are alternatives.
@@ -265,11 +298,48 @@ class Alphabet(object):
 
     def alphabetic(self, string: str) -> bool:
         """True if all characters of the string are in this alphabet."""
-        table = self._ord_table
-        for s in str(string):
-            if table[ord(s)] == 0xFF:
-                return False
-        return True
+        try:
+            raw = str(string).encode("latin-1")
+        except UnicodeEncodeError:
+            return False
+        return not raw.translate(None, self._valid_bytes)
+
+    def validate(self, strings: Iterable[str], start: int = 0) -> None:
+        """Check, all at once, that every character of every string is in this
+        alphabet.
+
+        Args:
+            strings: The strings to check
+            start: The index of the first string, for error messages
+        Raises:
+            ValueError: Giving the first sequence, position and character
+                that is not in this alphabet.
+        """
+        strings = [str(s) for s in strings]
+        joined = "".join(strings)
+        try:
+            raw = joined.encode("latin-1")
+        except UnicodeEncodeError as err:
+            raw = joined[: err.start].encode("latin-1")
+
+        if raw.translate(None, self._valid_bytes):
+            table = np.frombuffer(self._ord_table, dtype=np.uint8)
+            offset = int(np.argmax(table[np.frombuffer(raw, dtype=np.uint8)] == 0xFF))
+        elif len(raw) < len(joined):
+            offset = len(raw)
+        else:
+            return
+
+        ends = np.cumsum([len(s) for s in strings])
+        index = int(np.searchsorted(ends, offset, side="right"))
+        position = offset - (int(ends[index - 1]) if index else 0)
+        raise self._not_alphabetic(start + index, position, joined[offset])
+
+    def _not_alphabetic(self, index: int, position: int, char: str) -> ValueError:
+        return ValueError(
+            "Sequence number %d is not alphabetic: '%s' at position %d "
+            "is not in alphabet %s" % (index + 1, char, position + 1, self)
+        )
 
     def chr(self, n: int) -> str:
         """The n'th character in the alphabet (zero indexed) or \\0"""
@@ -343,17 +413,25 @@ class Alphabet(object):
         return hash(tuple(self._ord_table))
 
     @staticmethod
+    @timed("Alphabet.which")
     def which(
-        seqs: Union["Seq", "SeqList"], alphabets: Optional[List["Alphabet"]] = None
+        seqs: Union["Seq", "SeqList", "Alignment", "ProfileAccumulator"],
+        alphabets: Optional[List["Alphabet"]] = None,
+        sample: bool = False,
     ) -> "Alphabet":
         """Returns the most appropriate unambiguous protein, RNA or DNA alphabet
-        for a Seq or SeqList. If a list of alphabets is supplied, then the best alphabet
-        is selected from that list.
+        for a Seq, SeqList, Alignment or ProfileAccumulator. If a list of
+        alphabets is supplied, then the best alphabet is selected from that list.
 
         The heuristic is to count the occurrences of letters for each alphabet and
         downweight longer alphabets by the log of the alphabet length. Ties
         go to the first alphabet in the list.
 
+        The letters of every alphabet are counted from a single histogram of
+        the characters of the sequences. If sample is true, the sequences are
+        instead counted in blocks of randomly chosen rows, stopping as soon as
+        the best alphabet is clearly ahead, which for large alignments avoids
+        reading most of the sequences.
         """
         if alphabets is None:
             alphabets = [
@@ -363,7 +441,11 @@ class Alphabet(object):
             ]
         import math
 
-        score = [sum(seqs.tally(a)) / math.log(len(a)) for a in alphabets]
+        tallies = _alphabet_tallies(seqs, alphabets, sample)
+        if tallies is None:
+            # Not latin-1 text
+            tallies = [sum(seqs.tally(a)) for a in alphabets]
+        score = [tallies[i] / math.log(len(a)) for i, a in enumerate(alphabets)]
         best = score.index(max(score))
         a = alphabets[best]
         return a
@@ -461,6 +543,18 @@ class Seq(str):
 
         return self
 
+    @classmethod
+    def _unchecked(
+        cls, obj: str, alphabet: Alphabet, name: str = "", description: str = ""
+    ) -> "Seq":
+        """Create a Seq from a string already known to be alphabetic, skipping
+        the character by character check in __new__."""
+        self = str.__new__(cls, obj)
+        self._alphabet = alphabet
+        self.name = name
+        self.description = description
+        return self
+
     # BEGIN PROPERTIES
 
     # Make alphabet constant
@@ -724,9 +818,21 @@ class SeqList(list):
         counts = [sum(c) for c in zip(*[s.tally(alphabet) for s in self])]
         return counts
 
-    def profile(self, alphabet: Optional[Alphabet] = None):  # type: ignore  # Nasty circular import
+    @timed("SeqList.profile")
+    def profile(  # type: ignore  # Nasty circular import
+        self,
+        alphabet: Optional[Alphabet] = None,
+        jobs: int = 1,
+        weights: Optional[ArrayLike] = None,
+    ):
         """Counts the occurrences of characters in each column.
 
+        Large alignments can be counted in parallel by several worker
+        processes (jobs). If jobs is 0, use one process per CPU.
+
+        Optional sequence weights, one per sequence, give fractional counts,
+        typically to correct for redundant sequences (See weblogo.weights).
+
         Returns: Motif(counts, alphabet)
         """
         if not alphabet:
@@ -734,32 +840,611 @@ class SeqList(list):
         if not alphabet:
             raise ValueError("No alphabet")
 
-        N = len(alphabet)
-        ords = self.ords(alphabet)
-        L = len(ords[0])
-        counts = [
-            [
-                0,
-            ]
-            * N
-            for x in range(0, L)
-        ]
+        ords = self._ord_matrix(alphabet)
+        counts = _profile_ords(
+            ords, len(alphabet), jobs, None if weights is None else np.asarray(weights)
+        )
+
+        from .matrix import Motif
+
+        return Motif(alphabet, counts)
 
-        for o in ords:
-            if len(o) != L:
+    def _ord_matrix(self, alphabet: Alphabet) -> np.ndarray:
+        """Convert an aligned sequence list into a 2D uint8 array of ordinals,
+        one row per sequence. Characters not in the alphabet map to 255.
+        """
+        L = len(self[0])
+        for s in self:
+            if len(s) != L:
                 raise ValueError(
                     "Sequences are of incommensurate lengths. Cannot tally."
                 )
-            for j, n in enumerate(o):
-                if n < N:
-                    counts[j][n] += 1
+
+        # Every alphabetic character is in the range 0-255, so latin-1 is a
+        # one byte per character encoding of the alignment.
+        raw = np.frombuffer("".join(self).encode("latin-1"), dtype=np.uint8)
+        table = np.frombuffer(bytes(alphabet._ord_table), dtype=np.uint8)
+        return table[raw].reshape(len(self), L)
+
+
+# end class SeqList
+
+
+class Alignment(object):
+    """A compact set of aligned sequences.
+
+    All the residues are stored in one contiguous 2D array of alphabet ordinals,
+    one row per sequence, and the sequence names and descriptions are each
+    packed into a single string. Unlike a SeqList there is no Python object per
+    sequence, so a large alignment takes little more memory than its residues.
+    Since residues are stored as ordinals, alternative letters (e.g. lower
+    case) become the canonical letter of the alphabet.
+
+    Slicing by rows, columns, or both, (e.g. aln[10:20], aln[:, 5:15]) returns
+    a new Alignment sharing storage with the original. Indexing a single row
+    returns a Seq. A row with characters that were not in the alphabet is
+    returned as a Seq of the generic alphabet, with those characters as '-'.
+
+    >>> aln = Alignment.from_seqs(fasta_io.iterseq(fin), unambiguous_dna_alphabet)
+    >>> data = LogoData.from_seqs(aln[:, 10:30])
+
+    Attributes:
+        ords            -- A uint8 array of ordinals, of shape (sequences, length)
+        alphabet        -- The Alphabet of the sequences
+        names           -- The sequence names (a read-only sequence of strings)
+        descriptions    -- The sequence descriptions
+        name            -- A name for the alignment
+        description     -- A description of the alignment
+    """
+
+    __slots__ = ["ords", "alphabet", "names", "descriptions", "name", "description"]
+
+    def __init__(
+        self,
+        ords: np.ndarray,
+        alphabet: Alphabet,
+        names: Optional[Iterable[str]] = None,
+        descriptions: Optional[Iterable[str]] = None,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+    ) -> None:
+        if ords.ndim != 2 or ords.dtype != np.uint8:
+            raise ValueError("Expected a 2D array of uint8 ordinals")
+        N = len(ords)
+        self.ords = ords
+        self.alphabet = alphabet
+        self.names = _PackedStrings.pack([""] * N if names is None else names)
+        self.descriptions = _PackedStrings.pack(
+            [""] * N if descriptions is None else descriptions
+        )
+        if len(self.names) != N or len(self.descriptions) != N:
+            raise ValueError("Expected one name and description per sequence")
+        self.name = name
+        self.description = description
+
+    @classmethod
+    def from_seqs(
+        cls,
+        seqs: Iterable[str],
+        alphabet: Optional[Alphabet] = None,
+        chunk_size: int = 1024,
+        validate: bool = False,
+    ) -> "Alignment":
+        """Pack aligned sequences, from a SeqList or an iteration over
+        sequences (e.g. a seq_io iterseq generator), into an Alignment.
+
+        The alphabet defaults to the alphabet of the SeqList, if any, or else
+        the generic alphabet. Characters not in the alphabet, such as gaps in
+        the unambiguous alphabets, map to ordinal 255, and so are not counted
+        in tallies or profiles, as with SeqList.profile(). They read back as
+        '-' gaps.
+
+        Raises:
+            ValueError: If the sequences are not all the same length, or, if
+                validate is true, are not alphabetic.
+        """
+        if alphabet is None:
+            alphabet = getattr(seqs, "alphabet", None) or generic_alphabet
+        table = np.frombuffer(alphabet._ord_table, dtype=np.uint8)
+
+        blocks = []
+        names = []
+        descriptions = []
+        L = None
+        nseqs = 0
+        it = iter(seqs)
+        while True:
+            chunk = list(islice(it, chunk_size))
+            if not chunk:
+                break
+            if L is None:
+                L = len(chunk[0])
+            for i, s in enumerate(chunk):
+                if len(s) != L:
+                    raise ValueError(
+                        "Sequence number %d differs in length from the previous "
+                        "sequences" % (nseqs + i + 1)
+                    )
+            if validate:
+                alphabet.validate(chunk, nseqs)
+            joined = "".join(chunk)
+            raw = np.frombuffer(joined.encode("latin-1"), dtype=np.uint8)
+            block = table[raw].reshape(len(chunk), L)
+
+            blocks.append(block)
+            names.append(_PackedStrings.pack([getattr(s, "name", "") for s in chunk]))
+            descriptions.append(
+                _PackedStrings.pack([getattr(s, "description", "") for s in chunk])
+            )
+            nseqs += len(chunk)
+
+        if not blocks:
+            return cls(np.zeros((0, 0), dtype=np.uint8), alphabet)
+
+        aln = cls(np.concatenate(blocks), alphabet)
+        aln.names = _PackedStrings.concatenate(names)
+        aln.descriptions = _PackedStrings.concatenate(descriptions)
+        aln.name = getattr(seqs, "name", None)
+        aln.description = getattr(seqs, "description", None)
+        return aln
+
+    def __len__(self) -> int:
+        return len(self.ords)
+
+    def __getitem__(self, key: Any) -> Any:
+        rows, cols = key if isinstance(key, tuple) else (key, slice(None))
+        if isinstance(rows, slice):
+            return Alignment(
+                self.ords[rows, cols],
+                self.alphabet,
+                self.names[rows],
+                self.descriptions[rows],
+                self.name,
+                self.description,
+            )
+
+        if not isinstance(rows, (int, np.integer)):
+            raise TypeError("Alignment rows must be an integer or a slice")
+
+        ords = self.ords[rows, cols]
+        if np.all(ords != 0xFF):
+            text = ords.tobytes().translate(self._chr_bytes()).decode("latin-1")
+            return Seq._unchecked(
+                text, self.alphabet, self.names[rows], self.descriptions[rows]
+            )
+
+        # Characters that were not in the alphabet read back as gaps, in a Seq
+        # of the generic alphabet, as read_seq_data() returns gapped sequences
+        chars = bytearray(self._chr_bytes())
+        chars[0xFF] = ord("-")
+        text = ords.tobytes().translate(chars).decode("latin-1")
+        return Seq(text, generic_alphabet, self.names[rows], self.descriptions[rows])
+
+    def __iter__(self) -> Iterator[Seq]:
+        for i in range(len(self)):
+            yield self[i]  # type: ignore
+
+    def _chr_bytes(self) -> bytes:
+        # Maps ordinals back to (latin-1) characters
+        return self.alphabet._chr_table.encode("latin-1")
+
+    def _ords_in(self, alphabet: Alphabet) -> np.ndarray:
+        # The ordinals, translated into a different alphabet
+        if alphabet == self.alphabet:
+            return self.ords
+        table = np.frombuffer(
+            self._chr_bytes().translate(alphabet._ord_table), dtype=np.uint8
+        )
+        return table[self.ords]
+
+    def isaligned(self) -> bool:
+        """Are all sequences of the same length and alphabet? Always true."""
+        return True
+
+    def tally(self, alphabet: Optional[Alphabet] = None) -> List[int]:
+        """Counts the occurrences of alphabetic characters.
+
+        Returns :
+            A list of character counts in alphabetic order.
+        """
+        if not alphabet:
+            alphabet = self.alphabet
+        ords = self._ords_in(alphabet)
+        counts = np.bincount(ords.ravel(), minlength=256)[: len(alphabet)]
+        return [int(c) for c in counts]
+
+    @timed("Alignment.profile")
+    def profile(  # type: ignore  # Nasty circular import
+        self,
+        alphabet: Optional[Alphabet] = None,
+        jobs: int = 1,
+        weights: Optional[ArrayLike] = None,
+    ):
+        """Counts the occurrences of characters in each column, optionally
+        in parallel and with sequence weights (See SeqList.profile).
+
+        Returns: Motif(counts, alphabet)
+        """
+        if not alphabet:
+            alphabet = self.alphabet
+        counts = _profile_ords(
+            self._ords_in(alphabet),
+            len(alphabet),
+            jobs,
+            None if weights is None else np.asarray(weights),
+        )
 
         from .matrix import Motif
 
         return Motif(alphabet, counts)
 
+    def to_seqlist(self) -> SeqList:
+        """Unpack into a SeqList of Seq objects."""
+        return SeqList(list(self), self.alphabet, self.name, self.description)
 
-# end class SeqList
+
+# end class Alignment
+
+
+class _PackedStrings(object):
+    """A read-only sequence of strings, stored as one string and the start and
+    end offsets of each item. Slicing returns a view sharing the storage."""
+
+    __slots__ = ["text", "starts", "ends"]
+
+    def __init__(self, text: str, starts: np.ndarray, ends: np.ndarray) -> None:
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def pack(cls, strings: Iterable[str]) -> "_PackedStrings":
+        if isinstance(strings, _PackedStrings):
+            return strings
+        strings = [str(s) for s in strings]
+        ends = np.cumsum([len(s) for s in strings], dtype=np.int64)
+        starts = ends - [len(s) for s in strings]
+        return cls("".join(strings), starts, ends)
+
+    @classmethod
+    def concatenate(cls, parts: List["_PackedStrings"]) -> "_PackedStrings":
+        shift = np.cumsum([0] + [len(p.text) for p in parts[:-1]])
+        return cls(
+            "".join(p.text for p in parts),
+            np.concatenate([p.starts + k for p, k in zip(parts, shift)]),
+            np.concatenate([p.ends + k for p, k in zip(parts, shift)]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, key: Any) -> Any:
+        if isinstance(key, slice):
+            return _PackedStrings(self.text, self.starts[key], self.ends[key])
+        return self.text[self.starts[key] : self.ends[key]]
+
+    def __iter__(self) -> Iterator[str]:
+        for start, end in zip(self.starts.tolist(), self.ends.tolist()):
+            yield self.text[start:end]
+
+
+class ProfileAccumulator(object):
+    """Accumulate per-column character counts from a stream of aligned
+    sequences, without holding the sequences themselves in memory.
+
+    Characters are tallied as raw bytes, so the alphabet need not be known
+    until the counts are requested.
+
+    >>> acc = ProfileAccumulator()
+    >>> acc.update(weblogo.seq_io.fasta_io.iterseq(fin))
+    >>> motif = acc.profile(unambiguous_dna_alphabet)
+
+    Attributes:
+        counts      -- Raw byte counts, an integer array of shape (length, 256)
+        length      -- The alignment length, or None if no sequences yet
+        nseqs       -- Number of sequences accumulated
+        chunk_size  -- Number of sequences counted together in one pass
+    """
+
+    __slots__ = ["counts", "length", "nseqs", "chunk_size"]
+
+    def __init__(self, chunk_size: int = 1024) -> None:
+        self.counts: Optional[np.ndarray] = None
+        self.length: Optional[int] = None
+        self.nseqs = 0
+        self.chunk_size = chunk_size
+
+    def update(self, seqs: Iterable[str]) -> None:
+        """Add the sequences from an iterable (e.g. a seq_io iterseq generator)
+        to the running counts.
+
+        Raises:
+            ValueError: If the sequences are not all the same length.
+        """
+        it = iter(seqs)
+        while True:
+            chunk = list(islice(it, self.chunk_size))
+            if not chunk:
+                break
+            self._update_chunk(chunk)
+
+    def _update_chunk(self, chunk: List[str]) -> None:
+        if self.length is None:
+            self.length = len(chunk[0])
+            self.counts = np.zeros((self.length, 256), dtype=np.int64)
+        L = self.length
+        assert self.counts is not None
+
+        for i, s in enumerate(chunk):
+            if len(s) != L:
+                raise ValueError(
+                    "Sequence number %d differs in length from the previous sequences"
+                    % (self.nseqs + i + 1)
+                )
+
+        raw = np.frombuffer("".join(chunk).encode("latin-1"), dtype=np.uint8)
+        self.counts += _profile_ords(raw.reshape(len(chunk), L), 256)
+        self.nseqs += len(chunk)
+
+    def _alphabet_matrix(self, alphabet: Alphabet) -> np.ndarray:
+        # A (256, N) matrix mapping raw bytes onto alphabet ordinals.
+        N = len(alphabet)
+        table = np.frombuffer(bytes(alphabet._ord_table), dtype=np.uint8)
+        return (table[:, np.newaxis] == np.arange(N)).astype(np.int64)
+
+    def tally(self, alphabet: Optional[Alphabet] = None) -> List[int]:
+        """Counts the occurrences of alphabetic characters across all columns.
+
+        Returns :
+            A list of character counts in alphabetic order.
+        """
+        if not alphabet:
+            raise ValueError("No alphabet")
+        if self.counts is None:
+            return [0] * len(alphabet)
+        totals = self.counts.sum(axis=0)
+        return [int(c) for c in totals @ self._alphabet_matrix(alphabet)]
+
+    def profile(self, alphabet: Alphabet):  # type: ignore  # Nasty circular import
+        """Counts the occurrences of characters in each column.
+
+        Returns: Motif(counts, alphabet)
+        """
+        if self.counts is None:
+            raise ValueError("No sequence data found.")
+
+        from .matrix import Motif
+
+        return Motif(alphabet, self.counts @ self._alphabet_matrix(alphabet))
+
+
+# end class ProfileAccumulator
+
+
+# Alphabet.which counts the characters of the sequences in blocks of about
+# this many bytes.
+_which_block_size = 1 << 22
+
+# When sampling, Alphabet.which counts blocks of rows, starting with this many
+# rows and doubling (up to a limit), until the best alphabet is ahead of every
+# other by this many standard errors.
+_which_sample_rows = 256
+_which_sample_max_rows = 1 << 14
+_which_z = 5.0
+
+
+def _alphabet_tallies(
+    seqs: Union["Seq", "SeqList", "Alignment", "ProfileAccumulator"],
+    alphabets: List[Alphabet],
+    sample: bool = False,
+) -> Optional[List[int]]:
+    """The number of letters of each alphabet in the sequences (see
+    Alphabet.which), counted from a histogram of their characters, or from a
+    sample of rows. Returns None if the sequences are not latin-1 text.
+    """
+    # A (256, alphabets) table of the characters in each alphabet
+    member: np.ndarray = np.zeros((256, len(alphabets)), dtype=bool)
+    for k, a in enumerate(alphabets):
+        member[np.frombuffer(a._valid_bytes, dtype=np.uint8), k] = True
+
+    if sample and isinstance(seqs, (SeqList, Alignment)) and len(seqs) > 0:
+        return _sample_tallies(seqs, member, [len(a) for a in alphabets])
+
+    hist = _byte_histogram(seqs)
+    if hist is None:
+        return None
+    return [int(t) for t in hist @ member]
+
+
+def _byte_histogram(
+    seqs: Union["Seq", "SeqList", "Alignment", "ProfileAccumulator"],
+) -> Optional[np.ndarray]:
+    # Count the occurrences of each (latin-1) character in the sequences
+    if isinstance(seqs, ProfileAccumulator):
+        if seqs.counts is None:
+            return np.zeros(256, dtype=np.int64)
+        return seqs.counts.sum(axis=0)
+
+    hist: np.ndarray = np.zeros(256, dtype=np.int64)
+    if isinstance(seqs, Alignment):
+        chars = np.frombuffer(seqs._chr_bytes(), dtype=np.uint8)
+        np.add.at(hist, chars, np.bincount(seqs.ords.ravel(), minlength=256))
+        return hist
+
+    if isinstance(seqs, str):
+        seqs = SeqList([seqs])
+    if len(seqs) == 0:
+        return hist
+    step = max(1, _which_block_size // max(1, len(seqs[0])))
+    for start in range(0, len(seqs), step):
+        block = _row_bytes(seqs, np.arange(start, min(start + step, len(seqs))))
+        if block is None:
+            return None
+        hist += np.bincount(block[0], minlength=256)
+    return hist
+
+
+def _row_bytes(
+    seqs: Union["SeqList", "Alignment"], rows: np.ndarray
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    # The characters of some rows of the sequences, as a single array of
+    # (latin-1) bytes, and the length of each row. None if not latin-1 text.
+    if isinstance(seqs, Alignment):
+        chars = np.frombuffer(seqs._chr_bytes(), dtype=np.uint8)
+        raw = chars[seqs.ords[rows]]
+        return raw.ravel(), np.full(len(rows), raw.shape[1])
+    strings = [seqs[i] for i in rows]
+    try:
+        text = "".join(strings).encode("latin-1")
+    except UnicodeEncodeError:
+        return None
+    return np.frombuffer(text, dtype=np.uint8), np.array([len(s) for s in strings])
+
+
+def _sample_tallies(
+    seqs: Union["SeqList", "Alignment"], member: np.ndarray, sizes: List[int]
+) -> Optional[List[int]]:
+    # Count the alphabet letters in each row, for blocks of randomly ordered
+    # rows, and stop once the best alphabet's per-row score is significantly
+    # ahead of every other alphabet's. The rows are a random sample, so the
+    # per-row differences in score are independent. Scores are counts
+    # downweighted by the log of the alphabet length, as in Alphabet.which.
+    n = len(seqs)
+    norm = np.log(np.clip(sizes, 2, None))
+
+    order = np.random.default_rng(0).permutation(n)
+    max_rows = max(
+        _which_sample_rows,
+        min(_which_block_size // max(1, len(seqs[0])), _which_sample_max_rows),
+    )
+    counts: List[np.ndarray] = []
+    start = 0
+    size = _which_sample_rows
+    while start < n:
+        rows = np.sort(order[start : start + size])
+        start += size
+        size = min(2 * size, max_rows)
+
+        block = _row_bytes(seqs, rows)
+        if block is None:
+            return None
+        raw, lengths = block
+        # Histogram of the characters of each row, with a single bincount
+        index = np.repeat(np.arange(len(rows), dtype=np.int64) * 256, lengths) + raw
+        hist = np.bincount(index, minlength=len(rows) * 256).reshape(len(rows), 256)
+        counts.append(hist @ member)
+
+        C = np.concatenate(counts)
+        if start >= n or len(C) < 2:
+            continue
+        scores = C / norm
+        best = int(np.argmax(scores.sum(axis=0)))
+        diff = scores[:, best : best + 1] - np.delete(scores, best, axis=1)
+        mean = diff.mean(axis=0)
+        err = diff.std(axis=0, ddof=1) / np.sqrt(len(C))
+        if np.all(mean > _which_z * err):
+            break
+
+    return [int(t) for t in np.concatenate(counts).sum(axis=0)]
+
+
+# Alignments with fewer residues than this are always counted in a single
+# process, since starting the worker processes would take longer.
+_parallel_min_size = 1 << 24
+
+
+def _profile_ords(
+    ords: np.ndarray, N: int, jobs: int = 1, weights: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Count the occurrences of each ordinal in each column of a 2D array of
+    alphabet ordinals. Ordinals outside the range [0, N) (e.g. 255, not in the
+    alphabet) are ignored. If weights are given, each row counts by its weight
+    rather than by one.
+
+    Returns: An array of counts, of shape (columns, N). Integer counts, or
+    fractional counts if the rows are weighted.
+    """
+    rows, L = ords.shape
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.shape != (rows,):
+            raise ValueError("Expected one weight per sequence")
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, rows)
+    if jobs > 1 and ords.size >= _parallel_min_size:
+        return _profile_ords_parallel(ords, N, jobs, weights)
+
+    dtype = np.int64 if weights is None else np.float64
+    counts = np.zeros((L, 256), dtype=dtype)
+    if rows == 0 or L == 0:
+        return counts[:, :N]
+
+    # Offset each column into its own block of 256 bins, so that a single
+    # bincount tallies every column at once. Work through the rows in chunks
+    # to bound the size of the temporary index array.
+    offsets: np.ndarray = np.arange(L, dtype=np.int64) * 256
+    chunk = max(1, (1 << 22) // L)
+    for start in range(0, rows, chunk):
+        index = ords[start : start + chunk] + offsets
+        w: Optional[np.ndarray] = None
+        if weights is not None:
+            w = np.repeat(weights[start : start + chunk], L)
+        counts += np.bincount(index.ravel(), w, minlength=L * 256).reshape(L, 256)
+
+    return counts[:, :N]
+
+
+def _profile_ords_parallel(
+    ords: np.ndarray, N: int, jobs: int, weights: Optional[np.ndarray] = None
+) -> np.ndarray:
+    # Split the rows into one shard per worker process. The ordinals are
+    # placed in shared memory, so that only the counts are pickled.
+    shm = shared_memory.SharedMemory(create=True, size=ords.nbytes)
+    try:
+        np.ndarray(ords.shape, dtype=np.uint8, buffer=shm.buf)[...] = ords
+
+        bounds = np.linspace(0, len(ords), jobs + 1).astype(int).tolist()
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            shards = [
+                pool.submit(
+                    _profile_shard,
+                    shm.name,
+                    ords.shape,
+                    start,
+                    end,
+                    N,
+                    None if weights is None else weights[start:end],
+                )
+                for start, end in zip(bounds[:-1], bounds[1:])
+            ]
+            counts = np.sum([shard.result() for shard in shards], axis=0)
+    finally:
+        shm.close()
+        shm.unlink()
+    return counts
+
+
+def _profile_shard(
+    name: str,
+    shape: Tuple[int, int],
+    start: int,
+    end: int,
+    N: int,
+    weights: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    # Runs in a worker process: count rows [start, end) of the shared ordinals
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)  # type: ignore
+    except TypeError:  # Python < 3.13
+        shm = shared_memory.SharedMemory(name=name)
+    try:
+        ords = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        counts = _profile_ords(ords[start:end], N, weights=weights)
+        del ords  # Release the shared buffer before closing
+    finally:
+        shm.close()
+    return counts
 
 
 def dna(string: str) -> Seq:
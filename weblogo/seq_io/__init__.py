@@ -138,8 +138,11 @@ Attributes :
 #    - http://www.genomatix.de/online_help/help/sequence_formats.html
 
 
+import io
+import logging
+import re
 from types import ModuleType
-from typing import List, Optional, TextIO
+from typing import Any, Iterator, List, Optional, TextIO
 
 from ..seq import Alphabet, SeqList
 from . import genbank_io  # null_io,
@@ -172,6 +175,8 @@ __all__ = [
     "array_io",
     "genbank_io",
     "read",
+    "sniff",
+    "RewindableStream",
     "formats",
     "format_names",
     "format_extensions",
@@ -217,6 +222,8 @@ def format_extensions() -> dict:
     return fext
 
 
+_log = logging.getLogger(__name__)
+
 # seq_io._parsers is an ordered list of sequence parsers that are tried, in
 # turn, on files of unknown format. Each parser must raise an exception when
 # fed a format further down the list.
@@ -261,13 +268,157 @@ def _get_parsers(fin: TextIO) -> List[ModuleType]:
     return parsers
 
 
+# Signatures of formats that can be recognized from the start of the file.
+# Each is a regular expression matched against the first non-blank line, and
+# the corresponding parsers, in order.
+_signatures = (
+    (re.compile(r">[A-Z0-9]{2};"), (nbrf_io, fasta_io)),
+    (re.compile(r">"), (fasta_io,)),
+    (re.compile(r"CLUSTAL"), (clustal_io,)),
+    (re.compile(r"#\s*STOCKHOLM"), (stockholm_io,)),
+    (re.compile(r"#NEXUS", re.IGNORECASE), (nexus_io,)),
+    (re.compile(r"LOCUS"), (genbank_io,)),
+    (re.compile(r"!!(AA|NA)_MULTIPLE_ALIGNMENT|PileUp"), (msf_io,)),
+    (re.compile(r"\s*\d+\s+\d+(\s|$)"), (phylip_io,)),
+)
+
+# Number of characters examined by sniff()
+_sniff_size = 4096
+
+
+def sniff(fin: TextIO) -> List[ModuleType]:
+    """Guess the format of a sequence file from the first few kilobytes,
+    without parsing the whole file. The file position is restored afterwards.
+
+    Returns:
+        The likely format parsers, best first. Empty if the start of the file
+        is not distinctive.
+    """
+    position = fin.tell()
+    head = fin.read(_sniff_size)
+    fin.seek(position)
+    return _sniff(head)
+
+
+def _sniff(head: str) -> List[ModuleType]:
+    for line in head.splitlines():
+        if line and not line.isspace():
+            break
+    else:
+        return []
+
+    for signature, parsers in _signatures:
+        if signature.match(line):
+            return list(parsers)
+
+    # MSF files may start with free text, but the header ends with a line
+    # containing 'MSF:' and 'Check:', and then '//'
+    if re.search(r"MSF:.*Check:.*\.\.\s*$", head, re.MULTILINE):
+        return [msf_io]
+
+    return []
+
+
+class RewindableStream:
+    """Wrap a non-seekable text stream, such as a pipe or sys.stdin, so that
+    it can be rewound to the start and read again.
+
+    Only the text read so far is remembered, not the whole stream. Once
+    stop_recording() is called the stream can no longer be rewound, and the
+    remainder of the input passes straight through to the reader.
+    """
+
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+        self._record: Optional[List[str]] = []
+        self._buffer = ""  # Recorded text to be read again after a rewind
+        self._offset = 0
+        self._position = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.stream, name)
+
+    def seekable(self) -> bool:
+        return self._record is not None
+
+    def stop_recording(self) -> None:
+        """Forget the text read so far. The stream can not be rewound again."""
+        self._record = None
+
+    def tell(self) -> int:
+        if self._record is None:
+            raise io.UnsupportedOperation("Stream is no longer rewindable")
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence != io.SEEK_SET or offset not in (0, self.tell()):
+            raise io.UnsupportedOperation("Can only rewind to the start of a stream")
+        if offset != self._position:
+            assert self._record is not None
+            self._buffer = "".join(self._record)
+            self._record = [self._buffer]
+            self._offset = 0
+            self._position = 0
+        return offset
+
+    def _consume(self, buffered: str, fresh: str) -> str:
+        if fresh and self._record is not None:
+            self._record.append(fresh)
+        if self._offset >= len(self._buffer):
+            self._buffer = ""
+            self._offset = 0
+        text = buffered + fresh
+        self._position += len(text)
+        return text
+
+    def read(self, size: Optional[int] = -1) -> str:
+        start = self._offset
+        if size is None or size < 0:
+            self._offset = len(self._buffer)
+            return self._consume(self._buffer[start:], self.stream.read())
+
+        self._offset = min(start + size, len(self._buffer))
+        buffered = self._buffer[start : self._offset]
+        fresh = self.stream.read(size - len(buffered)) if len(buffered) < size else ""
+        return self._consume(buffered, fresh)
+
+    def readline(self) -> str:
+        if not self._buffer and self._record is None:
+            return self.stream.readline()
+
+        start = self._offset
+        end = self._buffer.find("\n", start)
+        if end >= 0:
+            self._offset = end + 1
+            return self._consume(self._buffer[start : self._offset], "")
+        self._offset = len(self._buffer)
+        return self._consume(self._buffer[start:], self.stream.readline())
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+
 def read(fin: TextIO, alphabet: Optional[Alphabet] = None) -> SeqList:
     """Read a sequence file and attempt to guess its format.
-    First the filename extension (if available) is used to infer the format.
-    If that fails, then we attempt to parse the file using several common
-    formats.
 
-    Note, fin cannot be unseekable stream such as sys.stdin
+    First the start of the file is examined for distinctive signatures (see
+    sniff()), and the filename extension (if available) is used to infer the
+    format. If the likely formats fail, then we attempt to parse the file using
+    several common formats.
+
+    A non-seekable stream, such as sys.stdin, is not read into memory up
+    front. If the start of the stream identifies a single format the rest of
+    the stream is passed straight to that parser. Otherwise the text is kept
+    so that the other formats can be tried in turn.
+
+    The format that was read, and the formats tried before it, are logged
+    (at level DEBUG) to the "weblogo.seq_io" logger.
 
     returns :
         SeqList
@@ -277,14 +428,31 @@ def read(fin: TextIO, alphabet: Optional[Alphabet] = None) -> SeqList:
     """
 
     alphabet = Alphabet(alphabet)
-    parsers = _get_parsers(fin)
-
+    stream: Any = fin
+    if not stream.seekable():
+        stream = RewindableStream(stream)
+    stream.seek(0)
+    sniffed = sniff(stream)
+    parsers = sniffed + [p for p in _get_parsers(stream) if p not in sniffed]
+    rewindable = isinstance(stream, RewindableStream)
+
+    tried = []
     for p in parsers:
-        fin.seek(0)
+        stream.seek(0)
+        tried.append(p)
+        if rewindable and (p is parsers[-1] or sniffed == [p]):
+            stream.stop_recording()
         try:
-            return p.read(fin, alphabet)  # type: ignore
+            seqs = p.read(stream, alphabet)  # type: ignore
         except ValueError:
-            pass
+            if not stream.seekable():
+                break
+            continue
+        _log.debug("Parsed as %s (Tried %s)", p.names[0], _format_names(tried))  # type: ignore
+        return seqs
+
+    raise ValueError("Cannot parse sequence file: Tried %s " % _format_names(tried))
+
 
-    names = ", ".join([p.names[0] for p in parsers])  # type: ignore
-    raise ValueError("Cannot parse sequence file: Tried %s " % names)
+def _format_names(parsers: List[ModuleType]) -> str:
+    return ", ".join([p.names[0] for p in parsers])  # type: ignore
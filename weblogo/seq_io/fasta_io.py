@@ -54,7 +54,13 @@ VLARHF-QH-EFTPELQ-HALEAHFCA------V---GDALA----K-----A-----YH-----------
 """
 
 
-from typing import Iterator, List, Optional, TextIO
+import codecs
+import io
+import mmap
+import os
+import re
+import stat
+from typing import Iterator, List, Optional, TextIO, Tuple
 
 from ..seq import Alphabet, Seq, SeqList
 
@@ -123,6 +129,9 @@ def read(fin: TextIO, alphabet: Optional[Alphabet] = None) -> SeqList:
 def iterseq(fin: TextIO, alphabet: Optional[Alphabet] = None) -> Iterator[Seq]:
     """Parse a fasta file and generate sequences.
 
+    Regular files are memory mapped and parsed a record at a time, rather than
+    line by line.
+
     Args:
         fin -- A stream or file to read
         alphabet -- The expected alphabet of the data, if given
@@ -132,7 +141,12 @@ def iterseq(fin: TextIO, alphabet: Optional[Alphabet] = None) -> Iterator[Seq]:
         ValueError -- If the file is unparsable
     """
     alphabet = Alphabet(alphabet)
+    if _mappable(fin, alphabet):
+        return _iterseq_mapped(fin, alphabet)
+    return _iterseq_lines(fin, alphabet)
+
 
+def _iterseq_lines(fin: TextIO, alphabet: Alphabet) -> Iterator[Seq]:
     seqs = []
     comments: List[str] = []  # FIXME: comments before first sequence are lost.
     header = None
@@ -185,6 +199,114 @@ def iterseq(fin: TextIO, alphabet: Optional[Alphabet] = None) -> Iterator[Seq]:
     yield build_seq(seqs, alphabet, header, header_lineno, comments)
 
 
+# Characters that str.strip() removes from the ends of a line
+_whitespace = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+
+# Input the record parser does not handle: a header line with whitespace
+# before the '>', or a bare carriage return line ending. (Two simple patterns
+# scan much faster than one with alternatives.)
+_irregular = (
+    re.compile(rb"\n[ \t\x0b\x0c\x1c-\x1f]+>"),
+    re.compile(rb"\r(?!\n)"),
+)
+
+
+def _mappable(fin: TextIO, alphabet: Alphabet) -> bool:
+    # Only regular files, opened in text mode from the start, with an ascii
+    # compatible encoding and an ascii alphabet.
+    if not isinstance(fin, io.TextIOWrapper) or not fin.seekable():
+        return False
+    if codecs.lookup(fin.encoding).name not in ("utf-8", "ascii"):
+        return False
+    if any(b != 0xFF for b in alphabet._ord_table[128:]):
+        return False
+    try:
+        st = os.fstat(fin.fileno())
+    except (OSError, ValueError):
+        return False
+    return stat.S_ISREG(st.st_mode) and st.st_size > 0 and fin.tell() == 0
+
+
+def _iterseq_mapped(fin: TextIO, alphabet: Alphabet) -> Iterator[Seq]:
+    with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if any(pattern.search(data) for pattern in _irregular):  # type: ignore
+            yield from _iterseq_lines(fin, alphabet)
+            return
+
+        encoding = fin.encoding
+        table = alphabet._ord_table
+        plain = bytes(
+            [c for c in range(128) if table[c] != 0xFF and c not in b";" + _whitespace]
+        )
+
+        # Text before the first header may only be blank lines or comments
+        size = len(data)
+        pos = 0 if data[:1] == b">" else data.find(b"\n>") + 1
+        if pos == 0 and data[:1] != b">":
+            pos = size
+        preamble = data[:pos].decode(encoding).split("\n")
+        for lineno, line in enumerate(preamble):
+            line = line.strip()
+            if line.startswith(">"):
+                yield from _iterseq_lines(fin, alphabet)
+                return
+            if line and not line.startswith(";"):
+                raise ValueError(
+                    "Parse failed on line %d: sequence before header" % (lineno)
+                )
+        lineno = len(preamble) - 1
+
+        while pos < size:
+            eol = data.find(b"\n", pos)
+            if eol < 0:
+                eol = size
+            end = data.find(b"\n>", eol)
+            end = size if end < 0 else end + 1
+
+            header = data[pos + 1 : eol].decode(encoding).rstrip()
+            record = data[eol + 1 : end]
+            body = record.translate(None, b"\r\n")
+            comments: List[str] = []
+            if body.translate(None, plain):
+                # Whitespace, comments or non-alphabetic characters.
+                text, comments = _record_lines(record.decode(encoding))
+                if not alphabet.alphabetic(text):
+                    raise ValueError(
+                        "Parse failed with sequence starting at line %d: "
+                        "Character not in alphabet: %s" % (lineno, alphabet)
+                    )
+            else:
+                text = body.decode("ascii")
+
+            # As with the line parser, a final record without sequence data
+            # is dropped.
+            if text or end < size:
+                name = header.split(" ", 1)[0]
+                if comments:
+                    header += "\n" + "\n".join(comments)
+                yield Seq._unchecked(text, alphabet, name=name, description=header)
+
+            lineno += 1 + record.count(b"\n")
+            pos = end
+
+    fin.seek(0, io.SEEK_END)
+
+
+def _record_lines(text: str) -> Tuple[str, List[str]]:
+    # The sequence and comments of one record, parsed line by line
+    seqs = []
+    comments = []
+    for line in text.split("\n"):
+        line = line.strip()
+        if line == "":
+            continue
+        if line.startswith(";"):
+            comments.append(line[1:])
+        else:
+            seqs.append(line)
+    return "".join(seqs), comments
+
+
 def write(fout: TextIO, seqs: SeqList) -> None:
     """Write a fasta file.
 
@@ -0,0 +1,212 @@
+#  Copyright (c) 2024 Gavin E. Crooks
+#
+#  This software is distributed under the MIT Open Source License.
+#  <http://www.opensource.org/licenses/mit-license.html>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#  THE SOFTWARE.
+
+"""Opt-in timing of the stages of the logo pipeline.
+
+The main stages of building a logo (reading the sequences, choosing the
+alphabet, counting the profile, calculating the column statistics, formatting
+and converting the logo) are wrapped in timed() stages. Timing is off unless a
+Timings recorder is active, in which case each stage records the wall clock
+time, CPU time and peak memory allocated, accumulated over every call.
+
+Stages can nest, e.g. LogoData.from_counts runs within the caller's own
+stages, so the times of different stages can overlap. Peak memory is the
+largest increase in memory traced by tracemalloc over the stage.
+
+The recorder is held in a context variable, so concurrent asyncio tasks or
+threads record to their own recorder (or not at all).
+
+Classes :
+- Timings -- Record and report the times of the stages run in its context.
+
+Functions :
+- timed -- Context manager (or decorator) that times a named stage.
+
+Example :
+
+>>> from weblogo import *
+>>> from weblogo.timings import Timings, timed
+>>> seqs = SeqList(["ACGT", "ACGA"], alphabet=unambiguous_dna_alphabet)
+>>> with Timings() as timings:
+...     with timed("my stage"):
+...         data = LogoData.from_seqs(seqs)
+>>> [stage["stage"] for stage in timings.as_dict()["stages"]]
+['my stage', 'SeqList.profile', 'LogoData.from_counts']
+"""
+
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Iterator, List, Optional
+
+__all__ = ["Timings", "timed"]
+
+
+class Timings:
+    """Record the wall time, CPU time and peak memory of the timed() stages
+    run while the recorder is active, either within a 'with' block or between
+    start() and stop().
+
+    Memory tracing (tracemalloc) slows down memory allocation. If trace_memory
+    is False, peak memory is not recorded.
+    """
+
+    def __init__(self, trace_memory: bool = True) -> None:
+        self.trace_memory = trace_memory
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._token: Optional[Token] = None
+        self._started_tracing = False
+
+    def start(self) -> "Timings":
+        """Activate this recorder in the current context."""
+        if self._token is not None:
+            raise RuntimeError("Timings already started")
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._token = _active_timings.set(self)
+        return self
+
+    def stop(self) -> None:
+        """Deactivate this recorder. Recorded stages are kept."""
+        if self._token is None:
+            return
+        _active_timings.reset(self._token)
+        self._token = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def __enter__(self) -> "Timings":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    def _enter(self, stage: str) -> None:
+        with self._lock:
+            if stage not in self._stages:
+                record: Dict[str, Any] = {"calls": 0, "wall_time": 0.0, "cpu_time": 0.0}
+                if self.trace_memory:
+                    record["peak_memory"] = 0
+                self._stages[stage] = record
+
+    def _record(self, stage: str, wall: float, cpu: float, memory: int) -> None:
+        with self._lock:
+            record = self._stages[stage]
+            record["calls"] += 1
+            record["wall_time"] += wall
+            record["cpu_time"] += cpu
+            if self.trace_memory:
+                record["peak_memory"] = max(record["peak_memory"], memory)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The recorded stages, in the order each was first entered. Times are
+        in seconds, and peak memory in bytes."""
+        with self._lock:
+            stages: List[Dict[str, Any]] = [
+                dict(stage=stage, **record) for stage, record in self._stages.items()
+            ]
+        return {"stages": stages}
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        """The recorded stages as a JSON string (See as_dict)."""
+        return json.dumps(self.as_dict(), indent=indent)
+
+    def report(self) -> str:
+        """A human readable table of the recorded stages."""
+        stages = self.as_dict()["stages"]
+        width = max([len(stage["stage"]) for stage in stages] + [5])
+        lines = [
+            "%-*s %6s %10s %10s %12s"
+            % (width, "stage", "calls", "wall (s)", "cpu (s)", "memory (kB)")
+        ]
+        for stage in stages:
+            memory = stage.get("peak_memory")
+            lines.append(
+                "%-*s %6d %10.4f %10.4f %12s"
+                % (
+                    width,
+                    stage["stage"],
+                    stage["calls"],
+                    stage["wall_time"],
+                    stage["cpu_time"],
+                    "-" if memory is None else "%.1f" % (memory / 1024),
+                )
+            )
+        return "\n".join(lines) + "\n"
+
+
+# The active Timings recorder, and the memory frame of the innermost stage.
+_active_timings: ContextVar[Optional[Timings]] = ContextVar(
+    "weblogo_timings", default=None
+)
+_stage_frame: ContextVar[Optional[List[int]]] = ContextVar(
+    "weblogo_stage_frame", default=None
+)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Time a named stage of the logo pipeline, if a Timings recorder is
+    active. Can also be used as a function decorator.
+    """
+    timings = _active_timings.get()
+    if timings is None:
+        yield
+        return
+
+    timings._enter(stage)
+    tracing = timings.trace_memory and tracemalloc.is_tracing()
+    # Memory frame: [traced memory at start, largest traced memory seen]
+    frame = [0, 0]
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        # Fold the peak so far into the enclosing stage before resetting it
+        parent = _stage_frame.get()
+        if parent is not None:
+            parent[1] = max(parent[1], peak)
+        tracemalloc.reset_peak()
+        frame = [current, current]
+    token = _stage_frame.set(frame)
+
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall
+        cpu = time.process_time() - cpu
+        _stage_frame.reset(token)
+        memory = 0
+        if tracing and tracemalloc.is_tracing():
+            frame[1] = max(frame[1], tracemalloc.get_traced_memory()[1])
+            memory = frame[1] - frame[0]
+            parent = _stage_frame.get()
+            if parent is not None:
+                parent[1] = max(parent[1], frame[1])
+        timings._record(stage, wall, cpu, memory)
@@ -0,0 +1,274 @@
+#  Copyright (c) 2024 Gavin E. Crooks
+#
+#  This software is distributed under the MIT Open Source License.
+#  <http://www.opensource.org/licenses/mit-license.html>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#  THE SOFTWARE.
+
+"""Sequence weights, which correct sequence profiles for redundant sequences.
+
+Multiple sequence alignments often contain many near identical sequences,
+which then dominate the profile. Weighting each sequence down by its
+redundancy gives fractional counts that better reflect the diversity of the
+family. Weights are calculated from the ordinal matrix of the alignment, one
+row per sequence.
+
+Functions :
+- sequence_weights -- Weights for a SeqList or Alignment, by named scheme.
+- henikoff_weights -- Position based weights (Henikoff & Henikoff 1994).
+- cluster_weights  -- One over the size of each cluster of similar sequences.
+
+Other :
+- weighting_schemes -- The names of the available weighting schemes.
+
+Ref :
+    Henikoff S, Henikoff JG, Position-based sequence weights,
+        J. Mol. Biol. 243 574-578 (1994)
+
+Example :
+
+>>> from weblogo import *
+>>> from weblogo.weights import sequence_weights
+>>> seqs = SeqList(["ACGT", "ACGT", "ACGT", "TTTT"], alphabet=unambiguous_dna_alphabet)
+>>> sequence_weights(seqs, "cluster").tolist()
+[0.3333333333333333, 0.3333333333333333, 0.3333333333333333, 1.0]
+"""
+
+from collections import Counter
+from itertools import chain
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .seq import Alignment, SeqList, _profile_ords
+from .timings import timed
+
+__all__ = [
+    "sequence_weights",
+    "henikoff_weights",
+    "cluster_weights",
+    "weighting_schemes",
+]
+
+weighting_schemes = ("none", "henikoff", "cluster")
+
+
+@timed("sequence_weights")
+def sequence_weights(
+    seqs: Union[SeqList, Alignment],
+    scheme: str = "henikoff",
+    identity: float = 0.8,
+) -> Optional[np.ndarray]:
+    """Calculate a weight for each sequence of an alignment, suitable for
+    SeqList.profile(weights=...) or LogoData.from_seqs(weights=...).
+
+    Args:
+        seqs: The aligned sequences
+        scheme: One of weighting_schemes
+        identity: The fractional sequence identity at which sequences are
+            clustered together (Only for the 'cluster' scheme)
+    Returns:
+        An array of weights, or None for the 'none' scheme
+    """
+    if scheme not in weighting_schemes:
+        raise ValueError("Unknown weighting scheme: '%s'" % scheme)
+    if scheme == "none":
+        return None
+
+    if isinstance(seqs, Alignment):
+        ords = seqs.ords
+    else:
+        if not seqs.alphabet:
+            raise ValueError("No alphabet")
+        ords = seqs._ord_matrix(seqs.alphabet)
+
+    if scheme == "henikoff":
+        return henikoff_weights(ords)
+    return cluster_weights(ords, identity)
+
+
+def henikoff_weights(ords: np.ndarray) -> np.ndarray:
+    """Position based sequence weights. At each column, every distinct
+    symbol gets an equal share of the weight, which is then split evenly
+    between the sequences with that symbol. A sequence's weight is its
+    share summed over all columns. Gaps, and any other characters outside
+    the alphabet, count as one more symbol.
+
+    The weights are scaled so that the most distinctive sequence has weight
+    one, and so no weight is greater than one.
+
+    Args:
+        ords: A 2D array of alphabet ordinals, one row per sequence
+    Returns:
+        An array of weights, one per sequence
+    """
+    rows, L = ords.shape
+    weights = np.zeros(rows, dtype=np.float64)
+    if rows == 0 or L == 0:
+        return weights
+
+    counts = _profile_ords(ords, 256)
+    distinct = np.count_nonzero(counts, axis=1)
+    columns = np.arange(L)
+    chunk = max(1, (1 << 20) // L)
+    for start in range(0, rows, chunk):
+        block = ords[start : start + chunk]
+        n = counts[columns, block]
+        weights[start : start + chunk] = (1.0 / (distinct * n)).sum(axis=1)
+
+    weights /= weights.max()
+    return weights
+
+
+def cluster_weights(ords: np.ndarray, identity: float = 0.8) -> np.ndarray:
+    """Cluster sequences at a fractional sequence identity, and weight each
+    sequence by one over the size of its cluster, so that each cluster counts
+    as a single sequence in total.
+
+    Sequences are clustered greedily, in order: each sequence joins the
+    cluster of the most similar earlier representative with at least the
+    given identity, or else becomes a new representative. Identity is the
+    fraction of alignment columns in which two sequences agree.
+
+    To avoid comparing every pair of sequences the columns are dealt into
+    blocks, a few more blocks than the number of allowed mismatches. Two
+    sequences that are similar enough must then agree exactly over several
+    blocks, so only representatives that share that many blocks with a
+    sequence need to be compared. Columns in which every sequence agrees are
+    left out, and the other columns are dealt by how conserved they are, so
+    that every block tells sequences apart. Blocks shared with too many
+    representatives (e.g. runs of gaps) are skipped, while a true match
+    must still share one of the remaining blocks.
+
+    Args:
+        ords: A 2D array of alphabet ordinals, one row per sequence
+        identity: Fractional identity threshold, 0 < identity <= 1
+    Returns:
+        An array of weights, one per sequence
+    """
+    if not 0.0 < identity <= 1.0:
+        raise ValueError("Identity must be greater than 0 and at most 1")
+
+    rows, L = ords.shape
+    if rows == 0:
+        return np.zeros(0, dtype=np.float64)
+
+    # Identical sequences always cluster together, so only the distinct
+    # sequences need to be clustered.
+    ords = np.ascontiguousarray(ords)
+    unique, inverse = _unique_rows(ords)
+
+    mismatches = int(np.floor((1.0 - identity) * L + 1e-9))
+    need = L - mismatches
+    cluster: np.ndarray
+    if need <= 0 or len(unique) == 1:
+        cluster = np.zeros(len(unique), dtype=np.intp)
+    else:
+        cluster = _greedy_clusters(unique, mismatches, need)
+
+    seq_cluster = cluster[inverse]
+    sizes = np.bincount(seq_cluster)
+    return 1.0 / sizes[seq_cluster]
+
+
+def _unique_rows(ords: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # The distinct rows of a contiguous 2D uint8 array, in order of first
+    # appearance, and for each row the index of its distinct row.
+    rows, L = ords.shape
+    if L == 0:
+        return ords[:1], np.zeros(rows, dtype=np.intp)
+    keys = ords.view(np.dtype((np.void, L))).ravel()
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return ords[first[order]], rank[inverse.ravel()]
+
+
+# Blocks shared with more representatives than this are skipped, if possible
+_cluster_bucket_size = 64
+
+
+def _greedy_clusters(ords: np.ndarray, mismatches: int, need: int) -> np.ndarray:
+    rows = len(ords)
+
+    # Columns in which every sequence agrees can not tell sequences apart.
+    # If no more columns vary than the allowed mismatches, every pair of
+    # sequences is similar enough.
+    top = _profile_ords(ords, 256).max(axis=1)
+    varied = np.flatnonzero(top < rows)
+    if len(varied) <= mismatches:
+        return np.zeros(rows, dtype=np.intp)
+
+    # Deal the columns, from least to most conserved, back and forth across
+    # the blocks. Two sequences with at most `mismatches` differences agree
+    # over at least `least` blocks.
+    nblocks = min(len(varied), mismatches + 1 + (mismatches + 1) // 4)
+    least = nblocks - mismatches
+    order = varied[np.argsort(top[varied], kind="stable")]
+    turn: np.ndarray = np.arange(len(order)) % (2 * nblocks)
+    deal = np.where(turn < nblocks, turn, 2 * nblocks - 1 - turn)
+
+    # Label the contents of each block, with labels that are distinct across
+    # blocks, so that a single dictionary indexes every block.
+    labels: np.ndarray = np.empty((rows, nblocks), dtype=np.int64)
+    offset = 0
+    for b in range(nblocks):
+        block = np.ascontiguousarray(ords[:, order[deal == b]])
+        keys = block.view(np.dtype((np.void, block.shape[1]))).ravel()
+        _, inverse = np.unique(keys, return_inverse=True)
+        labels[:, b] = inverse.ravel() + offset
+        offset += int(inverse.max()) + 1
+
+    cluster: np.ndarray = np.empty(rows, dtype=np.intp)
+    reps: List[int] = []
+    index: Dict[int, List[int]] = {}
+    for i, row_labels in enumerate(labels.tolist()):
+        buckets = [index[label] for label in row_labels if label in index]
+
+        # Skip the largest buckets, but no more than a true match might share
+        skip = 0
+        if least > 1:
+            buckets.sort(key=len, reverse=True)
+            while (
+                skip < least - 1
+                and skip < len(buckets)
+                and len(buckets[skip]) > _cluster_bucket_size
+            ):
+                skip += 1
+        if least - skip == 1:
+            candidates = sorted(set().union(*buckets[skip:]))
+        else:
+            shared = Counter(chain.from_iterable(buckets[skip:]))
+            candidates = sorted(r for r, n in shared.items() if n >= least - skip)
+
+        if candidates:
+            cands = np.array(candidates, dtype=np.intp)
+            same = np.count_nonzero(ords[cands] == ords[i], axis=1)
+            best = int(same.argmax())
+            if same[best] >= need:
+                cluster[i] = cluster[cands[best]]
+                continue
+
+        cluster[i] = len(reps)
+        reps.append(i)
+        for label in row_labels:
+            index.setdefault(label, []).append(i)
+
+    return cluster